@@ -0,0 +1,117 @@
+/**
+  ******************************************************************************
+  * @file           : adcfilter_test.c
+  * @brief          : Host test of the ADC scan averaging.
+  ******************************************************************************
+  * Build and run on Linux from the Controller directory:
+  *
+  *   gcc -O2 -ICore/Inc Bench/adcfilter_test.c Core/Src/adcfilter.c -o adcfilter_test
+  *   ./adcfilter_test
+  *
+  * Fills interleaved scan buffers by hand and checks adcf_mean() and
+  * adcf_newest() against the values they must give. Prints each failed
+  * check and exits with 1 if there was any.
+  ******************************************************************************
+  */
+#include <stdio.h>
+
+#include "adcfilter.h"
+
+#define ADC_CHANNELS    2           /* Same as main.c                         */
+#define ADC_OVERSAMPLE  16
+#define ADC_MAX         4095        /* 12-bit conversions                     */
+
+#define CHECK(cond) check((cond), #cond, __LINE__)
+
+static int failures;
+
+static void check(int ok, const char *what, int line)
+{
+    if (!ok)
+    {
+        printf("line %d: check failed: %s\n", line, what);
+        failures++;
+    }
+}
+
+static void testRounding(void)
+{
+    /* Means of 1.25, 1.5 and 1.75 round to the nearest count, halves up */
+    static const uint16_t quarter[4] = { 1, 1, 1, 2 };
+    static const uint16_t half[4] = { 1, 1, 2, 2 };
+    static const uint16_t threeQuarters[4] = { 1, 2, 2, 2 };
+    CHECK(adcf_mean(quarter, 4, 1, 0) == 1);
+    CHECK(adcf_mean(half, 4, 1, 0) == 2);
+    CHECK(adcf_mean(threeQuarters, 4, 1, 0) == 2);
+    CHECK(adcf_mean(quarter, 0, 1, 0) == 0);
+}
+
+static void testStride(void)
+{
+    /* Channel 0 ramps, channel 1 stays near the top: neither leaks into the other */
+    uint16_t samples[ADC_OVERSAMPLE * ADC_CHANNELS];
+    for (uint16_t i = 0; i < ADC_OVERSAMPLE; i++)
+    {
+        samples[i * ADC_CHANNELS] = i * 10;
+        samples[i * ADC_CHANNELS + 1] = 4000 + (i & 1);
+    }
+    CHECK(adcf_mean(samples, ADC_OVERSAMPLE, ADC_CHANNELS, 0) == 75);
+    CHECK(adcf_mean(samples, ADC_OVERSAMPLE, ADC_CHANNELS, 1) == 4001);
+
+    /* Three channels: the middle one only */
+    uint16_t triple[4 * 3];
+    for (uint16_t i = 0; i < 4; i++)
+    {
+        triple[i * 3] = 0;
+        triple[i * 3 + 1] = 100 + i;
+        triple[i * 3 + 2] = ADC_MAX;
+    }
+    CHECK(adcf_mean(triple, 4, 3, 1) == 102);
+}
+
+static void testFullBuffer(void)
+{
+    /* Every sample at full scale must not overflow the sum */
+    static uint16_t samples[4096 * ADC_CHANNELS];
+    for (uint32_t i = 0; i < sizeof(samples) / sizeof(samples[0]); i++)
+        samples[i] = ADC_MAX;
+    CHECK(adcf_mean(samples, ADC_OVERSAMPLE, ADC_CHANNELS, 0) == ADC_MAX);
+    CHECK(adcf_mean(samples, 4096, ADC_CHANNELS, 1) == ADC_MAX);
+}
+
+static void testNewest(void)
+{
+    /* Frame i holds i * 10 + channel */
+    uint16_t samples[ADC_OVERSAMPLE * ADC_CHANNELS];
+    const uint16_t total = ADC_OVERSAMPLE * ADC_CHANNELS;
+    for (uint16_t i = 0; i < ADC_OVERSAMPLE; i++)
+    {
+        samples[i * ADC_CHANNELS] = i * 10;
+        samples[i * ADC_CHANNELS + 1] = i * 10 + 1;
+    }
+    /* NDTR just reloaded: the whole buffer was written, the last frame is newest */
+    CHECK(adcf_newest(samples, ADC_OVERSAMPLE, ADC_CHANNELS, 0, total) == 150);
+    CHECK(adcf_newest(samples, ADC_OVERSAMPLE, ADC_CHANNELS, 1, total) == 151);
+    /* One frame written since the wrap */
+    CHECK(adcf_newest(samples, ADC_OVERSAMPLE, ADC_CHANNELS, 1, total - 2) == 1);
+    /* Halfway through frame 5: frame 4 is the newest complete one */
+    CHECK(adcf_newest(samples, ADC_OVERSAMPLE, ADC_CHANNELS, 0, total - 11) == 40);
+    CHECK(adcf_newest(samples, ADC_OVERSAMPLE, ADC_CHANNELS, 1, total - 11) == 41);
+    /* Last transfer before the wrap */
+    CHECK(adcf_newest(samples, ADC_OVERSAMPLE, ADC_CHANNELS, 0, 1) == 140);
+}
+
+int main(void)
+{
+    testRounding();
+    testStride();
+    testFullBuffer();
+    testNewest();
+    if (failures)
+    {
+        printf("%d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("adcfilter: all checks passed\n");
+    return 0;
+}
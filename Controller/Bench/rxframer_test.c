@@ -0,0 +1,217 @@
+/**
+  ******************************************************************************
+  * @file           : rxframer_test.c
+  * @brief          : Host test of the receive framer and command queue.
+  ******************************************************************************
+  * Build and run on Linux from the Controller directory:
+  *
+  *   gcc -O2 -ICore/Inc Bench/rxframer_test.c Core/Src/rxframer.c Core/Src/frame.c -o rxframer_test
+  *   ./rxframer_test
+  *
+  * Bytes reach the framer the way they do on the board: written into a
+  * circular buffer of RX_DMA_SIZE bytes, with a receive event at half, full
+  * and idle that feeds the new bytes in one or two pieces, as
+  * HAL_UARTEx_RxEventCallback() in main.c does. Prints each failed check and
+  * exits with 1 if there was any.
+  ******************************************************************************
+  */
+#include <stdio.h>
+#include <string.h>
+
+#include "frame.h"
+#include "rxframer.h"
+
+#define RX_DMA_SIZE 64              /* Same as rxDma in main.c                */
+
+#define CHECK(cond) check((cond), #cond, __LINE__)
+
+static int failures;
+
+static void check(int ok, const char *what, int line)
+{
+    if (!ok)
+    {
+        printf("line %d: check failed: %s\n", line, what);
+        failures++;
+    }
+}
+
+/* Emulated receive DMA and its event callback, as in main.c */
+static uint8_t rxDma[RX_DMA_SIZE];
+static uint16_t dmaWrite;
+static uint16_t rxDmaPos;
+
+static void rxEvent(RxFramer *f, uint16_t size)
+{
+    if (size == rxDmaPos)
+        return;
+    if (size > rxDmaPos)
+    {
+        rxf_feed(f, &rxDma[rxDmaPos], size - rxDmaPos);
+    }
+    else
+    {
+        rxf_feed(f, &rxDma[rxDmaPos], RX_DMA_SIZE - rxDmaPos);
+        rxf_feed(f, rxDma, size);
+    }
+    rxDmaPos = (size == RX_DMA_SIZE) ? 0 : size;
+}
+
+/* DMA writes the bytes; events fire at half, full and when the line idles */
+static void receive(RxFramer *f, const void *data, uint16_t len)
+{
+    const uint8_t *bytes = data;
+    for (uint16_t i = 0; i < len; i++)
+    {
+        rxDma[dmaWrite++] = bytes[i];
+        if (dmaWrite == RX_DMA_SIZE / 2)
+            rxEvent(f, dmaWrite);
+        else if (dmaWrite == RX_DMA_SIZE)
+        {
+            rxEvent(f, RX_DMA_SIZE);
+            dmaWrite = 0;
+        }
+    }
+    rxEvent(f, dmaWrite ? dmaWrite : RX_DMA_SIZE);
+}
+
+static void reset(RxFramer *f)
+{
+    rxf_init(f);
+    dmaWrite = 0;
+    rxDmaPos = 0;
+}
+
+/* Pop the oldest command; 1 if it is text equal to expect */
+static int popText(RxFramer *f, const char *expect)
+{
+    const RxLine *line = rxf_peek(f);
+    int ok = line && line->kind == RXF_TEXT && line->len == strlen(expect)
+             && strcmp((const char *)line->data, expect) == 0;
+    rxf_pop(f);
+    return ok;
+}
+
+static void testSplitAcrossWrap(void)
+{
+    RxFramer f;
+    reset(&f);
+    /* 15 x "UP\r\n" leaves the DMA at byte 60, so the WR wraps round */
+    for (int i = 0; i < 15; i++)
+    {
+        receive(&f, "UP\r\n", 4);
+        CHECK(popText(&f, "UP"));
+    }
+    CHECK(rxDmaPos == 60);
+    receive(&f, "WR Hel", 6);
+    CHECK(rxf_peek(&f) == 0);
+    receive(&f, "lo;World\r\n", 10);
+    CHECK(rxDmaPos == 12);
+    CHECK(popText(&f, "WR Hello;World"));
+    CHECK(rxf_peek(&f) == 0);
+
+    /* A command delivered by the half, full and idle events in turn */
+    receive(&f, "LI 5\r\n", 6);
+    CHECK(popText(&f, "LI 5"));
+    receive(&f, "WR abcdefghijklmnopqrstuvwxyz;0123456789abcdefgh\r\n", 50);
+    CHECK(popText(&f, "WR abcdefghijklmnopqrstuvwxyz;0123456789abcdefgh"));
+}
+
+static void testFullQueue(void)
+{
+    RxFramer f;
+    reset(&f);
+    char text[8];
+    for (int i = 0; i < RXF_SLOTS; i++)
+    {
+        snprintf(text, sizeof(text), "LI %d\n", i);
+        receive(&f, text, (uint16_t)strlen(text));
+    }
+    CHECK(f.dropped == 0);
+    /* No slot left: the whole line is lost, not a piece of it */
+    receive(&f, "UP\n", 3);
+    CHECK(f.dropped == 1);
+    /* A line that started while full stays lost after a slot frees up */
+    receive(&f, "UP", 2);
+    CHECK(popText(&f, "LI 0"));
+    receive(&f, "\r\nES\r\n", 6);
+    CHECK(f.dropped == 2);
+    for (int i = 1; i < RXF_SLOTS; i++)
+    {
+        snprintf(text, sizeof(text), "LI %d", i);
+        CHECK(popText(&f, text));
+    }
+    CHECK(popText(&f, "ES"));
+    CHECK(rxf_peek(&f) == 0);
+}
+
+static void testOverlong(void)
+{
+    RxFramer f;
+    reset(&f);
+    char text[80];
+    memset(text, 'x', sizeof(text));
+    /* Text lines are cut to RXF_LINE_SIZE - 1 characters */
+    text[70] = '\n';
+    receive(&f, text, 71);
+    const RxLine *line = rxf_peek(&f);
+    CHECK(line && line->len == RXF_LINE_SIZE - 1 && line->data[RXF_LINE_SIZE - 1] == '\0');
+    rxf_pop(&f);
+
+    /* Binary frames that do not fit are dropped at the delimiter */
+    rxf_set_binary(&f, 1);
+    text[70] = FRAME_DELIMITER;
+    receive(&f, text, 71);
+    CHECK(rxf_peek(&f) == 0);
+    CHECK(f.dropped == 1);
+
+    uint8_t frame[FRAME_MAX_ENCODED];
+    size_t len = frame_build(FRAME_UP, 0, 0, frame);
+    receive(&f, frame, (uint16_t)len);
+    line = rxf_peek(&f);
+    CHECK(line && line->kind == RXF_FRAME && line->len == len - 1);
+    rxf_pop(&f);
+}
+
+static void testHiInBinary(void)
+{
+    RxFramer f;
+    reset(&f);
+    rxf_set_binary(&f, 1);
+    uint8_t frame[FRAME_MAX_ENCODED];
+    uint8_t led = 0x2A;
+    size_t len = frame_build(FRAME_LI, &led, 1, frame);
+    receive(&f, frame, (uint16_t)len);
+    receive(&f, "HI\r\n", 4);
+    CHECK(f.binary == 0);
+
+    const RxLine *line = rxf_peek(&f);
+    uint8_t packet[FRAME_MAX_PACKET];
+    uint8_t type;
+    const uint8_t *payload;
+    size_t payloadLen;
+    CHECK(line && line->kind == RXF_FRAME);
+    CHECK(line && frame_parse(line->data, line->len, packet, &type, &payload, &payloadLen)
+          && type == FRAME_LI && payloadLen == 1 && payload[0] == led);
+    rxf_pop(&f);
+    CHECK(popText(&f, "HI"));
+
+    /* Back in text mode the next line frames as text */
+    receive(&f, "UP\r\n", 4);
+    CHECK(popText(&f, "UP"));
+}
+
+int main(void)
+{
+    testSplitAcrossWrap();
+    testFullQueue();
+    testOverlong();
+    testHiInBinary();
+    if (failures)
+    {
+        printf("%d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("rxframer: all checks passed\n");
+    return 0;
+}
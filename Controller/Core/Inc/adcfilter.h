@@ -0,0 +1,30 @@
+/**
+  ******************************************************************************
+  * @file           : adcfilter.h
+  * @brief          : Averaging of the interleaved ADC scan buffer.
+  ******************************************************************************
+  * The ADC scans both pot channels continuously and DMA writes the results
+  * round and round a buffer of frames, one sample per channel per frame:
+  *
+  *   [ch0 ch1] [ch0 ch1] ... [ch0 ch1]
+  *
+  * adcf_mean() averages one channel over every frame in the buffer. The DMA
+  * keeps writing while it runs, which only means a few samples are newer
+  * than the rest. adcf_newest() picks the last complete frame instead, for
+  * callers that want every scan rather than a smoothed value.
+  *
+  * Both only read the buffer they are given, so Bench/adcfilter_test.c can
+  * check them on the host against hand-filled scans.
+  ******************************************************************************
+  */
+#ifndef __ADCFILTER_H
+#define __ADCFILTER_H
+
+#include <stdint.h>
+
+uint16_t adcf_mean(const volatile uint16_t *samples, uint16_t frames,
+                   uint8_t channels, uint8_t channel);
+uint16_t adcf_newest(const volatile uint16_t *samples, uint16_t frames,
+                     uint8_t channels, uint8_t channel, uint16_t remaining);
+
+#endif /* __ADCFILTER_H */
@@ -0,0 +1,54 @@
+/**
+  ******************************************************************************
+  * @file           : frame.h
+  * @brief          : Binary protocol framing (COBS + CRC16) shared with the
+  *                   host codec in GUI/src/Protocol.py.
+  ******************************************************************************
+  * A packet is  [type][payload ...][crc16 lo][crc16 hi]  where the CRC is
+  * CRC-16/CCITT-FALSE over type and payload. The packet is COBS encoded so it
+  * contains no zero bytes and a single 0x00 terminates every frame on the wire.
+  *
+  * Bench/rxframer_test.c links frame.c on the host to build its test frames.
+  ******************************************************************************
+  */
+#ifndef __FRAME_H
+#define __FRAME_H
+
+#include <stdint.h>
+#include <stddef.h>
+
+/* Frame types: host -> controller commands --------------------------------*/
+#define FRAME_HI            0x01
+#define FRAME_UP            0x02
+#define FRAME_WR            0x03    /* payload: "line1;line2" (no terminator) */
+#define FRAME_LI            0x04    /* payload: LED byte                      */
+#define FRAME_ES            0x05
+#define FRAME_WP            0x06    /* payload: row, column, characters       */
+#define FRAME_PC            0x07    /* payload: channel, deadband, interval ms
+                                       (both uint16 little endian)            */
+#define FRAME_SR            0x08    /* payload: sample pairs per second,
+                                       uint16 little endian; records follow
+                                       the ack (stream.h)                     */
+
+/* Acknowledgement of command type t is (t | FRAME_ACK), no payload */
+#define FRAME_ACK           0x80
+
+/* Frame types: controller -> host events ----------------------------------*/
+#define FRAME_POT0          0x10    /* payload: value, uint16 little endian   */
+#define FRAME_POT1          0x11
+#define FRAME_BTN0          0x20    /* BTN0..BTN3 are 0x20..0x23, no payload  */
+
+#define FRAME_DELIMITER     0x00
+#define FRAME_MAX_PACKET    48      /* type + payload + crc, before encoding  */
+#define FRAME_MAX_ENCODED   (FRAME_MAX_PACKET + FRAME_MAX_PACKET / 254 + 2)
+
+uint16_t crc16_ccitt(const uint8_t *data, size_t len);
+
+size_t cobs_encode(const uint8_t *src, size_t len, uint8_t *dst);
+size_t cobs_decode(const uint8_t *src, size_t len, uint8_t *dst);
+
+size_t frame_build(uint8_t type, const uint8_t *payload, size_t len, uint8_t *out);
+int frame_parse(const uint8_t *encoded, size_t len, uint8_t *packet,
+                uint8_t *type, const uint8_t **payload, size_t *payload_len);
+
+#endif /* __FRAME_H */
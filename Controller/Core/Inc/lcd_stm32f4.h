@@ -18,6 +18,8 @@
 #define    DISPLAY_ON      0x0C
 #define    DISPLAY_OFF     0x08
 #define    LINE_TWO        0xC0
+#define    SET_DDRAM       0x80    // OR with address: line one 0x00, line two 0x40
+#define    LCD_COLUMNS     16
 
 #define    POWER_UP        0x33
 #define    FOURBIT_MODE    0X32
@@ -47,6 +49,7 @@ void init_LCD(void);
 void lcd_command(unsigned char command);
 void lcd_putchar(unsigned char character);
 void lcd_putstring(char *instring);
+void lcd_goto(unsigned char row, unsigned char column);
 
 void delay(unsigned int microseconds);
 void pulse_strobe(void);
@@ -0,0 +1,53 @@
+/**
+  ******************************************************************************
+  * @file           : rxframer.h
+  * @brief          : Splits the UART receive stream into queued commands.
+  ******************************************************************************
+  * Bytes arrive in bursts from the circular receive DMA (rxf_feed() is called
+  * from the UART idle/half/complete event). In text mode a command ends at
+  * '\r' or '\n' and empty lines are skipped; in binary mode a frame ends at
+  * FRAME_DELIMITER. Each finished command goes into a small slot queue that
+  * the main loop empties with rxf_peek()/rxf_pop(), so a command arriving
+  * while the previous one is still being handled no longer overwrites it.
+  *
+  * One producer (the interrupt) and one consumer (the main loop) share the
+  * queue without locks. Bench/rxframer_test.c replays receive DMA events
+  * into it on the host.
+  ******************************************************************************
+  */
+#ifndef __RXFRAMER_H
+#define __RXFRAMER_H
+
+#include <stdint.h>
+
+#define RXF_SLOTS           8       /* Commands waiting for the main loop     */
+#define RXF_LINE_SIZE       50      /* Longest command kept, incl. '\0'       */
+
+#define RXF_TEXT            0
+#define RXF_FRAME           1
+
+typedef struct
+{
+    uint8_t kind;                   /* RXF_TEXT or RXF_FRAME                  */
+    uint8_t len;                    /* Bytes in data, without the '\0'        */
+    uint8_t data[RXF_LINE_SIZE];    /* Text lines are '\0' terminated         */
+} RxLine;
+
+typedef struct
+{
+    RxLine slots[RXF_SLOTS];
+    volatile uint8_t head;          /* Slots filled (free running)            */
+    volatile uint8_t tail;          /* Slots consumed (free running)          */
+    volatile uint8_t binary;        /* Framing mode for bytes from now on     */
+    uint8_t length;                 /* Bytes collected for the current slot   */
+    uint8_t overflow;               /* Current binary frame is too long       */
+    volatile uint32_t dropped;      /* Commands lost because the queue was full */
+} RxFramer;
+
+void rxf_init(RxFramer *f);
+void rxf_set_binary(RxFramer *f, uint8_t binary);
+void rxf_feed(RxFramer *f, const uint8_t *data, uint16_t len);
+const RxLine *rxf_peek(const RxFramer *f);
+void rxf_pop(RxFramer *f);
+
+#endif /* __RXFRAMER_H */
@@ -0,0 +1,50 @@
+/**
+  ******************************************************************************
+  * @file           : stream.h
+  * @brief          : Fixed-size pot sample records for streaming mode (SR),
+  *                   decoded by GUI/src/Stream.py.
+  ******************************************************************************
+  * While streaming, the controller sends nothing but records of 20 little
+  * endian uint16 words:
+  *
+  *   [sync 0x5AA5][seq][count][pot0 pot1] x STREAM_PAIRS [check]
+  *
+  * seq counts records so the host can see any that were dropped, check is
+  * the 16-bit sum of seq, count and the samples. The last record of a
+  * stream has count 0 and no samples; whatever follows it is text or
+  * binary frames again. ADC values are 12 bits, so the sync bytes A5 5A
+  * can never appear inside the samples.
+  *
+  * The layout relies on a little endian CPU, as both the Cortex-M4 and the
+  * host are.
+  ******************************************************************************
+  */
+#ifndef __STREAM_H
+#define __STREAM_H
+
+#include <stdint.h>
+
+#define STREAM_SYNC         0x5AA5
+#define STREAM_PAIRS        8       /* pot0/pot1 sample pairs per record      */
+
+typedef struct
+{
+    uint16_t sync;
+    uint16_t seq;
+    uint16_t count;                 /* Pairs in the record, 0 ends the stream */
+    uint16_t samples[STREAM_PAIRS * 2];
+    uint16_t check;
+} StreamRecord;
+
+typedef struct
+{
+    StreamRecord record;            /* Record being filled                    */
+    uint16_t fill;                  /* Pairs in it so far                     */
+    uint16_t seq;                   /* seq of the next record                 */
+} StreamBuilder;
+
+void stream_init(StreamBuilder *b);
+int stream_add(StreamBuilder *b, uint16_t pot0, uint16_t pot1);
+const StreamRecord *stream_end(StreamBuilder *b);
+
+#endif /* __STREAM_H */
@@ -0,0 +1,37 @@
+/**
+  ******************************************************************************
+  * @file           : txqueue.h
+  * @brief          : Byte ring buffer feeding the UART transmit DMA.
+  ******************************************************************************
+  * Producers (main loop, handle(), the EXTI callback) only copy whole
+  * messages in with txq_push(). The DMA side takes the longest contiguous
+  * run with txq_claim(), transmits it, and hands it back with txq_release()
+  * from the transfer complete callback.
+  *
+  * The queue does no locking of its own: on the target every push and claim
+  * runs with interrupts masked (see uartSend() in main.c). On the host,
+  * Bench/txqueue_bench.c stands in for the DMA and times the producer side.
+  ******************************************************************************
+  */
+#ifndef __TXQUEUE_H
+#define __TXQUEUE_H
+
+#include <stdint.h>
+
+typedef struct
+{
+    uint8_t *buf;
+    uint16_t mask;                  /* size - 1, size is a power of two       */
+    volatile uint16_t head;         /* Next byte to write (free running)      */
+    volatile uint16_t tail;         /* Next byte to transmit (free running)   */
+    volatile uint16_t busy;         /* Bytes claimed by the running DMA       */
+    volatile uint32_t dropped;      /* Messages refused because it was full   */
+} TxQueue;
+
+void txq_init(TxQueue *q, uint8_t *storage, uint16_t size);
+int txq_push(TxQueue *q, const uint8_t *data, uint16_t len);
+uint16_t txq_claim(TxQueue *q, const uint8_t **chunk);
+void txq_release(TxQueue *q);
+uint16_t txq_used(const TxQueue *q);
+
+#endif /* __TXQUEUE_H */
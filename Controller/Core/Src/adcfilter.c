@@ -0,0 +1,40 @@
+/**
+  ******************************************************************************
+  * @file           : adcfilter.c
+  * @brief          : ADC oversampling filter (see adcfilter.h).
+  ******************************************************************************
+  */
+#include "adcfilter.h"
+
+/**
+  * @brief  Rounded mean of channel over frames interleaved scan frames.
+  *         Averaging N samples cuts uncorrelated noise by sqrt(N).
+  * @retval Mean value, in ADC counts.
+  */
+uint16_t adcf_mean(const volatile uint16_t *samples, uint16_t frames,
+                   uint8_t channels, uint8_t channel)
+{
+    uint32_t sum = 0;
+
+    if (frames == 0)
+        return 0;
+
+    for (uint16_t i = 0; i < frames; i++)
+        sum += samples[i * channels + channel];
+
+    return (uint16_t)((sum + frames / 2) / frames);
+}
+
+/**
+  * @brief  channel from the newest complete frame in the buffer.
+  * @param  remaining: the DMA stream's NDTR, transfers left before it wraps.
+  * @retval Sample value, in ADC counts.
+  */
+uint16_t adcf_newest(const volatile uint16_t *samples, uint16_t frames,
+                     uint8_t channels, uint8_t channel, uint16_t remaining)
+{
+    uint16_t written = frames * channels - remaining;   /* Next index DMA writes */
+    uint16_t frame = (written / channels + frames - 1) % frames;
+
+    return samples[frame * channels + channel];
+}
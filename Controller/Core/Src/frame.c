@@ -0,0 +1,134 @@
+/**
+  ******************************************************************************
+  * @file           : frame.c
+  * @brief          : COBS framing and CRC16 for the binary protocol mode.
+  ******************************************************************************
+  */
+#include "frame.h"
+
+#include <string.h>
+
+/**
+  * @brief  CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF), bitwise.
+  *         Packets are a few tens of bytes, a table would cost 512 bytes of
+  *         flash for no measurable gain at 115200 baud.
+  */
+uint16_t crc16_ccitt(const uint8_t *data, size_t len)
+{
+    uint16_t crc = 0xFFFF;
+    while (len--)
+    {
+        crc ^= (uint16_t)(*data++) << 8;
+        for (int i = 0; i < 8; i++)
+            crc = (crc & 0x8000) ? (uint16_t)((crc << 1) ^ 0x1021) : (uint16_t)(crc << 1);
+    }
+    return crc;
+}
+
+/**
+  * @brief  COBS encode len bytes of src into dst (no trailing delimiter).
+  * @retval Number of bytes written, at most len + len/254 + 1.
+  */
+size_t cobs_encode(const uint8_t *src, size_t len, uint8_t *dst)
+{
+    size_t code_index = 0;
+    size_t out = 1;
+    uint8_t code = 1;
+
+    for (size_t i = 0; i < len; i++)
+    {
+        if (src[i] == 0)
+        {
+            dst[code_index] = code;
+            code_index = out++;
+            code = 1;
+        }
+        else
+        {
+            dst[out++] = src[i];
+            if (++code == 0xFF)
+            {
+                dst[code_index] = code;
+                code_index = out++;
+                code = 1;
+            }
+        }
+    }
+    dst[code_index] = code;
+    return out;
+}
+
+/**
+  * @brief  COBS decode len bytes of src (delimiter already stripped).
+  * @retval Number of decoded bytes, 0 if the input is malformed.
+  */
+size_t cobs_decode(const uint8_t *src, size_t len, uint8_t *dst)
+{
+    size_t in = 0;
+    size_t out = 0;
+
+    while (in < len)
+    {
+        uint8_t code = src[in++];
+        if (code == 0 || in + code - 1 > len)
+            return 0;
+        for (uint8_t i = 1; i < code; i++)
+        {
+            if (src[in] == 0)
+                return 0;
+            dst[out++] = src[in++];
+        }
+        if (code != 0xFF && in < len)
+            dst[out++] = 0;
+    }
+    return out;
+}
+
+/**
+  * @brief  Build a complete wire frame (COBS + delimiter) into out.
+  *         out must hold FRAME_MAX_ENCODED bytes.
+  * @retval Frame length including the delimiter, 0 if payload is too long.
+  */
+size_t frame_build(uint8_t type, const uint8_t *payload, size_t len, uint8_t *out)
+{
+    uint8_t packet[FRAME_MAX_PACKET];
+
+    if (len + 3 > FRAME_MAX_PACKET)
+        return 0;
+
+    packet[0] = type;
+    if (len)
+        memcpy(&packet[1], payload, len);
+    uint16_t crc = crc16_ccitt(packet, len + 1);
+    packet[len + 1] = (uint8_t)(crc & 0xFF);
+    packet[len + 2] = (uint8_t)(crc >> 8);
+
+    size_t n = cobs_encode(packet, len + 3, out);
+    out[n++] = FRAME_DELIMITER;
+    return n;
+}
+
+/**
+  * @brief  Decode and verify one received frame (delimiter stripped).
+  *         packet must hold FRAME_MAX_PACKET bytes; payload points into it.
+  * @retval 1 if the frame is valid, 0 on COBS or CRC error.
+  */
+int frame_parse(const uint8_t *encoded, size_t len, uint8_t *packet,
+                uint8_t *type, const uint8_t **payload, size_t *payload_len)
+{
+    if (len == 0 || len > FRAME_MAX_PACKET + 1)
+        return 0;
+
+    size_t n = cobs_decode(encoded, len, packet);
+    if (n < 3)
+        return 0;
+
+    uint16_t crc = (uint16_t)packet[n - 2] | ((uint16_t)packet[n - 1] << 8);
+    if (crc16_ccitt(packet, n - 2) != crc)
+        return 0;
+
+    *type = packet[0];
+    *payload = &packet[1];
+    *payload_len = n - 3;
+    return 1;
+}
@@ -282,6 +282,19 @@ void init_LCD(void)
         pulse_strobe();			// Send data
 }
 
+//====================================================================
+// MOVE THE CURSOR - LCD_Goto(row, column)
+//====================================================================
+// DESCRIPTION: Sets the DDRAM address so the next character written
+//              lands at row (0 or 1), column (0 to 15). Unlike CLEAR
+//              this does not need the long clear delay.
+//====================================================================
+
+void lcd_goto(unsigned char row, unsigned char column)
+{
+    lcd_command(SET_DDRAM | (row ? 0x40 : 0x00) | (column & 0x0F));
+}
+
 //====================================================================
 // WRITE A STRING TO THE LCD - LCD_PutString(ptr_String)
 //====================================================================
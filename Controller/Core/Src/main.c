@@ -25,6 +25,11 @@
 #include "stm32f4xx.h"
 #include "stm32f4xx_hal.h"
 #include "lcd_stm32f4.h"
+#include "frame.h"
+#include "txqueue.h"
+#include "rxframer.h"
+#include "adcfilter.h"
+#include "stream.h"
 /* USER CODE END Includes */
 #include <string.h>
 #include <stdlib.h>
@@ -34,6 +39,8 @@
 TIM_HandleTypeDef htim2;
 TIM_HandleTypeDef htim3;
 DMA_HandleTypeDef hdma_tim2_ch1;
+DMA_HandleTypeDef hdma_usart1_tx;
+DMA_HandleTypeDef hdma_usart1_rx;
 UART_HandleTypeDef huart1;
 
 // TODO: Equation to calculate TIM2_Ticks
@@ -47,25 +54,79 @@ static void MX_GPIO_Init(void);
 static void MX_DMA_Init(void);
 static void UART1_Init(void);
 void ADC1_Init(void);
-void ADC1_Start(uint8_t channel);
-void ADC_IRQHandler(void);
-void HAL_UART_RxCpltCallback(UART_HandleTypeDef *huart);
+void ADC1_Start(void);
+void readPots(void);
+void checkPot(uint8_t channel, uint16_t value, volatile uint16_t *old);
+void resetPotConfig(void);
+int parsePCCommand(const char *msg, uint8_t *channel, uint16_t *deadband, uint16_t *interval);
+void setPotConfig(uint8_t channel, uint16_t deadband, uint16_t interval);
+int parseSRValue(const char *msg);
+void streamStart(uint16_t rate);
+void streamStop(void);
+void TIM6_DAC_IRQHandler(void);
+void HAL_UARTEx_RxEventCallback(UART_HandleTypeDef *huart, uint16_t Size);
+void HAL_UART_ErrorCallback(UART_HandleTypeDef *huart);
+void uartStartRx(void);
+void setRxBinary(uint8_t binary);
+void HAL_UART_TxCpltCallback(UART_HandleTypeDef *huart);
+void uartSend(const uint8_t *data, uint16_t len);
+void uartKick(void);
 void handle(char* Msg);
+void handleFrame(const uint8_t *encoded, uint8_t len);
+void sendAck(uint8_t type);
+void sendPot(uint8_t channel, uint16_t value);
+void sendButton(uint8_t index);
 int parseLIValue(const char *msg);
 int parseWRCommand(const char *msg, char *line1, char *line2, int maxLen);
+int parseWPCommand(const char *msg, uint8_t *row, uint8_t *column, const char **text);
+void lcdWriteAt(uint8_t row, uint8_t column, const char *text, uint8_t len);
 
 volatile uint16_t pot0_value = 0;
 volatile uint16_t pot1_value = 0;
 volatile uint16_t old_pot0_value = 0;
 volatile uint16_t old_pot1_value = 0;
+
+// Per channel report settings, changed with PC and reset by HI
+#define POT_DEADBAND_DEFAULT 205    // ~5% of full scale
+#define POT_DEADBAND_MAX 4095
+#define POT_INTERVAL_MAX 60000      // Longest allowed gap between reports, ms
+uint16_t potDeadband[2] = { POT_DEADBAND_DEFAULT, POT_DEADBAND_DEFAULT };
+uint16_t potInterval[2] = { 0, 0 };   // Minimum ms between reports, 0 = no limit
+uint32_t potLastReport[2] = { 0, 0 };
+
+// ADC scan of PA5 (pot 0) and PA6 (pot 1), written by DMA2 stream 0 forever.
+// Pot values are the mean of ADC_OVERSAMPLE scans (adcfilter.h).
+#define ADC_CHANNELS 2
+#define ADC_OVERSAMPLE 16           // Scans averaged per reading, ~4 ms of samples
+#define ADC_PUBLISH_MS 5            // How often the main loop refreshes pot values
+volatile uint16_t adcSamples[ADC_OVERSAMPLE * ADC_CHANNELS];
+uint32_t lastPotRead = 0;
+
+// Streaming mode, started with SR: TIM6 samples both pots rate times a
+// second and ships them in fixed records (stream.h). Nothing else is sent
+// until the next command arrives, which ends the stream.
+#define STREAM_RATE_MAX 2000        // Sample pairs per second, ~87% of the UART
+volatile uint16_t streamRate = 0;   // 0 = not streaming
+StreamBuilder streamBuilder;
 /* USER CODE BEGIN PFP */
 
-#define RX_BUFFER_SIZE 50
-#define RX_SIZE 50
-uint8_t rxBuffer[RX_BUFFER_SIZE];
-uint8_t rxIndex = 0;
-uint8_t rxByte;             // Temporary single-byte storage
-volatile uint8_t stringReady = 0;
+// Circular DMA target; the idle-line event hands new bytes to rxFramer,
+// which queues complete commands for the main loop (rxframer.h)
+#define RX_DMA_SIZE 64
+uint8_t rxDma[RX_DMA_SIZE];
+uint16_t rxDmaPos = 0;      // Where the last receive event stopped reading
+RxFramer rxFramer;
+
+// Binary framed mode (frame.h), entered with BM after the HI/HEY handshake
+volatile uint8_t binaryMode = 0;
+
+// Everything we send goes through this queue and out by DMA (txqueue.h)
+#define TX_QUEUE_SIZE 1024
+uint8_t txStorage[TX_QUEUE_SIZE];
+TxQueue txQueue;
+
+// Text acknowledgements, indexed by FRAME_xx command type
+static const char *const ackText[] = { "", "HEY\r\n", "YES\r\n", "DID\r\n", "LIT\r\n", "SHO\r\n", "PUT\r\n", "SET\r\n", "RUN\r\n" };
 
 /* USER CODE END PFP */
 
@@ -84,45 +145,48 @@ int main(void)
 
   SystemClock_Config();
 
+  txq_init(&txQueue, txStorage, TX_QUEUE_SIZE);
+  rxf_init(&rxFramer);
+
   MX_GPIO_Init();
   MX_DMA_Init();
   UART1_Init();
   ADC1_Init();
-  ADC1_Start( 5);
+  ADC1_Start();
 
-  HAL_UART_Receive_IT(&huart1, &rxByte, 1);
+  uartStartRx();
 
   init_LCD();
   lcd_command(CLEAR);
 
-  char buf[10];
-
-
   while (1)
   {
 
-    //Checks For pots rotations
-    if ( abs(pot0_value - old_pot0_value) > 205){
-        old_pot0_value = pot0_value;
-
-        sprintf(buf, "POT0 %4u\r\n", pot0_value);
-
-        HAL_UART_Transmit(&huart1, (uint8_t*)buf, strlen(buf), HAL_MAX_DELAY);
-    }
-
-    if ( abs(pot1_value - old_pot1_value) > 205){
-        old_pot1_value = pot1_value;
+    readPots();
 
-        sprintf(buf, "POT1 %4u\r\n",pot1_value);
-        HAL_UART_Transmit(&huart1, (uint8_t*)buf, strlen(buf), HAL_MAX_DELAY);
-    }
+    //Checks For pots rotations
+    checkPot(0, pot0_value, &old_pot0_value);
+    checkPot(1, pot1_value, &old_pot1_value);
 
-    if (stringReady)
+    const RxLine *line = rxf_peek(&rxFramer);
+    if (line)
         {
-            stringReady = 0;
-            char * Recieved =  (char*)rxBuffer;
-            handle(Recieved);
-            memset(rxBuffer, 0, RX_BUFFER_SIZE);
+            // Any command ends a stream, so its ack can be told apart
+            if (streamRate)
+            {
+                streamStop();
+            }
+            if (line->kind == RXF_FRAME)
+            {
+                handleFrame(line->data, line->len);
+            }
+            else
+            {
+                // Text while in binary mode can only be the HI escape
+                binaryMode = 0;
+                handle((char*)line->data);
+            }
+            rxf_pop(&rxFramer);
         }
 
 
@@ -187,6 +251,13 @@ static void MX_DMA_Init(void)
   HAL_NVIC_SetPriority(DMA1_Stream5_IRQn, 0, 0);
   HAL_NVIC_EnableIRQ(DMA1_Stream5_IRQn);
 
+  /* USART1_TX is DMA2 stream 7, USART1_RX DMA2 stream 2, both channel 4 */
+  __HAL_RCC_DMA2_CLK_ENABLE();
+  HAL_NVIC_SetPriority(DMA2_Stream7_IRQn, 0, 0);
+  HAL_NVIC_EnableIRQ(DMA2_Stream7_IRQn);
+  HAL_NVIC_SetPriority(DMA2_Stream2_IRQn, 0, 0);
+  HAL_NVIC_EnableIRQ(DMA2_Stream2_IRQn);
+
 }
 
 /**
@@ -302,8 +373,7 @@ void HAL_GPIO_EXTI_Callback(uint16_t GPIO_Pin)
             if((currentTime - lastInterruptTime[0]) > DEBOUNCE_DELAY)
             {
                 lastInterruptTime[0] = currentTime;
-                char msg[] = "BTN0\r\n";
-                HAL_UART_Transmit(&huart1, (uint8_t*)msg, strlen(msg), HAL_MAX_DELAY);
+                sendButton(0);
             }
             break;
 
@@ -311,8 +381,7 @@ void HAL_GPIO_EXTI_Callback(uint16_t GPIO_Pin)
             if((currentTime - lastInterruptTime[1]) > DEBOUNCE_DELAY)
             {
                 lastInterruptTime[1] = currentTime;
-                char msg[] = "BTN1\r\n";
-                HAL_UART_Transmit(&huart1, (uint8_t*)msg, strlen(msg), HAL_MAX_DELAY);
+                sendButton(1);
             }
             break;
 
@@ -320,8 +389,7 @@ void HAL_GPIO_EXTI_Callback(uint16_t GPIO_Pin)
             if((currentTime - lastInterruptTime[2]) > DEBOUNCE_DELAY)
             {
                 lastInterruptTime[2] = currentTime;
-                char msg[] = "BTN2\r\n";
-                HAL_UART_Transmit(&huart1, (uint8_t*)msg, strlen(msg), HAL_MAX_DELAY);
+                sendButton(2);
             }
             break;
 
@@ -329,17 +397,113 @@ void HAL_GPIO_EXTI_Callback(uint16_t GPIO_Pin)
             if((currentTime - lastInterruptTime[3]) > DEBOUNCE_DELAY)
             {
                 lastInterruptTime[3] = currentTime;
-                char msg[] = "BTN3\r\n";
-                HAL_UART_Transmit(&huart1, (uint8_t*)msg, strlen(msg), HAL_MAX_DELAY);
+                sendButton(3);
             }
             break;
     }
 }
 
-void ADC1_Start(uint8_t channel)
+void ADC1_Start(void)
 {
-    ADC1->SQR3 = channel & 0x1F;                  // Select ADC channel
-    ADC1->CR2 |= ADC_CR2_SWSTART;                 // Start conversion
+    ADC1->CR2 |= ADC_CR2_SWSTART;                 // Start scanning, it never stops
+}
+
+/**
+  * @brief  Refresh pot0_value/pot1_value from the DMA sample buffer
+  *         every ADC_PUBLISH_MS.
+  */
+void readPots(void)
+{
+    uint32_t now = HAL_GetTick();
+    if (now - lastPotRead < ADC_PUBLISH_MS)
+        return;
+    lastPotRead = now;
+    pot0_value = adcf_mean(adcSamples, ADC_OVERSAMPLE, ADC_CHANNELS, 0);
+    pot1_value = adcf_mean(adcSamples, ADC_OVERSAMPLE, ADC_CHANNELS, 1);
+}
+
+/**
+  * @brief  Report a pot once it has moved more than its deadband, but not
+  *         sooner than its interval after the previous report. A move held
+  *         back by the interval is sent (with the latest value) when it ends.
+  */
+void checkPot(uint8_t channel, uint16_t value, volatile uint16_t *old)
+{
+    if (streamRate)
+        return;
+    if (abs(value - *old) <= potDeadband[channel])
+        return;
+    uint32_t now = HAL_GetTick();
+    if (potInterval[channel] && now - potLastReport[channel] < potInterval[channel])
+        return;
+    potLastReport[channel] = now;
+    *old = value;
+    sendPot(channel, value);
+}
+
+void setPotConfig(uint8_t channel, uint16_t deadband, uint16_t interval)
+{
+    potDeadband[channel] = deadband;
+    potInterval[channel] = interval;
+}
+
+void resetPotConfig(void)
+{
+    setPotConfig(0, POT_DEADBAND_DEFAULT, 0);
+    setPotConfig(1, POT_DEADBAND_DEFAULT, 0);
+}
+
+/**
+  * @brief  Start streaming rate sample pairs per second from TIM6.
+  */
+void streamStart(uint16_t rate)
+{
+    stream_init(&streamBuilder);
+    streamRate = rate;
+
+    // Count at 1 MHz, or slower for rates whose period would not fit the
+    // 16-bit ARR (below ~16 pairs per second)
+    uint32_t tick = 1000000;
+    while (tick / rate > 0x10000)
+    {
+        tick /= 10;
+    }
+
+    RCC->APB1ENR |= RCC_APB1ENR_TIM6EN;
+    TIM6->CR1 = 0;
+    TIM6->PSC = HAL_RCC_GetPCLK1Freq() / tick - 1;      // APB1 prescaler is 1
+    TIM6->ARR = tick / rate - 1;
+    TIM6->EGR = TIM_EGR_UG;                       // Load PSC now
+    TIM6->SR = 0;
+    TIM6->DIER = TIM_DIER_UIE;
+    HAL_NVIC_SetPriority(TIM6_DAC_IRQn, 1, 0);
+    HAL_NVIC_EnableIRQ(TIM6_DAC_IRQn);
+    TIM6->CR1 = TIM_CR1_CEN;
+}
+
+/**
+  * @brief  Stop the sample timer and send the end of stream record.
+  */
+void streamStop(void)
+{
+    TIM6->CR1 = 0;
+    TIM6->DIER = 0;
+    HAL_NVIC_DisableIRQ(TIM6_DAC_IRQn);
+    streamRate = 0;
+    const StreamRecord *end = stream_end(&streamBuilder);
+    uartSend((const uint8_t *)end, sizeof(StreamRecord));
+}
+
+void TIM6_DAC_IRQHandler(void)
+{
+    TIM6->SR = 0;
+    // One scan straight from the DMA buffer, not the averaged pot values
+    uint16_t remaining = DMA2_Stream0->NDTR;
+    uint16_t pot0 = adcf_newest(adcSamples, ADC_OVERSAMPLE, ADC_CHANNELS, 0, remaining);
+    uint16_t pot1 = adcf_newest(adcSamples, ADC_OVERSAMPLE, ADC_CHANNELS, 1, remaining);
+    // A record that does not fit in txQueue is lost; the host sees the seq gap
+    if (stream_add(&streamBuilder, pot0, pot1))
+        uartSend((const uint8_t *)&streamBuilder.record, sizeof(StreamRecord));
 }
 
 void UART1_Init(void)
@@ -376,74 +540,175 @@ void UART1_Init(void)
         // Initialization Error
         Error_Handler();
     }
+
+    // Transmit DMA, fed from txQueue by uartKick()
+    hdma_usart1_tx.Instance = DMA2_Stream7;
+    hdma_usart1_tx.Init.Channel = DMA_CHANNEL_4;
+    hdma_usart1_tx.Init.Direction = DMA_MEMORY_TO_PERIPH;
+    hdma_usart1_tx.Init.PeriphInc = DMA_PINC_DISABLE;
+    hdma_usart1_tx.Init.MemInc = DMA_MINC_ENABLE;
+    hdma_usart1_tx.Init.PeriphDataAlignment = DMA_PDATAALIGN_BYTE;
+    hdma_usart1_tx.Init.MemDataAlignment = DMA_MDATAALIGN_BYTE;
+    hdma_usart1_tx.Init.Mode = DMA_NORMAL;
+    hdma_usart1_tx.Init.Priority = DMA_PRIORITY_LOW;
+    hdma_usart1_tx.Init.FIFOMode = DMA_FIFOMODE_DISABLE;
+    if (HAL_DMA_Init(&hdma_usart1_tx) != HAL_OK)
+    {
+        Error_Handler();
+    }
+    __HAL_LINKDMA(&huart1, hdmatx, hdma_usart1_tx);
+
+    // Receive DMA runs forever around rxDma, see uartStartRx()
+    hdma_usart1_rx.Instance = DMA2_Stream2;
+    hdma_usart1_rx.Init.Channel = DMA_CHANNEL_4;
+    hdma_usart1_rx.Init.Direction = DMA_PERIPH_TO_MEMORY;
+    hdma_usart1_rx.Init.PeriphInc = DMA_PINC_DISABLE;
+    hdma_usart1_rx.Init.MemInc = DMA_MINC_ENABLE;
+    hdma_usart1_rx.Init.PeriphDataAlignment = DMA_PDATAALIGN_BYTE;
+    hdma_usart1_rx.Init.MemDataAlignment = DMA_MDATAALIGN_BYTE;
+    hdma_usart1_rx.Init.Mode = DMA_CIRCULAR;
+    hdma_usart1_rx.Init.Priority = DMA_PRIORITY_HIGH;
+    hdma_usart1_rx.Init.FIFOMode = DMA_FIFOMODE_DISABLE;
+    if (HAL_DMA_Init(&hdma_usart1_rx) != HAL_OK)
+    {
+        Error_Handler();
+    }
+    __HAL_LINKDMA(&huart1, hdmarx, hdma_usart1_rx);
 }
 void USART1_IRQHandler(void)
 {
     HAL_UART_IRQHandler(&huart1);
 }
-void ADC_IRQHandler(void)
+void DMA2_Stream7_IRQHandler(void)
 {
-    if (ADC1->SR & ADC_SR_EOC)
-    {
-        static uint8_t current_channel = 5;       // Start from channel 5
-        uint16_t value = ADC1->DR;                // Read result, clears EOC flag
+    HAL_DMA_IRQHandler(&hdma_usart1_tx);
+}
+void DMA2_Stream2_IRQHandler(void)
+{
+    HAL_DMA_IRQHandler(&hdma_usart1_rx);
+}
 
-        if (current_channel == 5)
-        {
-            pot0_value = value;
-            current_channel = 6;
-            ADC1_Start(6);                        // Next: PA6
-        }
-        else
-        {
-            pot1_value = value;
-            current_channel = 5;
-            ADC1_Start(5);                        // Next: PA5
-        }
+/**
+  * @brief  Start circular reception into rxDma with idle-line detection.
+  *         HAL_UARTEx_RxEventCallback fires on idle line, half and full buffer.
+  */
+void uartStartRx(void)
+{
+    rxDmaPos = 0;
+    HAL_UARTEx_ReceiveToIdle_DMA(&huart1, rxDma, RX_DMA_SIZE);
+}
+
+/**
+  * @brief  Change how incoming bytes are framed, with the UART interrupt held off.
+  */
+void setRxBinary(uint8_t binary)
+{
+    uint32_t primask = __get_PRIMASK();
+    __disable_irq();
+    rxf_set_binary(&rxFramer, binary);
+    __set_PRIMASK(primask);
+}
+
+/**
+  * @brief  Queue bytes for transmission and start the DMA if it is idle.
+  *         Never waits, so it is safe from interrupt handlers; a message
+  *         that does not fit is dropped and counted in txQueue.dropped.
+  */
+void uartSend(const uint8_t *data, uint16_t len)
+{
+    uint32_t primask = __get_PRIMASK();
+    __disable_irq();
+    txq_push(&txQueue, data, len);
+    uartKick();
+    __set_PRIMASK(primask);
+}
+
+/**
+  * @brief  Hand the next contiguous run of txQueue to the DMA.
+  *         Called with interrupts masked or from the UART interrupt.
+  */
+void uartKick(void)
+{
+    const uint8_t *chunk;
+    uint16_t len = txq_claim(&txQueue, &chunk);
+    if (len && HAL_UART_Transmit_DMA(&huart1, (uint8_t *)chunk, len) != HAL_OK)
+    {
+        // UART still busy: leave the bytes queued, TxCplt will retry
+        txQueue.busy = 0;
     }
 }
 
-void HAL_UART_RxCpltCallback(UART_HandleTypeDef *huart)
+void HAL_UART_TxCpltCallback(UART_HandleTypeDef *huart)
 {
     if (huart->Instance == USART1)
     {
-        if (rxByte == '\n' || rxByte == '\r')
-        {
-            rxBuffer[rxIndex] = '\0';
-            rxIndex = 0;
-            stringReady = 1;
-        }
-        else
+        txq_release(&txQueue);
+        uartKick();
+    }
+}
+void HAL_UARTEx_RxEventCallback(UART_HandleTypeDef *huart, uint16_t Size)
+{
+    if (huart->Instance == USART1)
+    {
+        // Size is where the DMA has written up to; frame everything since last time
+        if (Size != rxDmaPos)
         {
-            if (rxIndex < RX_SIZE - 1)
-                rxBuffer[rxIndex++] = rxByte;
+            if (Size > rxDmaPos)
+            {
+                rxf_feed(&rxFramer, &rxDma[rxDmaPos], Size - rxDmaPos);
+            }
+            else
+            {
+                rxf_feed(&rxFramer, &rxDma[rxDmaPos], RX_DMA_SIZE - rxDmaPos);
+                rxf_feed(&rxFramer, rxDma, Size);
+            }
+            rxDmaPos = (Size == RX_DMA_SIZE) ? 0 : Size;
         }
+    }
+}
 
-        // Receive next byte
-        HAL_UART_Receive_IT(&huart1, &rxByte, 1);
+void HAL_UART_ErrorCallback(UART_HandleTypeDef *huart)
+{
+    // Overrun or framing errors stop the receive DMA: start it again
+    if (huart->Instance == USART1 && huart->RxState == HAL_UART_STATE_READY)
+    {
+        uartStartRx();
     }
 }
 
 void ADC1_Init(void)
 {
     RCC->APB2ENR |= RCC_APB2ENR_ADC1EN;           // Enable ADC1 clock
+    RCC->AHB1ENR |= RCC_AHB1ENR_DMA2EN;           // ADC1 DMA is DMA2 stream 0, channel 0
 
     // ADC common prescaler (PCLK2 / 4)
     ADC->CCR &= ~(3U << 16);
     ADC->CCR |= (1U << 16);                       // Divide by 4
 
-    ADC1->CR1 = 0;                                // 12-bit, single conversion
-    ADC1->CR2 = ADC_CR2_EOCS;      // EOC after each, continuous mode
-    ADC1->SQR1 = 0;                               // One conversion per sequence
-
-    // Sampling time for channels 5 and 6: 56 cycles (enough for stable reads)
+    // DMA copies every conversion into adcSamples, wrapping around, no interrupts
+    DMA2_Stream0->CR = 0;
+    while (DMA2_Stream0->CR & DMA_SxCR_EN);
+    DMA2_Stream0->PAR = (uint32_t)&ADC1->DR;
+    DMA2_Stream0->M0AR = (uint32_t)adcSamples;
+    DMA2_Stream0->NDTR = ADC_OVERSAMPLE * ADC_CHANNELS;
+    DMA2_Stream0->CR = (0U << DMA_SxCR_CHSEL_Pos) // Channel 0: ADC1
+                     | DMA_SxCR_PL_1              // High priority
+                     | DMA_SxCR_MSIZE_0           // 16-bit memory
+                     | DMA_SxCR_PSIZE_0           // 16-bit peripheral
+                     | DMA_SxCR_MINC
+                     | DMA_SxCR_CIRC;
+    DMA2_Stream0->CR |= DMA_SxCR_EN;
+
+    ADC1->CR1 = ADC_CR1_SCAN;                     // 12-bit, scan the sequence
+    ADC1->CR2 = ADC_CR2_CONT                      // Restart the sequence forever
+              | ADC_CR2_DMA | ADC_CR2_DDS;        // DMA request after every conversion
+    ADC1->SQR1 = (ADC_CHANNELS - 1) << ADC_SQR1_L_Pos;
+    ADC1->SQR3 = 5U | (6U << 5);                  // PA5 then PA6
+
+    // Sampling time for channels 5 and 6
     ADC1->SMPR2 &= ~((7U << (5 * 3)) | (7U << (6 * 3)));
     ADC1->SMPR2 |=  (7U << (5 * 3)) | (7U << (6 * 3));  // 480 cycles
 
-    // Enable EOC interrupt
-    ADC1->CR1 |= ADC_CR1_EOCIE;
-    NVIC_EnableIRQ(ADC_IRQn);
-
     ADC1->CR2 |= ADC_CR2_ADON;                    // Power on ADC
 }
 
@@ -467,20 +732,17 @@ void Error_Handler(void)
 void handle(char* Msg){
 
   if ( (Msg[0] == 'H') && (Msg[1] == 'I') ){
+    resetPotConfig();
     lcd_command(CLEAR);
     lcd_putstring("Controller");
     lcd_command(LINE_TWO);
     lcd_putstring("Connected.");
 
-    char msg[] = "HEY\r\n";
-    HAL_UART_Transmit(&huart1, (uint8_t*)msg, strlen(msg), HAL_MAX_DELAY);
+    sendAck(FRAME_HI);
   }
 
   if ( (Msg[0] == 'U') && (Msg[1] == 'P') ){
-
-
-    char msg[] = "YES\r\n";
-    HAL_UART_Transmit(&huart1, (uint8_t*)msg, strlen(msg), HAL_MAX_DELAY);
+    sendAck(FRAME_UP);
   }
 
 
@@ -495,9 +757,7 @@ void handle(char* Msg){
       lcd_putstring(line2);
     }
 
-
-    char msg[] = "DID\r\n";
-    HAL_UART_Transmit(&huart1, (uint8_t*)msg, strlen(msg), HAL_MAX_DELAY);
+    sendAck(FRAME_WR);
   }
 
   if ( (Msg[0] == 'L') && (Msg[1] == 'I') ){
@@ -505,8 +765,7 @@ void handle(char* Msg){
     if (Led != -1){
       GPIOB->ODR = Led;
     }
-    char msg[] = "LIT\r\n";
-    HAL_UART_Transmit(&huart1, (uint8_t*)msg, strlen(msg), HAL_MAX_DELAY);
+    sendAck(FRAME_LI);
   }
 
   if ( (Msg[0] == 'E') && (Msg[1] == 'S') ){
@@ -514,10 +773,199 @@ void handle(char* Msg){
     lcd_putstring("Controller");
     lcd_command(LINE_TWO);
     lcd_putstring("Disconnected");
-    char msg[] = "SHO\r\n";
-    HAL_UART_Transmit(&huart1, (uint8_t*)msg, strlen(msg), HAL_MAX_DELAY);
+    sendAck(FRAME_ES);
+  }
+
+  // Partial LCD write: "WP <row> <column> <text>", no clear, spaces are kept
+  if ( (Msg[0] == 'W') && (Msg[1] == 'P') ){
+    uint8_t row, column;
+    const char *text;
+    if (parseWPCommand(Msg, &row, &column, &text)){
+      lcdWriteAt(row, column, text, strlen(text));
+    }
+    sendAck(FRAME_WP);
+  }
+
+  // Pot report settings: "PC <channel> <deadband> <interval ms>"
+  if ( (Msg[0] == 'P') && (Msg[1] == 'C') ){
+    uint8_t channel;
+    uint16_t deadband, interval;
+    if (parsePCCommand(Msg, &channel, &deadband, &interval)){
+      setPotConfig(channel, deadband, interval);
+    }
+    sendAck(FRAME_PC);
+  }
+
+  // Stream pot samples: "SR <pairs per second>", 0 only acknowledges
+  if ( (Msg[0] == 'S') && (Msg[1] == 'R') ){
+    int rate = parseSRValue(Msg);
+    sendAck(FRAME_SR);
+    if (rate > 0){
+      streamStart(rate);
+    }
+  }
+
+  // Switch to binary framed mode. The reply is the last text line we send.
+  if ( (Msg[0] == 'B') && (Msg[1] == 'M') ){
+    // Frame what follows as binary before the host can see BIN
+    setRxBinary(1);
+    char msg[] = "BIN\r\n";
+    uartSend((uint8_t*)msg, strlen(msg));
+    binaryMode = 1;
+  }
+
+}
+
+void handleFrame(const uint8_t *encoded, uint8_t len){
+  uint8_t packet[FRAME_MAX_PACKET];
+  const uint8_t *payload;
+  size_t payloadLen;
+  uint8_t type;
+  uint16_t rate = 0;
+
+  // Corrupt frames are dropped without an ack; the host times them out
+  if (!frame_parse(encoded, len, packet, &type, &payload, &payloadLen))
+    return;
+
+  switch (type)
+  {
+    case FRAME_HI:
+      resetPotConfig();
+      lcd_command(CLEAR);
+      lcd_putstring("Controller");
+      lcd_command(LINE_TWO);
+      lcd_putstring("Connected.");
+      break;
+
+    case FRAME_UP:
+      break;
+
+    case FRAME_WR:
+    {
+      // Payload is "line1;line2", copied out so both halves are terminated
+      char text[FRAME_MAX_PACKET];
+      memcpy(text, payload, payloadLen);
+      text[payloadLen] = '\0';
+      char *sep = strchr(text, ';');
+      if (sep)
+      {
+        *sep = '\0';
+        lcd_command(CLEAR);
+        lcd_putstring(text);
+        lcd_command(LINE_TWO);
+        lcd_putstring(sep + 1);
+      }
+      break;
+    }
+
+    case FRAME_LI:
+      if (payloadLen == 1)
+        GPIOB->ODR = payload[0];
+      break;
+
+    case FRAME_WP:
+      if (payloadLen >= 2 && payload[0] < 2 && payload[1] < LCD_COLUMNS)
+        lcdWriteAt(payload[0], payload[1], (const char *)&payload[2], payloadLen - 2);
+      break;
+
+    case FRAME_PC:
+      // channel, deadband (u16 LE), interval ms (u16 LE)
+      if (payloadLen == 5 && payload[0] < 2)
+      {
+        uint16_t deadband = payload[1] | (payload[2] << 8);
+        uint16_t interval = payload[3] | (payload[4] << 8);
+        if (deadband <= POT_DEADBAND_MAX && interval <= POT_INTERVAL_MAX)
+          setPotConfig(payload[0], deadband, interval);
+      }
+      break;
+
+    case FRAME_SR:
+      // Sample pairs per second (u16 LE), 0 only acknowledges
+      if (payloadLen == 2)
+      {
+        rate = payload[0] | (payload[1] << 8);
+        if (rate > STREAM_RATE_MAX)
+          rate = 0;
+      }
+      break;
+
+    case FRAME_ES:
+      lcd_command(CLEAR);
+      lcd_putstring("Controller");
+      lcd_command(LINE_TWO);
+      lcd_putstring("Disconnected");
+      break;
+
+    default:
+      return;
+  }
+
+  // The session is over, the next host starts in text mode again
+  if (type == FRAME_ES)
+    setRxBinary(0);
+
+  sendAck(type);
+
+  if (type == FRAME_ES)
+    binaryMode = 0;
+
+  // Records only after the ack, so the host knows where they start
+  if (rate)
+    streamStart(rate);
+}
+
+void sendAck(uint8_t type){
+  if (binaryMode)
+  {
+    uint8_t frame[FRAME_MAX_ENCODED];
+    size_t n = frame_build(type | FRAME_ACK, NULL, 0, frame);
+    uartSend(frame, n);
+  }
+  else
+  {
+    uartSend((uint8_t*)ackText[type], strlen(ackText[type]));
+  }
+}
+
+void sendPot(uint8_t channel, uint16_t value){
+  if (binaryMode)
+  {
+    uint8_t payload[2] = { (uint8_t)(value & 0xFF), (uint8_t)(value >> 8) };
+    uint8_t frame[FRAME_MAX_ENCODED];
+    size_t n = frame_build(FRAME_POT0 + channel, payload, 2, frame);
+    uartSend(frame, n);
+  }
+  else
+  {
+    char buf[12];
+    sprintf(buf, "POT%u %4u\r\n", channel, value);
+    uartSend((uint8_t*)buf, strlen(buf));
+  }
+}
+
+void sendButton(uint8_t index){
+  // Records are all a host expects while streaming
+  if (streamRate)
+    return;
+  if (binaryMode)
+  {
+    uint8_t frame[FRAME_MAX_ENCODED];
+    size_t n = frame_build(FRAME_BTN0 + index, NULL, 0, frame);
+    uartSend(frame, n);
+  }
+  else
+  {
+    char msg[] = "BTNx\r\n";
+    msg[3] = '0' + index;
+    uartSend((uint8_t*)msg, strlen(msg));
   }
+}
 
+void lcdWriteAt(uint8_t row, uint8_t column, const char *text, uint8_t len){
+  lcd_goto(row, column);
+  // Never run past the visible line into the hidden part of DDRAM
+  for (uint8_t i = 0; i < len && column + i < LCD_COLUMNS; i++)
+    lcd_putchar(text[i]);
 }
 
 void rtrim(char *str) {
@@ -547,6 +995,49 @@ int parseLIValue(const char *msg) {
     return -1; // Invalid format or out of range
 }
 
+int parseWPCommand(const char *msg, uint8_t *row, uint8_t *column, const char **text) {
+    // "WP r c text": single digit row, one or two digit column. Parsed by
+    // hand because the text may contain (and end in) significant spaces.
+    if (msg[2] != ' ' || (msg[3] != '0' && msg[3] != '1') || msg[4] != ' ')
+        return 0;
+    *row = msg[3] - '0';
+
+    const char *p = &msg[5];
+    if (*p < '0' || *p > '9')
+        return 0;
+    uint8_t col = *p++ - '0';
+    if (*p >= '0' && *p <= '9')
+        col = col * 10 + (*p++ - '0');
+    if (col >= LCD_COLUMNS || *p != ' ')
+        return 0;
+
+    *column = col;
+    *text = p + 1;
+    return 1;
+}
+
+int parsePCCommand(const char *msg, uint8_t *channel, uint16_t *deadband, uint16_t *interval) {
+    unsigned int c, d, i;
+
+    if (sscanf(msg, "PC %u %u %u", &c, &d, &i) != 3)
+        return 0;
+    if (c > 1 || d > POT_DEADBAND_MAX || i > POT_INTERVAL_MAX)
+        return 0;
+
+    *channel = c;
+    *deadband = d;
+    *interval = i;
+    return 1;
+}
+
+int parseSRValue(const char *msg) {
+    unsigned int rate;
+
+    if (sscanf(msg, "SR %u", &rate) != 1 || rate > STREAM_RATE_MAX)
+        return -1;
+    return rate;
+}
+
 int parseWRCommand(const char *msg, char *line1, char *line2, int maxLen) {
     char buffer[256];
     strncpy(buffer, msg, sizeof(buffer)-1);
@@ -0,0 +1,143 @@
+/**
+  ******************************************************************************
+  * @file           : rxframer.c
+  * @brief          : Receive stream framing and command queue (see rxframer.h).
+  ******************************************************************************
+  */
+#include "rxframer.h"
+#include "frame.h"
+
+#include <string.h>
+
+#define RXF_MASK            (RXF_SLOTS - 1)
+
+void rxf_init(RxFramer *f)
+{
+    memset(f, 0, sizeof(*f));
+}
+
+/**
+  * @brief  Switch framing mode. Bytes already collected are discarded.
+  */
+void rxf_set_binary(RxFramer *f, uint8_t binary)
+{
+    f->binary = binary;
+    f->length = 0;
+    f->overflow = 0;
+}
+
+/* Slot being filled; it only becomes visible to the consumer in commit() */
+static RxLine *current(RxFramer *f)
+{
+    return &f->slots[f->head & RXF_MASK];
+}
+
+static void commit(RxFramer *f, uint8_t kind)
+{
+    if ((uint8_t)(f->head - f->tail) >= RXF_SLOTS)
+    {
+        f->dropped++;
+    }
+    else
+    {
+        RxLine *line = current(f);
+        line->kind = kind;
+        line->len = f->length;
+        /* Publish only after the slot is complete */
+        __asm__ volatile ("" ::: "memory");
+        f->head++;
+    }
+    f->length = 0;
+    f->overflow = 0;
+}
+
+static void feedText(RxFramer *f, uint8_t byte)
+{
+    if (byte == '\r' || byte == '\n')
+    {
+        if (f->overflow)
+        {
+            f->dropped++;
+            f->length = 0;
+            f->overflow = 0;
+        }
+        else if (f->length)
+        {
+            current(f)->data[f->length] = '\0';
+            commit(f, RXF_TEXT);
+        }
+    }
+    else if ((uint8_t)(f->head - f->tail) >= RXF_SLOTS)
+    {
+        /* The slot we would fill is still being handled: lose this line */
+        f->overflow = 1;
+    }
+    else if (f->length < RXF_LINE_SIZE - 1)
+    {
+        /* Longer lines are cut short, as the old rxBuffer did */
+        current(f)->data[f->length++] = byte;
+    }
+}
+
+static void feedBinary(RxFramer *f, uint8_t byte)
+{
+    RxLine *line = current(f);
+
+    if (byte == FRAME_DELIMITER)
+    {
+        if (f->overflow)
+            f->dropped++;
+        else if (f->length)
+            commit(f, RXF_FRAME);
+        f->length = 0;
+        f->overflow = 0;
+    }
+    else if (byte == '\n' && f->length == 3 && memcmp(line->data, "HI\r", 3) == 0)
+    {
+        /* A text HI always gets through: a COBS frame can never start with
+           'H' (0x48) because our frames are far shorter than 71 bytes */
+        f->binary = 0;
+        f->length = 2;
+        line->data[2] = '\0';
+        commit(f, RXF_TEXT);
+    }
+    else if (f->length < RXF_LINE_SIZE && (uint8_t)(f->head - f->tail) < RXF_SLOTS)
+    {
+        line->data[f->length++] = byte;
+    }
+    else
+    {
+        /* Too long to be one of ours (or nowhere to put it): drop at the delimiter */
+        f->overflow = 1;
+    }
+}
+
+/**
+  * @brief  Frame len received bytes. Called from the UART interrupt.
+  */
+void rxf_feed(RxFramer *f, const uint8_t *data, uint16_t len)
+{
+    for (uint16_t i = 0; i < len; i++)
+    {
+        if (f->binary)
+            feedBinary(f, data[i]);
+        else
+            feedText(f, data[i]);
+    }
+}
+
+/**
+  * @brief  Oldest complete command, or NULL. Stays valid until rxf_pop().
+  */
+const RxLine *rxf_peek(const RxFramer *f)
+{
+    if (f->head == f->tail)
+        return 0;
+    return &f->slots[f->tail & RXF_MASK];
+}
+
+void rxf_pop(RxFramer *f)
+{
+    if (f->head != f->tail)
+        f->tail++;
+}
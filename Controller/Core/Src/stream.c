@@ -0,0 +1,56 @@
+/**
+  ******************************************************************************
+  * @file           : stream.c
+  * @brief          : Streaming mode sample records (see stream.h).
+  ******************************************************************************
+  */
+#include "stream.h"
+
+static void seal(StreamRecord *r, uint16_t seq, uint16_t count)
+{
+    uint16_t sum = seq + count;
+
+    r->sync = STREAM_SYNC;
+    r->seq = seq;
+    r->count = count;
+    for (uint16_t i = 0; i < STREAM_PAIRS * 2; i++)
+        sum += r->samples[i];
+    r->check = sum;
+}
+
+void stream_init(StreamBuilder *b)
+{
+    b->fill = 0;
+    b->seq = 0;
+}
+
+/**
+  * @brief  Append one sample pair.
+  * @retval 1 when this completed b->record, which must be sent before the
+  *         next call; 0 otherwise.
+  */
+int stream_add(StreamBuilder *b, uint16_t pot0, uint16_t pot1)
+{
+    b->record.samples[b->fill * 2] = pot0;
+    b->record.samples[b->fill * 2 + 1] = pot1;
+    if (++b->fill < STREAM_PAIRS)
+        return 0;
+
+    seal(&b->record, b->seq++, STREAM_PAIRS);
+    b->fill = 0;
+    return 1;
+}
+
+/**
+  * @brief  Build the end of stream record. Pairs not yet sent are dropped.
+  * @retval The record to send.
+  */
+const StreamRecord *stream_end(StreamBuilder *b)
+{
+    for (uint16_t i = 0; i < STREAM_PAIRS * 2; i++)
+        b->record.samples[i] = 0;
+    seal(&b->record, b->seq, 0);
+    b->fill = 0;
+    b->seq = 0;
+    return &b->record;
+}
@@ -0,0 +1,90 @@
+/**
+  ******************************************************************************
+  * @file           : txqueue.c
+  * @brief          : UART transmit ring buffer (see txqueue.h).
+  ******************************************************************************
+  */
+#include "txqueue.h"
+
+#include <string.h>
+
+/**
+  * @brief  Use storage (size bytes, a power of two up to 32768) as the queue.
+  */
+void txq_init(TxQueue *q, uint8_t *storage, uint16_t size)
+{
+    q->buf = storage;
+    q->mask = size - 1;
+    q->head = 0;
+    q->tail = 0;
+    q->busy = 0;
+    q->dropped = 0;
+}
+
+/**
+  * @brief  Bytes queued, including the ones the DMA is sending right now.
+  */
+uint16_t txq_used(const TxQueue *q)
+{
+    return (uint16_t)(q->head - q->tail);
+}
+
+/**
+  * @brief  Queue a whole message, never part of one.
+  * @retval 1 if queued, 0 if there was no room (counted in dropped).
+  */
+int txq_push(TxQueue *q, const uint8_t *data, uint16_t len)
+{
+    uint16_t size = q->mask + 1;
+
+    if (len > size - txq_used(q))
+    {
+        q->dropped++;
+        return 0;
+    }
+
+    uint16_t start = q->head & q->mask;
+    uint16_t first = size - start;
+    if (first > len)
+        first = len;
+    memcpy(&q->buf[start], data, first);
+    memcpy(q->buf, data + first, len - first);
+
+    /* Publish only after the bytes are in place */
+    __asm__ volatile ("" ::: "memory");
+    q->head += len;
+    return 1;
+}
+
+/**
+  * @brief  Claim the next contiguous run of queued bytes for one transfer.
+  *         Returns 0 while a claimed run is still in flight or when empty.
+  * @retval Length of the run at *chunk.
+  */
+uint16_t txq_claim(TxQueue *q, const uint8_t **chunk)
+{
+    if (q->busy)
+        return 0;
+
+    uint16_t used = txq_used(q);
+    if (used == 0)
+        return 0;
+
+    uint16_t start = q->tail & q->mask;
+    uint16_t run = (q->mask + 1) - start;
+    if (run > used)
+        run = used;
+
+    *chunk = &q->buf[start];
+    q->busy = run;
+    return run;
+}
+
+/**
+  * @brief  The claimed run has been sent; its space can be reused.
+  */
+void txq_release(TxQueue *q)
+{
+    q->tail += q->busy;
+    q->busy = 0;
+}
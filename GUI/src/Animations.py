@@ -1,76 +1,230 @@
-from PyQt5.QtCore import QObject, pyqtProperty, QPointF
-from PyQt5.QtGui import QColor
+# Animations.py
+"""Animators shared by the pages: QPropertyAnimation targets with a color
+or position property, and the registry the pages start animations through.
 
-# ------------------------- Button Animators -------------------------
-class ColorAnimator(QObject):
-    """Animates button background color"""
-    def __init__(self, button):
-        super().__init__()
-        self._color = QColor("#EBE8EB")
-        self.button = button
+The color animators paint their widget themselves. Setting color only
+stores it and calls update(), so a 60 Hz animation costs one paint per
+frame rather than a new stylesheet to parse and re-polish every tick.
+"""
+import weakref
 
-    def getColor(self):
-        return self._color
+from PyQt5.QtCore import QAbstractAnimation, QEvent, QObject, QPointF, QRectF, Qt, pyqtProperty
+from PyQt5.QtGui import QColor, QPainter, QPen
+from PyQt5.QtWidgets import QAbstractButton
 
-    def setColor(self, color):
-        self._color = color
-        self.button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {color.name()};
-                color: white;
-                border: none;
-                border-radius: 12px;
-                font-size: 20px;
-                padding: 10px 20px;
-            }}
-        """)
+# ------------------------- Color Animators -------------------------
+class PaintedColorAnimator(QObject):
+    """Base for animators that draw a widget in a color that changes.
 
-    color = pyqtProperty(QColor, fget=getColor, fset=setColor)
+    The first setColor() takes the widget over: its stylesheet is dropped
+    once and from then on paint() draws it from an event filter. Only one
+    animator paints a widget at a time; the newest wins. Subclasses set
+    the shape below and pick the fill, border and text colors in colors().
 
+    color is where the widget starts, before the first setColor(); each
+    page passes its own. Buttons are drawn lighter under the mouse,
+    darker while pressed and with a dotted outline when focused, as
+    Qt draws a styled QPushButton.
+    """
+    radius = 0                     # Corner radius, px
+    border = 0                     # Border width, px, 0 for none
+    font_px = 0                    # Text size, 0 if the widget has no text to draw
+    bold = False
+    default = "#000000"            # Color before the first setColor(), if none is given
+    hover = 115                    # QColor.lighter() factor under the mouse
+    pressed = 120                  # QColor.darker() factor while pressed
 
-class TextBorderAnimator(QObject):
-    """Animates button text and border color"""
-    def __init__(self, button):
+    def __init__(self, widget, color=None):
         super().__init__()
-        self._color = QColor("#800080")
-        self.button = button
+        self.widget = widget
+        self._color = QColor(color or self.default)
 
     def getColor(self):
         return self._color
 
     def setColor(self, color):
-        self._color = color
-        self.button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: transparent;
-                color: {color.name()};
-                border: 3px solid {color.name()};
-                border-radius: 14px;
-                font-size: 24px;
-                font-weight: bold;
-                padding: 10px 20px;
-            }}
-        """)
+        self._color = QColor(color)
+        if getattr(self.widget, "painted_by", None) is not self:
+            self.attach()
+        self.widget.update()
 
     color = pyqtProperty(QColor, fget=getColor, fset=setColor)
 
+    def attach(self):
+        widget = self.widget
+        previous = getattr(widget, "painted_by", None)
+        if previous is not None:
+            widget.removeEventFilter(previous)
+        widget.painted_by = self
+        widget.setStyleSheet("")
+        # Repaint on mouse enter and leave, as the stylesheet made it do
+        widget.setAttribute(Qt.WA_Hover, True)
+        if self.font_px:
+            font = widget.font()
+            font.setPixelSize(self.font_px)
+            font.setBold(self.bold)
+            widget.setFont(font)
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and obj is self.widget:
+            painter = QPainter(obj)
+            painter.setRenderHint(QPainter.Antialiasing)
+            self.paint(painter, obj)
+            painter.end()
+            return True            # Replaces the widget's own painting
+        return False
+
+    def colors(self):
+        """(fill, border, text) to paint with; None skips that part"""
+        return self._color, None, None
+
+    def shade(self, color, widget):
+        """color as drawn for the button's pressed or hover state"""
+        if color is None:
+            return None
+        if widget.isDown():
+            return color.darker(self.pressed)
+        if widget.underMouse():
+            return color.lighter(self.hover)
+        return color
+
+    def paint(self, painter, widget):
+        fill, border, text = self.colors()
+        button = isinstance(widget, QAbstractButton)
+        if button:
+            fill, border, text = (self.shade(c, widget) for c in (fill, border, text))
+        inset = self.border / 2
+        rect = QRectF(widget.rect()).adjusted(inset, inset, -inset, -inset)
+        painter.setPen(QPen(border, self.border) if border is not None and self.border else Qt.NoPen)
+        painter.setBrush(fill if fill is not None else Qt.NoBrush)
+        painter.drawRoundedRect(rect, self.radius, self.radius)
+        if text is not None and self.font_px:
+            painter.setPen(text)
+            painter.setFont(widget.font())
+            painter.drawText(widget.rect(), Qt.AlignCenter, widget.text())
+        if button and widget.hasFocus():
+            pen = QPen(text if text is not None else QColor("white"), 1, Qt.DotLine)
+            painter.setPen(pen)
+            painter.setBrush(Qt.NoBrush)
+            focus = rect.adjusted(self.border + 3, self.border + 3, -self.border - 3, -self.border - 3)
+            painter.drawRoundedRect(focus, max(0, self.radius - 4), max(0, self.radius - 4))
+
+
+class ColorAnimator(PaintedColorAnimator):
+    """Animates button background color"""
+    radius = 12
+    font_px = 20
+    default = "#EBE8EB"
+
+    def colors(self):
+        return self._color, None, QColor("white")
+
+
+class TextBorderAnimator(PaintedColorAnimator):
+    """Animates button text and border color"""
+    radius = 14
+    border = 3
+    font_px = 24
+    bold = True
+    default = "#800080"
 
-class PanelColorAnimator(QObject):
+    def colors(self):
+        return None, self._color, self._color
+
+
+class PanelColorAnimator(PaintedColorAnimator):
     """Animates panel background color"""
-    def __init__(self, panel):
+    radius = 15
+    default = "#D1EBE4"
+
+
+class PanelBorderAnimator(PaintedColorAnimator):
+    """Animates panel border color on a fixed background"""
+    radius = 15
+    border = 4
+    background = "#E4EEF0"
+    default = "#660000"
+
+    def colors(self):
+        return QColor(self.background), self._color, None
+
+
+# ------------------------- Animation Registry -------------------------
+class AnimationRegistry(QObject):
+    """Pauses animations while the widget that owns them cannot be seen.
+
+    play(owner, animation) starts the animation and ties it to owner:
+    while owner is hidden or its window minimized the animation is
+    paused, and it resumes when they come back. Only animations paused
+    here are resumed. Both are held weakly, so nothing outlives its page.
+    """
+    WATCHED = (QEvent.Show, QEvent.Hide, QEvent.WindowStateChange)
+
+    def __init__(self):
         super().__init__()
-        self._color = QColor("#D1EBE4")
-        self.panel = panel
+        self.owners = weakref.WeakKeyDictionary()   # owner -> WeakSet of animations
+        self.held = weakref.WeakSet()               # Animations paused by us
 
-    def getColor(self):
-        return self._color
+    def play(self, owner, animation):
+        animations = self.owners.get(owner)
+        if animations is None:
+            animations = self.owners[owner] = weakref.WeakSet()
+            owner.installEventFilter(self)
+            if owner.window() is not owner:
+                owner.window().installEventFilter(self)   # Minimize only reaches the window
+        animations.add(animation)
+        animation.start()
+        self.update(owner)
+        return animation
 
-    def setColor(self, color):
-        self._color = color
-        self.panel.setStyleSheet(f"background-color: {color.name()}; border-radius: 15px;")
+    def live(self, owner=None):
+        """Animations running right now, of owner or of every page"""
+        owners = [owner] if owner is not None else list(self.owners.keys())
+        count = 0
+        for key in owners:
+            for animation in list(self.owners.get(key, ())):
+                try:
+                    count += animation.state() == QAbstractAnimation.Running
+                except RuntimeError:
+                    pass           # Deleted on the C++ side
+        return count
+
+    def update(self, owner):
+        """Pause or resume owner's animations to match whether it can be seen"""
+        try:
+            hidden = not owner.isVisible() or owner.window().isMinimized()
+        except RuntimeError:
+            return
+        for animation in list(self.owners.get(owner, ())):
+            try:
+                state = animation.state()
+                if hidden and state == QAbstractAnimation.Running:
+                    animation.pause()
+                    self.held.add(animation)
+                elif not hidden and state == QAbstractAnimation.Paused and animation in self.held:
+                    animation.resume()
+                    self.held.discard(animation)
+            except RuntimeError:
+                pass
+
+    def eventFilter(self, obj, event):
+        if event.type() in self.WATCHED:
+            for owner in list(self.owners.keys()):
+                try:
+                    if owner is obj or owner.window() is obj:
+                        self.update(owner)
+                except RuntimeError:
+                    pass
+        return False
+
+
+registry = AnimationRegistry()
 
-    color = pyqtProperty(QColor, fget=getColor, fset=setColor)
 
+def play(owner, animation):
+    """Start animation, paused whenever owner is hidden or minimized"""
+    return registry.play(owner, animation)
 
 # ------------------------- Graphics Item Animators -------------------------
 class AnimatedUSB(QObject):
@@ -0,0 +1,566 @@
+# Benchmark.py
+"""Performance benchmarks for the dongle host stack.
+
+    python Benchmark.py latency --simulate -n 200
+    python Benchmark.py latency --port /dev/ttyUSB0 --baseline base.json
+    python Benchmark.py parser -n 500000
+    python Benchmark.py stream --simulate --rate 2000 --seconds 5
+    python Benchmark.py startup --runs 3 --budget 1000
+    python Benchmark.py animators --frames 600
+
+Results are printed as JSON. With --baseline the run is compared to a
+stored result and the exit code is 1 if anything regressed.
+"""
+import argparse
+import inspect
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from Protocol import (
+    ACK_WORDS, COMMAND_TIMEOUT, COMMAND_WINDOW, DEFAULT_PORT, DeviceProtocol, LineParser,
+    SerialTransport,
+)
+from Stream import STREAM_RATE_MAX
+
+REGRESSION_THRESHOLD = 0.20        # Allowed slowdown vs. baseline before failing
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def summarize(samples):
+    """p50/p95/p99/max in milliseconds"""
+    ordered = sorted(samples)
+    result = {}
+    for key, fraction in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99), ("max_ms", 1.0)):
+        value = percentile(ordered, fraction)
+        result[key] = round(value * 1000, 3) if value is not None else None
+    return result
+
+
+def write_result(result, output):
+    text = json.dumps(result, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+def compare(result, baseline, higher_is_better, threshold=REGRESSION_THRESHOLD):
+    """List every metric that moved the wrong way by more than threshold.
+
+    result and baseline are {name: {metric: value}}; metrics named in
+    higher_is_better regress when they drop, all others when they rise.
+    """
+    regressions = []
+    for name, metrics in result.items():
+        base = baseline.get(name, {})
+        for metric, value in metrics.items():
+            old = base.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or old <= 0:
+                continue
+            change = (value - old) / old
+            if metric in higher_is_better:
+                change = -change
+            if change > threshold:
+                regressions.append({"name": name, "metric": metric, "baseline": old,
+                                    "current": value, "change": round(change, 3)})
+    return regressions
+
+# ------------------------- Round-trip latency -------------------------
+LATENCY_COMMANDS = {
+    "HI": lambda i: "HI",
+    "UP": lambda i: "UP",
+    "WR": lambda i: f"WR Bench {i % 1000:3d};Latency run",
+    "LI": lambda i: f"LI {i % 256}",
+    "ES": lambda i: "ES",
+}
+LATENCY_RATES = ("sequential_per_s", "pipelined_per_s")
+
+
+def timed_request(protocol, command, timeout):
+    """Send one command and wait for its ack; returns RTT in seconds or None."""
+    done = []
+    start = time.perf_counter()
+    future = protocol.request(command, timeout)
+    future.add_done_callback(lambda f: done.append(time.perf_counter()))
+    try:
+        future.result(timeout * 2)
+    except Exception:
+        return None
+    return done[0] - start
+
+
+def pipelined_rate(protocol, make_command, iterations, window, timeout):
+    """Commands per second with `window` commands kept in flight.
+
+    Submission is throttled to the window so nothing sits in the waiting
+    queue long enough to be coalesced away.
+    """
+    slots = threading.Semaphore(window)
+    finished = threading.Event()
+    remaining = [iterations]
+    lock = threading.Lock()
+
+    def on_done(future):
+        slots.release()
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                finished.set()
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        slots.acquire()
+        protocol.request(make_command(i), timeout).add_done_callback(on_done)
+    finished.wait(timeout * iterations)
+    return iterations / (time.perf_counter() - start)
+
+
+def run_latency(port, iterations, window, binary, timeout=COMMAND_TIMEOUT):
+    protocol = DeviceProtocol(window=window)
+    transport = SerialTransport(port, protocol)
+    transport.open()
+    try:
+        if binary:
+            protocol.request("HI", timeout).result(timeout * 2)
+            binary = protocol.enter_binary(timeout).exception(timeout * 2) is None
+        commands = {}
+        for name, make_command in LATENCY_COMMANDS.items():
+            samples = []
+            start = time.perf_counter()
+            for i in range(iterations):
+                rtt = timed_request(protocol, make_command(i), timeout)
+                if rtt is not None:
+                    samples.append(rtt)
+            elapsed = time.perf_counter() - start
+            stats = summarize(samples)
+            stats["sequential_per_s"] = round(len(samples) / elapsed, 1)
+            stats["pipelined_per_s"] = round(pipelined_rate(protocol, make_command, iterations, window, timeout), 1)
+            stats["errors"] = iterations - len(samples)
+            commands[name] = stats
+        if binary:
+            # Leave the device in text mode for whoever connects next
+            protocol.request("HI", timeout).exception(timeout * 2)
+    finally:
+        transport.close()
+    return {"benchmark": "latency", "port": port, "iterations": iterations,
+            "window": window, "binary": binary, "commands": commands}
+
+
+def latency_main(args):
+    simulator = None
+    port = args.port
+    if args.simulate:
+        from Simulator import DeviceSimulator
+        simulator = DeviceSimulator()
+        port = simulator.open()
+    try:
+        result = run_latency(port, args.iterations, args.window, args.binary)
+    finally:
+        if simulator:
+            simulator.close()
+    return finish(result, "commands", LATENCY_RATES, args)
+
+
+def finish(result, key, higher_is_better, args):
+    """Compare result[key] with the baseline, print, and pick the exit code."""
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(result[key], baseline.get(key, {}), higher_is_better, args.threshold)
+        result["regressions"] = regressions
+        status = 1 if regressions else 0
+    write_result(result, args.output)
+    return status
+
+# ------------------------- Event stream parsing -------------------------
+PARSER_RATES = ("events_per_s", "mb_per_s")
+
+
+def synthetic_stream(lines, seed=0):
+    """Firmware-like traffic: mostly POT reports, some BTN presses and acks."""
+    rng = random.Random(seed)
+    acks = sorted(ACK_WORDS)
+    out = []
+    for _ in range(lines):
+        roll = rng.random()
+        if roll < 0.8:
+            out.append(b"POT%d %4d\r\n" % (rng.randrange(2), rng.randrange(4096)))
+        elif roll < 0.9:
+            out.append(b"BTN%d\r\n" % rng.randrange(4))
+        else:
+            out.append(acks[rng.randrange(len(acks) - 1)].encode("ascii") + b"\r\n")
+    return b"".join(out)
+
+
+def reference_parse(chunks):
+    """The obvious decode/split/startswith parser, for comparison."""
+    events = 0
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for raw in lines:
+            line = raw.decode("ascii", "replace").strip()
+            if line in ACK_WORDS:
+                events += 1
+            elif line.startswith("POT"):
+                _, value = line.split()
+                int(line[3]), int(value)
+                events += 1
+            elif line.startswith("BTN"):
+                int(line[3])
+                events += 1
+    return events
+
+
+def line_parser_parse(chunks):
+    # BIN would stop the parser, so the stream never contains it
+    parser = LineParser(stop_words=())
+    events = 0
+    for chunk in chunks:
+        events += len(parser.feed(chunk))
+    return events
+
+
+def run_parser(lines, chunk_size):
+    stream = synthetic_stream(lines)
+    chunks = [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+    parsers = {}
+    for name, parse in (("LineParser", line_parser_parse), ("reference", reference_parse)):
+        start = time.perf_counter()
+        events = parse(chunks)
+        elapsed = time.perf_counter() - start
+        parsers[name] = {"events": events,
+                         "events_per_s": round(events / elapsed),
+                         "mb_per_s": round(len(stream) / elapsed / 1e6, 2)}
+    return {"benchmark": "parser", "lines": lines, "bytes": len(stream),
+            "chunk_size": chunk_size, "parsers": parsers}
+
+
+def parser_main(args):
+    result = run_parser(args.lines, args.chunk_size)
+    return finish(result, "parsers", PARSER_RATES, args)
+
+# ------------------------- Pot streaming -------------------------
+STREAM_RATES = ("pairs_per_s", "samples_per_s")
+
+
+def run_stream(port, rate, seconds, binary, timeout=COMMAND_TIMEOUT):
+    """Stream for `seconds` and report what arrived."""
+    protocol = DeviceProtocol()
+    transport = SerialTransport(port, protocol)
+    transport.open()
+    try:
+        protocol.request("HI", timeout).result(timeout * 2)
+        if binary:
+            binary = protocol.enter_binary(timeout).exception(timeout * 2) is None
+        protocol.start_stream(rate, timeout).result(timeout * 2)
+        time.sleep(seconds)
+        stream = protocol.stream
+        # Measured before SR 0 so the stop round trip is not counted
+        pairs_per_s = stream.pairs_per_s
+        protocol.stop_stream(timeout).result(timeout * 2)
+        if binary:
+            protocol.request("HI", timeout).exception(timeout * 2)
+    finally:
+        transport.close()
+    streams = {"stream": {
+        "pairs_per_s": round(pairs_per_s, 1),
+        "samples_per_s": round(2 * pairs_per_s, 1),
+        "records": stream.records,
+        "lost": stream.lost,
+        "loss": round(stream.loss, 4),
+        "errors": stream.errors,
+        "skipped_bytes": stream.skipped,
+    }}
+    return {"benchmark": "stream", "port": port, "rate": rate, "seconds": seconds,
+            "binary": binary, "streams": streams}
+
+
+def stream_main(args):
+    simulator = None
+    port = args.port
+    if args.simulate:
+        from Simulator import DeviceSimulator
+        simulator = DeviceSimulator()
+        port = simulator.open()
+    try:
+        result = run_stream(port, args.rate, args.seconds, args.binary)
+    finally:
+        if simulator:
+            simulator.close()
+    return finish(result, "streams", STREAM_RATES, args)
+
+# ------------------------- Startup time -------------------------
+STARTUP_BUDGET_MS = 1000           # Fast-start launch to clickable Connect, for kiosk restarts
+STARTUP_LIMIT = 30.0               # Give up on a child that never becomes interactive
+STARTUP_POLL_MS = 5
+
+
+def startup_probe(fast, limit, poll_ms):
+    """Time HomePage from import to a clickable Connect button.
+
+    run_startup() runs the source of this function in a fresh interpreter,
+    so it imports everything itself and nothing is preloaded. Prints one
+    JSON line of time.monotonic() marks, comparable with the parent's clock.
+    """
+    import json
+    import time
+    marks = {"start": time.monotonic()}
+    from PyQt5.QtCore import QEvent, QObject, QTimer
+    from PyQt5.QtWidgets import QApplication
+    import HomePage
+    marks["imported"] = time.monotonic()
+
+    class PaintWatch(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and "painted" not in marks:
+                marks["painted"] = time.monotonic()
+            return False
+
+    app = QApplication([])
+    window = HomePage.HomePage(fast_start=fast)
+    watch = PaintWatch()
+    window.installEventFilter(watch)
+    window.show()
+
+    def poll():
+        button = window.button
+        if "painted" in marks and button.isEnabled() and button.text() == "Connect":
+            marks["interactive"] = time.monotonic()
+            app.quit()
+
+    timer = QTimer()
+    timer.timeout.connect(poll)
+    timer.start(poll_ms)
+    QTimer.singleShot(int(limit * 1000), app.quit)
+    app.exec_()
+    print(json.dumps(marks))
+
+
+def run_startup(fast, runs):
+    """Median startup times in ms over `runs` fresh processes."""
+    env = dict(os.environ)
+    if not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    here = os.path.dirname(os.path.abspath(__file__))
+    probe = inspect.getsource(startup_probe) + f"\nstartup_probe({fast}, {STARTUP_LIMIT}, {STARTUP_POLL_MS})\n"
+    samples = {"import_ms": [], "first_paint_ms": [], "interactive_ms": [], "launch_to_interactive_ms": []}
+    for _ in range(runs):
+        launched = time.monotonic()
+        child = subprocess.run([sys.executable, "-c", probe],
+                               cwd=here, env=env, capture_output=True, text=True,
+                               timeout=STARTUP_LIMIT + 10)
+        lines = child.stdout.strip().splitlines()
+        marks = json.loads(lines[-1]) if lines else {}
+        if "interactive" not in marks:
+            raise RuntimeError(f"HomePage never became interactive: {child.stderr.strip()[-200:]}")
+        start = marks["start"]
+        samples["import_ms"].append(marks["imported"] - start)
+        samples["first_paint_ms"].append(marks["painted"] - start)
+        samples["interactive_ms"].append(marks["interactive"] - start)
+        samples["launch_to_interactive_ms"].append(marks["interactive"] - launched)
+    return {key: round(statistics.median(values) * 1000, 1) for key, values in samples.items()}
+
+
+def startup_main(args):
+    modes = {"fast": run_startup(True, args.runs)}
+    if not args.fast_only:
+        modes["intro"] = run_startup(False, args.runs)
+    result = {"benchmark": "startup", "runs": args.runs, "budget_ms": args.budget, "modes": modes}
+    status = finish(result, "modes", (), args)
+    if modes["fast"]["launch_to_interactive_ms"] > args.budget:
+        print(f"fast start took {modes['fast']['launch_to_interactive_ms']} ms, "
+              f"over the {args.budget} ms budget", file=sys.stderr)
+        status = 1
+    return status
+
+# ------------------------- Color animators -------------------------
+ANIMATOR_RATES = ("speedup",)
+# What each animator in Animations.py used to do on every tick, for comparison
+ANIMATOR_STYLESHEETS = {
+    "ColorAnimator": """
+        QPushButton {{ background-color: {color}; color: white; border: none;
+                       border-radius: 12px; font-size: 20px; padding: 10px 20px; }}""",
+    "TextBorderAnimator": """
+        QPushButton {{ background-color: transparent; color: {color}; border: 3px solid {color};
+                       border-radius: 14px; font-size: 24px; font-weight: bold; padding: 10px 20px; }}""",
+    "PanelColorAnimator": "background-color: {color}; border-radius: 15px;",
+    "PanelBorderAnimator": "background-color: #E4EEF0; border: 4px solid {color}; border-radius: 15px;",
+}
+
+
+def animator_target(name):
+    """A page-like window holding the widget the animator drives"""
+    from PyQt5.QtWidgets import QLabel, QPushButton, QWidget
+    page = QWidget()
+    page.resize(1000, 850)
+    page.setStyleSheet("background-color: white;")
+    if name.startswith("Panel"):
+        widget = QWidget(page)
+        widget.setGeometry(200, 200, 600, 170)
+        label = QLabel("Connect Dongle", widget)
+        label.setStyleSheet("color: white; font-size: 24px; font-weight: bold; background: transparent;")
+        label.move(200, 60)
+    else:
+        widget = QPushButton("Connect", page)
+        widget.setGeometry(350, 595, 300, 85)
+    page.show()
+    return page, widget
+
+
+def animator_cpu(animator, widget, frames, app):
+    """CPU seconds per frame for setColor() plus the repaint it causes"""
+    from PyQt5.QtGui import QColor
+    colors = [QColor.fromHsv(i * 360 // frames % 360, 120, 160) for i in range(frames)]
+    start = time.process_time()
+    for color in colors:
+        animator.setColor(color)
+        widget.repaint()
+        app.processEvents()
+    return (time.process_time() - start) / frames
+
+
+def loop_cpu(animator, seconds, app):
+    """Share of one core used by an endless color loop, as the pages run them"""
+    from PyQt5.QtCore import QPropertyAnimation, QTimer
+    from PyQt5.QtGui import QColor
+    anim = QPropertyAnimation(animator, b"color")
+    anim.setDuration(2000)
+    anim.setStartValue(QColor("#660000"))
+    anim.setKeyValueAt(0.5, QColor("#ff5b04"))
+    anim.setEndValue(QColor("#660000"))
+    anim.setLoopCount(-1)
+    start_cpu, start = time.process_time(), time.perf_counter()
+    anim.start()
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec_()
+    anim.stop()
+    return (time.process_time() - start_cpu) / (time.perf_counter() - start)
+
+
+def run_animators(frames, seconds):
+    if not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtCore import QObject, pyqtProperty
+    from PyQt5.QtGui import QColor
+    from PyQt5.QtWidgets import QApplication
+    import Animations
+
+    class StyleSheetAnimator(QObject):
+        """The old way: a freshly formatted stylesheet on every tick"""
+        def __init__(self, widget, template):
+            super().__init__()
+            self.widget = widget
+            self.template = template
+            self._color = QColor()
+
+        def getColor(self):
+            return self._color
+
+        def setColor(self, color):
+            self._color = color
+            self.widget.setStyleSheet(self.template.format(color=color.name()))
+
+        color = pyqtProperty(QColor, fget=getColor, fset=setColor)
+
+    app = QApplication.instance() or QApplication([])
+    results = {}
+    for name, template in ANIMATOR_STYLESHEETS.items():
+        stats = {}
+        for kind in ("stylesheet", "painted"):
+            page, widget = animator_target(name)
+            if kind == "stylesheet":
+                animator = StyleSheetAnimator(widget, template)
+            else:
+                animator = getattr(Animations, name)(widget)
+            stats[kind] = animator_cpu(animator, widget, frames, app)
+            if seconds:
+                stats[kind + "_loop"] = loop_cpu(animator, seconds, app)
+            page.close()
+        before, after = stats["stylesheet"], stats["painted"]
+        results[name] = {
+            "stylesheet_us_per_frame": round(before * 1e6, 1),
+            "painted_us_per_frame": round(after * 1e6, 1),
+            "speedup": round(before / after, 2) if after else None,
+        }
+        if seconds:
+            results[name]["stylesheet_loop_cpu"] = round(stats["stylesheet_loop"], 4)
+            results[name]["painted_loop_cpu"] = round(stats["painted_loop"], 4)
+    return {"benchmark": "animators", "frames": frames, "seconds": seconds, "animators": results}
+
+
+def animators_main(args):
+    return finish(run_animators(args.frames, args.seconds), "animators", ANIMATOR_RATES, args)
+
+# ------------------------- Run -------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dongle host stack benchmarks")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    def common(p):
+        p.add_argument("--output", help="Also write the JSON result to this file")
+        p.add_argument("--baseline", help="Compare against a stored JSON result")
+        p.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                       help="Relative change counted as a regression (default 0.2)")
+
+    latency = sub.add_parser("latency", help="Round-trip time of every protocol command")
+    latency.add_argument("--port", default=DEFAULT_PORT)
+    latency.add_argument("--simulate", action="store_true", help="Run against Simulator.py instead of a board")
+    latency.add_argument("-n", "--iterations", type=int, default=100)
+    latency.add_argument("--window", type=int, default=COMMAND_WINDOW)
+    latency.add_argument("--binary", action="store_true", help="Negotiate binary framed mode first")
+    latency.set_defaults(run=latency_main)
+    common(latency)
+
+    parse = sub.add_parser("parser", help="Events per second through the text stream parser")
+    parse.add_argument("-n", "--lines", type=int, default=200000)
+    parse.add_argument("--chunk-size", type=int, default=64, help="Bytes per simulated serial read")
+    parse.set_defaults(run=parser_main)
+    common(parse)
+
+    stream = sub.add_parser("stream", help="Achieved rate and record loss of pot streaming (SR)")
+    stream.add_argument("--port", default=DEFAULT_PORT)
+    stream.add_argument("--simulate", action="store_true", help="Run against Simulator.py instead of a board")
+    stream.add_argument("--rate", type=int, default=STREAM_RATE_MAX, help="Pairs per second to ask for")
+    stream.add_argument("--seconds", type=float, default=5.0)
+    stream.add_argument("--binary", action="store_true", help="Start the stream from binary framed mode")
+    stream.set_defaults(run=stream_main)
+    common(stream)
+
+    startup = sub.add_parser("startup", help="HomePage import, first paint and time to interactive")
+    startup.add_argument("--runs", type=int, default=3, help="Fresh processes per mode (median is reported)")
+    startup.add_argument("--fast-only", action="store_true", help="Skip the ~8 s intro mode")
+    startup.add_argument("--budget", type=float, default=STARTUP_BUDGET_MS,
+                         help="Fail if fast start takes longer than this many ms to become interactive")
+    startup.set_defaults(run=startup_main)
+    common(startup)
+
+    animators = sub.add_parser("animators", help="CPU per frame of the color animators vs. per-tick stylesheets")
+    animators.add_argument("--frames", type=int, default=600)
+    animators.add_argument("--seconds", type=float, default=2.0,
+                           help="Also time a real looping animation for this long (0 to skip)")
+    animators.set_defaults(run=animators_main)
+    common(animators)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
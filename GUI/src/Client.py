@@ -0,0 +1,178 @@
+# Client.py
+"""Headless client for scripting the dongle: no Qt, no display needed.
+
+    python Client.py hi                          # handshake, print the round trip
+    python Client.py send "WR Hello;World" "LI 5" UP ES
+    python Client.py tail --seconds 10           # POT/BTN events as JSON lines
+
+or from Python:
+
+    with Dongle() as dongle:
+        dongle.command("LI 5")
+        for event in dongle.events(seconds=5):
+            print(event)
+
+The port comes from --port or DONGLE_PORT, otherwise Discovery.py finds it.
+Only the protocol layer is imported, so a command runs in tens of
+milliseconds instead of paying for PyQt5 and a QApplication.
+"""
+import argparse
+import json
+import queue
+import sys
+import time
+
+from Protocol import COMMAND_TIMEOUT, DEFAULT_PORT, PREFER_BINARY, DeviceProtocol, SerialTransport
+from Sessions import ChannelListener
+
+EVENT_FIELDS = {                   # ChannelListener tuple -> JSON field names
+    "pot": ("channel", "value"),
+    "button": ("index",),
+    "line": ("line",),
+    "lost": ("reason",),
+}
+
+
+def find_port():
+    """DONGLE_PORT if set, else whatever Discovery finds (None if nothing)"""
+    from Discovery import PORT_OVERRIDE, discover
+    return DEFAULT_PORT if PORT_OVERRIDE else discover()
+
+
+class Dongle:
+    """Blocking handle on one dongle for scripts and tests.
+
+    open() connects and does the HI/HEY handshake (then BM unless
+    binary is False); command() waits for each ack. Device events queue
+    up until read with events().
+
+    close() leaves binary mode with HI, which puts "Controller" /
+    "Connected." back on the LCD. Use binary=False to keep what was shown.
+    """
+    def __init__(self, port=None, timeout=COMMAND_TIMEOUT, binary=PREFER_BINARY):
+        self.port = port
+        self.timeout = timeout
+        self.binary = binary
+        self.queue = queue.SimpleQueue()
+        self.protocol = DeviceProtocol(ChannelListener(self.queue))
+        self.transport = None
+        self.rtt = None                # HI round trip of the last handshake, seconds
+
+    def open(self):
+        port = self.port or find_port()
+        if not port:
+            raise ConnectionError("No dongle found")
+        self.transport = SerialTransport(port, self.protocol)
+        self.transport.open()
+        self.port = port
+        try:
+            self.handshake()
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def handshake(self):
+        """HI/HEY, then binary mode if asked for; returns the HI round trip in seconds"""
+        start = time.perf_counter()
+        self.command("HI")
+        rtt = self.rtt = time.perf_counter() - start
+        if self.binary:
+            # Old firmware ignores BM and the link stays in text mode
+            self.protocol.enter_binary(self.timeout).exception(self.timeout * 2)
+        return rtt
+
+    def command(self, command):
+        """Send command and wait for its ack word; raises CommandTimeout if none comes."""
+        return self.protocol.request(command, self.timeout).result(self.timeout * 2)
+
+    def write_lcd(self, line1, line2):
+        for future in self.protocol.write_lcd(line1, line2, self.timeout):
+            future.result(self.timeout * 2)
+
+    def events(self, seconds=None):
+        """Yield device events as dicts until seconds pass (forever if None)."""
+        end = None if seconds is None else time.monotonic() + seconds
+        while end is None or time.monotonic() < end:
+            wait = None if end is None else max(0.0, end - time.monotonic())
+            try:
+                kind, *values = self.queue.get(timeout=wait)
+            except queue.Empty:
+                return
+            if kind not in EVENT_FIELDS:
+                continue           # Acks come back from command(); samples have no JSON form
+            event = {"t": round(time.time(), 3), "type": kind}
+            event.update(zip(EVENT_FIELDS[kind], values))
+            yield event
+            if kind == "lost":
+                return
+
+    def close(self):
+        if self.transport:
+            transport, self.transport = self.transport, None
+            if self.binary and transport.is_open:
+                # Leave the device in text mode for whoever connects next
+                self.protocol.request("HI", self.timeout).exception(self.timeout * 2)
+            transport.close()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ------------------------- Run -------------------------
+def hi_main(dongle, args):
+    # open() has done the handshake; report its round trip, not a warm second one
+    print(f"HEY from {dongle.port} in {dongle.rtt * 1000:.1f} ms")
+
+
+def send_main(dongle, args):
+    for command in args.commands:
+        print(command, "->", dongle.command(command))
+
+
+def tail_main(dongle, args):
+    for event in dongle.events(args.seconds):
+        print(json.dumps(event), flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Talk to the dongle without the GUI")
+    parser.add_argument("--port", help="Serial port (default: DONGLE_PORT, else search)")
+    parser.add_argument("--timeout", type=float, default=COMMAND_TIMEOUT, help="Seconds to wait for each ack")
+    parser.add_argument("--text", action="store_true", help="Stay in text mode instead of negotiating BM")
+    parser.add_argument("--simulate", action="store_true", help="Talk to Simulator.py instead of a board")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("hi", help="Run the HI/HEY handshake").set_defaults(run=hi_main, binary=True)
+    send = sub.add_parser("send", help="Send commands (WR/WP/LI/UP/ES/PC) and print their acks")
+    send.add_argument("commands", nargs="+", metavar="COMMAND")
+    # Text mode: leaving binary on exit would overwrite a WR just sent
+    send.set_defaults(run=send_main, binary=False)
+    tail = sub.add_parser("tail", help="Print POT/BTN events as JSON lines")
+    tail.add_argument("--seconds", type=float, default=None, help="Stop after this long (default: never)")
+    tail.set_defaults(run=tail_main, binary=True)
+    args = parser.parse_args(argv)
+
+    simulator = None
+    port = args.port
+    if args.simulate:
+        from Simulator import DeviceSimulator
+        simulator = DeviceSimulator(pot_rate=5.0, button_rate=0.5)
+        port = simulator.open()
+    try:
+        with Dongle(port, args.timeout, binary=args.binary and not args.text) as dongle:
+            args.run(dongle, args)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass                       # Ctrl+C or the reader of our output went away
+    except Exception as e:
+        print(f"error: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if simulator:
+            simulator.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
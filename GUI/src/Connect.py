@@ -6,6 +6,12 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve, QRect, QTimer
 from PyQt5.QtGui import QClipboard, QPainter, QColor, QTransform
 
+from Animations import play
+from PotPlot import PotPlot
+from Telemetry import TelemetryBuffer
+
+LINK_QUALITY_MS = 1000             # How often the link quality line refreshes
+
 # --------------------- Snackbar ---------------------
 class Snackbar(QLabel):
     """Snackbar notification that fades in/out."""
@@ -35,14 +41,14 @@ class Snackbar(QLabel):
         self.anim.stop()
         self.anim.setStartValue(0)
         self.anim.setEndValue(1)
-        self.anim.start()
+        play(self, self.anim)
         QTimer.singleShot(2000, self.fade_out)
 
     def fade_out(self):
         self.anim.stop()
         self.anim.setStartValue(1)
         self.anim.setEndValue(0)
-        self.anim.start()
+        play(self, self.anim)
         self.anim.finished.connect(lambda: self.setVisible(False))
 
 # --------------------- Paper Tab ---------------------
@@ -105,7 +111,7 @@ class PaperTab(QLabel):
 
         anim.setStartValue(rect)
         anim.setEndValue(QRect(new_x, new_y, new_w, new_h))
-        anim.start()
+        play(self, anim)
         self.anim = anim
 
     def update_position(self):
@@ -189,13 +195,13 @@ class SlideBox(QWidget):
                     self.paper_tab.hide()
             anim.finished.connect(after_close)
 
-        anim.start()
+        play(self, anim)
         self.anim = anim
         self.visible = not self.visible
 
 # --------------------- Connect Page ---------------------
 class ConnectPage(QWidget):
-    def __init__(self):
+    def __init__(self, link=None):
         super().__init__()
         self.setWindowTitle("Connect Page")
         self.setFixedSize(1000, 850)
@@ -204,6 +210,17 @@ class ConnectPage(QWidget):
         self.home_page = None  # Reference to HomePage for back navigation
         self.disconnect_page = None
 
+        # Pot history for the live plot, filled straight from the link
+        self.telemetry = TelemetryBuffer()
+
+        # DeviceLink opened by HomePage; None when run standalone
+        self.link = link
+        if self.link:
+            self.link.connection_lost.connect(self.on_connection_lost)
+            self.link.reconnecting.connect(self.on_reconnecting)
+            self.link.reconnected.connect(self.on_reconnected)
+            self.link.pot_changed.connect(self.telemetry.append)
+
         self.snackbar = Snackbar(self)
         self.snackbar.setFixedWidth(250)
         self.snackbar.move((self.width() - 250)//2, self.height() - 100)
@@ -219,6 +236,11 @@ class ConnectPage(QWidget):
         vbox.addWidget(self.box2)
         vbox.addWidget(self.box3)
         vbox.addStretch()
+
+        # Live potentiometer plot
+        self.pot_plot = PotPlot(self.telemetry)
+        self.pot_plot.setFixedSize(900, 220)
+        vbox.addWidget(self.pot_plot, alignment=Qt.AlignCenter)
         vbox.setSpacing(40)
         vbox.setAlignment(Qt.AlignCenter)
         self.setLayout(vbox)
@@ -256,20 +278,60 @@ class ConnectPage(QWidget):
         self.exit_btn.move(self.width() - self.exit_btn.width() - margin, margin)
         self.exit_btn.clicked.connect(self.open_disconnect_page)
 
+        # Link quality (RTT, jitter, heartbeat) between the two buttons
+        self.link_label = QLabel(self)
+        self.link_label.setStyleSheet("color: #4A706F; font-size: 12px;")
+        self.link_label.setAlignment(Qt.AlignCenter)
+        self.link_label.setGeometry(200, margin, self.width() - 400, 30)
+        self.link_timer = QTimer(self)
+        self.link_timer.timeout.connect(self.update_link_quality)
+        if self.link:
+            self.link_timer.start(LINK_QUALITY_MS)
+            self.update_link_quality()
+
+    def update_link_quality(self):
+        if self.link:
+            self.link_label.setText(self.link.link_quality())
+
+    def release_link(self):
+        """Say goodbye to the controller (ES) and close the port"""
+        if self.link:
+            self.link.connection_lost.disconnect(self.on_connection_lost)
+            self.link.reconnecting.disconnect(self.on_reconnecting)
+            self.link.reconnected.disconnect(self.on_reconnected)
+            self.link.pot_changed.disconnect(self.telemetry.append)
+            if self.link.is_open:
+                self.link.send("ES")
+            self.link.close()
+            self.link = None
+        self.link_timer.stop()
+
+    def on_connection_lost(self, reason):
+        """Cable pulled or port vanished and the link could not get it back"""
+        self.open_disconnect_page()
+
+    def on_reconnecting(self, reason):
+        self.snackbar.show_message("Reconnecting...")
+
+    def on_reconnected(self):
+        self.snackbar.show_message("Reconnected")
+
     def go_to_homepage(self):
         """Go back to HomePage (connection screen)"""
+        self.release_link()
         if self.home_page:
             self.home_page.show()
             self.close()
         else:
-            # If no reference, create new HomePage
+            # If no reference, create new HomePage, minus the intro
             from HomePage import HomePage
-            home = HomePage()
+            home = HomePage(fast_start=True)
             home.show()
             self.close()
 
     def open_disconnect_page(self):
         """Open DisconnectPage (exit sequence)"""
+        self.release_link()
         from Disconnect import DisconnectPage
         self.disconnect_page = DisconnectPage()
         self.disconnect_page.connect_page = self  # Pass reference
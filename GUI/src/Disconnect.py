@@ -1,28 +1,10 @@
 # Disconnect.py
 import sys
 from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QGraphicsOpacityEffect, QApplication
-from PyQt5.QtCore import QPropertyAnimation, QTimer, pyqtProperty, QObject, Qt
+from PyQt5.QtCore import QPropertyAnimation, QTimer, Qt
 from PyQt5.QtGui import QColor
 
-# ------------------------- Panel Border Animator -------------------------
-class PanelBorderAnimator(QObject):
-    def __init__(self, widget):
-        super().__init__()
-        self._color = QColor("#660000")  # initial dark red
-        self.widget = widget
-
-    def getColor(self):
-        return self._color
-
-    def setColor(self, color):
-        self._color = color
-        self.widget.setStyleSheet(f"""
-            background-color: #E4EEF0;
-            border: 4px solid {color.name()};
-            border-radius: 15px;
-        """)
-
-    color = pyqtProperty(QColor, fget=getColor, fset=setColor)
+from Animations import PanelBorderAnimator, play
 
 # ------------------------- Disconnect Page -------------------------
 class DisconnectPage(QWidget):
@@ -47,11 +29,11 @@ class DisconnectPage(QWidget):
         # Panel label
         self.panel_label = QLabel("Disconnected", self.panel)
         self.panel_label.setAlignment(Qt.AlignCenter)
-        self.panel_label.setStyleSheet("color: #325D79; font-size: 32px; font-weight: bold;")
+        self.panel_label.setStyleSheet("color: #325D79; font-size: 32px; font-weight: bold; background: transparent;")
         self.panel_label.resize(self.panel.width(), self.panel.height())
 
         # Animator for glowing border
-        self.border_animator = PanelBorderAnimator(self.panel)
+        self.border_animator = PanelBorderAnimator(self.panel, "#660000")
 
         # Countdown label
         self.countdown_label = QLabel("", self)
@@ -94,7 +76,7 @@ class DisconnectPage(QWidget):
         self.fade_in_anim.setStartValue(0)
         self.fade_in_anim.setEndValue(1)
         self.fade_in_anim.finished.connect(self.start_border_glow_loop)
-        self.fade_in_anim.start()
+        play(self, self.fade_in_anim)
 
     def start_border_glow_loop(self):
         self.border_animation = QPropertyAnimation(self.border_animator, b"color")
@@ -103,7 +85,7 @@ class DisconnectPage(QWidget):
         self.border_animation.setKeyValueAt(0.5, QColor("#ff5b04"))
         self.border_animation.setEndValue(QColor("#660000"))
         self.border_animation.setLoopCount(-1)
-        self.border_animation.start()
+        play(self, self.border_animation)
         QTimer.singleShot(5000, self.fade_panel_out)
 
     def fade_panel_out(self):
@@ -112,7 +94,7 @@ class DisconnectPage(QWidget):
         self.fade_out_anim.setStartValue(1)
         self.fade_out_anim.setEndValue(0)
         self.fade_out_anim.finished.connect(self.show_countdown)
-        self.fade_out_anim.start()
+        play(self, self.fade_out_anim)
 
     def show_countdown(self):
         self.countdown_label.setText(f"Application closing in {self.countdown_seconds} seconds...")
@@ -134,13 +116,16 @@ class DisconnectPage(QWidget):
         QApplication.instance().quit()
 
     def on_reconnect(self):
-        """Go back to HomePage to reconnect"""
+        """Go back to HomePage and reconnect straight away"""
         self.countdown_timer.stop()
-        
-        # Go back to HomePage
-        from HomePage import HomePage
-        home = HomePage()
+
+        # Reuse the HomePage we came from; a new one starts fast
+        home = self.connect_page.home_page if self.connect_page else None
+        if home is None:
+            from HomePage import HomePage
+            home = HomePage(fast_start=True)
         home.show()
+        home.reconnect()
         self.close()
 
 # Run standalone for testing
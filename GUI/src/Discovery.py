@@ -0,0 +1,130 @@
+# Discovery.py
+"""Find the dongle among the machine's serial ports.
+
+Every candidate port is opened at once, each in its own thread, and sent
+the HI handshake; the first one to answer HEY wins. The whole search takes
+one deadline however many ports there are. The winning port is cached and
+tried on its own first next time, so a known dongle reconnects at once.
+
+    python Discovery.py                 # print the dongle's port
+
+DONGLE_PORT skips the search and names the port outright.
+"""
+import glob
+import os
+import sys
+import threading
+import time
+
+import serial
+from serial.tools import list_ports
+
+from Protocol import BAUD_RATE
+
+PORT_OVERRIDE = os.environ.get("DONGLE_PORT")
+DISCOVERY_TIMEOUT = 1.0            # Seconds for every port to answer HI
+CACHED_PORT_TIMEOUT = 0.3          # Seconds for the cached port before searching
+PORT_CACHE = os.environ.get("DONGLE_PORT_CACHE", os.path.join(os.path.expanduser("~"), ".dongle_port"))
+# USB serial adapters that list_ports may miss (no sysfs info in containers)
+PORT_PATTERNS = ("/dev/ttyUSB*", "/dev/ttyACM*", "/dev/tty.usbserial*", "/dev/tty.usbmodem*")
+HANDSHAKE = b"HI\r\n"
+REPLY = b"HEY\r\n"
+
+
+def candidate_ports():
+    """Serial ports worth probing, in a stable order."""
+    ports = {port.device for port in list_ports.comports()}
+    for pattern in PORT_PATTERNS:
+        ports.update(glob.glob(pattern))
+    return sorted(ports)
+
+
+def load_cached_port(path=PORT_CACHE):
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def save_cached_port(port, path=PORT_CACHE):
+    try:
+        with open(path, "w") as f:
+            f.write(port + "\n")
+    except OSError:
+        pass                       # Only costs a search next launch
+
+
+def probe(port, deadline, cancelled=None):
+    """True if port answers HI with HEY before deadline (time.monotonic()).
+
+    Stops early once cancelled (a threading.Event) is set.
+    """
+    try:
+        link = serial.Serial(port, BAUD_RATE, timeout=0.02, write_timeout=0.1)
+    except (serial.SerialException, OSError, ValueError):
+        return False
+    received = b""
+    try:
+        link.reset_input_buffer()
+        link.write(HANDSHAKE)
+        while time.monotonic() < deadline and not (cancelled and cancelled.is_set()):
+            # A streaming or chatty dongle sends other bytes before HEY
+            received = received[-len(REPLY):] + link.read(link.in_waiting or 1)
+            if REPLY in received:
+                return True
+    except (serial.SerialException, OSError):
+        return False
+    finally:
+        link.close()
+    return False
+
+
+def probe_all(ports, timeout=DISCOVERY_TIMEOUT):
+    """Probe ports in parallel; the first that answers, or None."""
+    if not ports:
+        return None
+    deadline = time.monotonic() + timeout
+    done = threading.Event()
+    lock = threading.Lock()
+    result = []
+    remaining = [len(ports)]
+
+    def run(port):
+        ok = probe(port, deadline, done)
+        with lock:
+            if ok and not result:
+                result.append(port)
+            remaining[0] -= 1
+            if result or remaining[0] == 0:
+                done.set()
+
+    # Daemon threads: a port whose open() hangs must not keep us waiting
+    for port in ports:
+        threading.Thread(target=run, args=(port,), name=f"probe-{port}", daemon=True).start()
+    done.wait(max(0.0, deadline - time.monotonic()) + 0.1)
+    done.set()
+    with lock:
+        return result[0] if result else None
+
+
+def discover(timeout=DISCOVERY_TIMEOUT, cache=PORT_CACHE):
+    """Port of the dongle, or None. Tries the cached port alone first."""
+    cached = load_cached_port(cache) if cache else None
+    if cached and probe(cached, time.monotonic() + min(timeout, CACHED_PORT_TIMEOUT)):
+        return cached
+    # The cached port stays in the search: a slow answer may still come
+    ports = candidate_ports()
+    if cached and cached not in ports:
+        ports.insert(0, cached)
+    port = probe_all(ports, timeout)
+    if port and cache and port != cached:
+        save_cached_port(port, cache)
+    return port
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    found = discover()
+    print(f"{found or 'no dongle found'} ({time.perf_counter() - start:.3f} s)")
+    sys.exit(0 if found else 1)
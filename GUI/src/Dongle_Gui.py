@@ -10,71 +10,6 @@ from PyQt5.QtCore import (
 )
 from PyQt5.QtGui import QColor, QBrush, QPen, QFont, QPainter
 
-# ------------------------- Button Animators -------------------------
-class ColorAnimator(QObject):
-    def __init__(self, button):
-        super().__init__()
-        self._color = QColor("#EBE8EB")
-        self.button = button
-
-    def getColor(self):
-        return self._color
-
-    def setColor(self, color):
-        self._color = color
-        self.button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {color.name()};
-                color: white;
-                border: none;
-                border-radius: 12px;
-                font-size: 20px;
-                padding: 10px 20px;
-            }}
-        """)
-
-    color = pyqtProperty(QColor, fget=getColor, fset=setColor)
-
-class TextBorderAnimator(QObject):
-    def __init__(self, button):
-        super().__init__()
-        self._color = QColor("#800080")
-        self.button = button
-
-    def getColor(self):
-        return self._color
-
-    def setColor(self, color):
-        self._color = color
-        self.button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: transparent;
-                color: {color.name()};
-                border: 3px solid {color.name()};
-                border-radius: 14px;
-                font-size: 24px;
-                font-weight: bold;
-                padding: 10px 20px;
-            }}
-        """)
-
-    color = pyqtProperty(QColor, fget=getColor, fset=setColor)
-
-class PanelColorAnimator(QObject):
-    def __init__(self, panel):
-        super().__init__()
-        self._color = QColor("#F0E68C")
-        self.panel = panel
-
-    def getColor(self):
-        return self._color
-
-    def setColor(self, color):
-        self._color = color
-        self.panel.setStyleSheet(f"background-color: {color.name()}; border-radius: 15px;")
-
-    color = pyqtProperty(QColor, fget=getColor, fset=setColor)
-
 # ------------------------- USB Animators -------------------------
 class AnimatedUSB(QObject):
     def __init__(self, graphics_item):
@@ -1,5 +1,7 @@
 # HomePage.py
+import os
 import sys
+import threading
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QPushButton, QLabel, QGraphicsOpacityEffect,
     QGraphicsColorizeEffect, QGraphicsView, QGraphicsScene,
@@ -7,74 +9,19 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import (
     QPropertyAnimation, QEasingCurve, QPoint, QTimer, pyqtProperty,
-    QObject, QPointF, Qt
+    QObject, QPointF, Qt, pyqtSignal
 )
 from PyQt5.QtGui import QColor, QBrush, QPen, QFont, QPainter
 
-# ------------------------- Button Animators -------------------------
-class ColorAnimator(QObject):
-    def __init__(self, button):
-        super().__init__()
-        self._color = QColor("#87A19E")
-        self.button = button
-
-    def getColor(self):
-        return self._color
-
-    def setColor(self, color):
-        self._color = color
-        self.button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {color.name()};
-                color: white;
-                border: none;
-                border-radius: 12px;
-                font-size: 20px;
-                padding: 10px 20px;
-            }}
-        """)
+from Animations import ColorAnimator, PanelColorAnimator, TextBorderAnimator, play
+from Discovery import PORT_OVERRIDE, discover, save_cached_port
+from Protocol import DEFAULT_PORT, PREFER_BINARY
+from QtLink import DeviceLink
+from Recorder import REPLAY_PATH
 
-    color = pyqtProperty(QColor, fget=getColor, fset=setColor)
-
-class TextBorderAnimator(QObject):
-    def __init__(self, button):
-        super().__init__()
-        self._color = QColor("#87A19E")
-        self.button = button
-
-    def getColor(self):
-        return self._color
-
-    def setColor(self, color):
-        self._color = color
-        self.button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: transparent;
-                color: {color.name()};
-                border: 3px solid {color.name()};
-                border-radius: 14px;
-                font-size: 24px;
-                font-weight: bold;
-                padding: 10px 20px;
-            }}
-        """)
-
-    color = pyqtProperty(QColor, fget=getColor, fset=setColor)
-
-class PanelColorAnimator(QObject):
-    def __init__(self, panel):
-        super().__init__()
-        self._color = QColor("#AFDDCE")
-        self.panel = panel
-
-    def getColor(self):
-        return self._color
-
-    def setColor(self, color):
-        self._color = color
-        self.panel.setStyleSheet(f"background-color: {color.name()}; border-radius: 15px;")
-
-    color = pyqtProperty(QColor, fget=getColor, fset=setColor)
+HANDSHAKE_TIMEOUT_MS = 1000  # Time allowed for HEY after sending HI
+# Skip the ~8 s intro and start on the Connect button (also: --fast)
+FAST_START = os.environ.get("DONGLE_FAST_START", "0") != "0"
 
 # ------------------------- USB Animators -------------------------
 class AnimatedUSB(QObject):
@@ -214,7 +161,7 @@ class ConnectionFailedWidget(QWidget):
         fade_in.setDuration(500)
         fade_in.setStartValue(0)
         fade_in.setEndValue(1)
-        fade_in.start()
+        play(self, fade_in)
         self.fade_in_anim = fade_in
 
         QTimer.singleShot(300, self.start_usb_loop)
@@ -229,7 +176,7 @@ class ConnectionFailedWidget(QWidget):
         conn_anim.setEndValue(180)
         conn_anim.setEasingCurve(QEasingCurve.InOutQuad)
         conn_anim.setLoopCount(-1)
-        conn_anim.start()
+        play(self, conn_anim)
         self.animations.append(conn_anim)
 
         cable_anim = QPropertyAnimation(self.cable, b"pos_x")
@@ -238,7 +185,7 @@ class ConnectionFailedWidget(QWidget):
         cable_anim.setEndValue(110)
         cable_anim.setEasingCurve(QEasingCurve.InOutQuad)
         cable_anim.setLoopCount(-1)
-        cable_anim.start()
+        play(self, cable_anim)
         self.animations.append(cable_anim)
 
         symbol_anim = QPropertyAnimation(self.usb_symbol, b"pos")
@@ -247,7 +194,7 @@ class ConnectionFailedWidget(QWidget):
         symbol_anim.setEndValue(QPointF(188,48))
         symbol_anim.setEasingCurve(QEasingCurve.InOutQuad)
         symbol_anim.setLoopCount(-1)
-        symbol_anim.start()
+        play(self, symbol_anim)
         self.animations.append(symbol_anim)
 
     def update_countdown(self):
@@ -265,7 +212,7 @@ class ConnectionFailedWidget(QWidget):
         fade_out.setStartValue(1)
         fade_out.setEndValue(0)
         fade_out.finished.connect(self.on_fade_out_complete)
-        fade_out.start()
+        play(self, fade_out)
         self.fade_out_anim = fade_out
 
     def on_fade_out_complete(self):
@@ -273,9 +220,29 @@ class ConnectionFailedWidget(QWidget):
         if self.return_callback:
             self.return_callback()
 
+# ------------------------- Port Discovery -------------------------
+class PortFinder(QObject):
+    """Runs Discovery.discover() on a worker thread"""
+    finished = pyqtSignal(str)     # The dongle's port, "" if none answered
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.thread = None
+
+    @property
+    def busy(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="discovery", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        self.finished.emit(discover() or "")
+
 # ------------------------- Home Page -------------------------
 class HomePage(QWidget):
-    def __init__(self):
+    def __init__(self, fast_start=FAST_START):
         super().__init__()
         self.setWindowTitle("Dongle Lock - Welcome")
         self.resize(1000, 850)
@@ -298,18 +265,34 @@ class HomePage(QWidget):
         self.button.setGraphicsEffect(self.opacity_effect)
         self.opacity_effect.setOpacity(0)
 
-        self.color_animator = ColorAnimator(self.button)
+        self.color_animator = ColorAnimator(self.button, "#87A19E")
         self.glow_effect = QGraphicsColorizeEffect()
         self.glow_effect.setColor(QColor(128,0,128))
         self.glow_effect.setStrength(0)
 
+        self.dropped = False       # Button has reached its Connect position
         self.update_button()
 
         self.failed_widget = None
         self.panel = None
         self.connect_page = None
 
-        QTimer.singleShot(500, self.start_fade_in)
+        # Serial link to the controller, shared with ConnectPage once connected
+        self.link = DeviceLink(self)
+        self.link.ack_received.connect(self.on_ack_received)
+        self.port = None
+        self.port_finder = PortFinder(self)
+        self.port_finder.finished.connect(self.on_port_found)
+        self.handshake_timer = QTimer(self)
+        self.handshake_timer.setSingleShot(True)
+        self.handshake_timer.timeout.connect(self.on_handshake_timeout)
+
+        if fast_start:
+            # Kiosk restart or coming back to reconnect: straight to the Connect button
+            self.opacity_effect.setOpacity(1)
+            self.on_button_dropped()
+        else:
+            QTimer.singleShot(500, self.start_fade_in)
 
     def resizeEvent(self, event):
         self.update_button()
@@ -317,6 +300,12 @@ class HomePage(QWidget):
 
     def update_button(self):
         w, h = self.width(), self.height()
+        if self.dropped:
+            btn_w, btn_h = int(w*0.3), int(h*0.1)
+            self.button.resize(btn_w, btn_h)
+            # Top edge where drop_button() leaves the taller intro button
+            self.button.move((w-btn_w)//2, int(h*0.8) - int(h*0.2)//2)
+            return
         btn_w, btn_h = int(w*0.3), int(h*0.2)
         self.button.resize(btn_w, btn_h)
         self.button.move((w-btn_w)//2, int(h*0.25))
@@ -327,7 +316,7 @@ class HomePage(QWidget):
         anim.setStartValue(0)
         anim.setEndValue(1)
         anim.finished.connect(self.start_color_fade)
-        anim.start()
+        play(self, anim)
         self.fade_animation = anim
 
     def start_color_fade(self):
@@ -339,7 +328,7 @@ class HomePage(QWidget):
         anim.setKeyValueAt(0.75, QColor("#14605F"))
         anim.setKeyValueAt(1.0, QColor("#0D4240"))
         anim.finished.connect(self.drop_button)
-        anim.start()
+        play(self, anim)
         self.color_animation = anim
 
     def drop_button(self):
@@ -352,17 +341,15 @@ class HomePage(QWidget):
         anim.setDuration(1500)
         anim.setEndValue(QPoint(target_x, target_y))
         anim.finished.connect(self.on_button_dropped)
-        anim.start()
+        play(self, anim)
         self.drop_animation = anim
 
     def on_button_dropped(self):
         self.button.setText("Connect")
         self.button.setEnabled(True)
-        w = self.width()
-        h = self.height()
-        btn_w = int(w * 0.3)
-        btn_h = int(h * 0.1)
-        self.button.resize(btn_w, btn_h)
+        # Resizes keep it here from now on, not back at the top
+        self.dropped = True
+        self.update_button()
         
         self.button.clicked.connect(self.on_connect_clicked)
         
@@ -371,10 +358,10 @@ class HomePage(QWidget):
         glow_anim.setDuration(2500)
         glow_anim.setStartValue(0)
         glow_anim.setEndValue(1)
-        glow_anim.start()
+        play(self, glow_anim)
         self.glow_animation = glow_anim
 
-        self.text_border_animator = TextBorderAnimator(self.button)
+        self.text_border_animator = TextBorderAnimator(self.button, "#87A19E")
         border_anim = QPropertyAnimation(self.text_border_animator, b"color")
         border_anim.setDuration(8000)
         border_anim.setKeyValueAt(0.0, QColor("#87A19E"))
@@ -383,7 +370,7 @@ class HomePage(QWidget):
         border_anim.setKeyValueAt(0.75, QColor("#0F2021"))
         border_anim.setKeyValueAt(1.0, QColor("#87A19E"))
         border_anim.setLoopCount(-1)
-        border_anim.start()
+        play(self, border_anim)
         self.text_border_animation = border_anim
 
         self.show_dropping_panel()
@@ -417,11 +404,11 @@ class HomePage(QWidget):
         anim.setStartValue(QPoint(start_x, -panel_h))
         anim.setEndValue(QPoint(start_x, start_y))
         anim.finished.connect(self.start_panel_color_loop)
-        anim.start()
+        play(self, anim)
         self.panel_drop_animation = anim
 
     def start_panel_color_loop(self):
-        self.panel_color_animator = PanelColorAnimator(self.panel)
+        self.panel_color_animator = PanelColorAnimator(self.panel, "#AFDDCE")
         anim = QPropertyAnimation(self.panel_color_animator, b"color")
         anim.setDuration(7000)
         anim.setKeyValueAt(0.0, QColor("#87A19E"))
@@ -429,22 +416,57 @@ class HomePage(QWidget):
         anim.setKeyValueAt(0.5, QColor("#70C6C5"))
         anim.setKeyValueAt(0.75, QColor("#4A706F"))
         anim.setKeyValueAt(1.0, QColor("#0F2021"))
-        anim.start()
+        play(self, anim)
         self.panel_color_animation = anim
 
     def on_connect_clicked(self):
-        # TODO: Add actual serial connection logic here
-        connection_success = True  # Change to actual connection check
-        
-        if connection_success:
-            self.show_connected_state()
+        """Find the dongle's port unless DONGLE_PORT names it, then connect"""
+        if self.handshake_timer.isActive() or self.port_finder.busy:
+            return
+        if PORT_OVERRIDE or REPLAY_PATH:
+            self.open_port(DEFAULT_PORT)
+        else:
+            self.port_finder.start()
+
+    def reconnect(self):
+        """Connect again without waiting for a click, e.g. from DisconnectPage"""
+        if self.failed_widget:
+            self.return_to_connect()
+        self.on_connect_clicked()
+
+    def on_port_found(self, port):
+        if port:
+            self.open_port(port)
         else:
             self.show_connection_failed()
 
+    def open_port(self, port):
+        """Open the port and send HI; the answer arrives in on_ack_received"""
+        if not self.link.open(port):
+            self.show_connection_failed()
+            return
+        self.port = port
+        self.link.send("HI")
+        self.handshake_timer.start(HANDSHAKE_TIMEOUT_MS)
+
+    def on_ack_received(self, word):
+        if word == "HEY" and self.handshake_timer.isActive():
+            self.handshake_timer.stop()
+            if not REPLAY_PATH:
+                save_cached_port(self.port)
+            if PREFER_BINARY:
+                # Falls back to text on its own if the firmware ignores BM
+                self.link.enter_binary()
+            self.show_connected_state()
+
+    def on_handshake_timeout(self):
+        self.link.close()
+        self.show_connection_failed()
+
     def show_connected_state(self):
         """Transition to ConnectPage (main interface)"""
         from Connect import ConnectPage
-        self.connect_page = ConnectPage()
+        self.connect_page = ConnectPage(self.link)
         self.connect_page.home_page = self  # Pass reference for back navigation
         self.connect_page.show()
         self.hide()
@@ -487,6 +509,6 @@ class HomePage(QWidget):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    window = HomePage()
+    window = HomePage(fast_start=FAST_START or "--fast" in sys.argv[1:])
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
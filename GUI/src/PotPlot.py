@@ -0,0 +1,127 @@
+# PotPlot.py
+import time
+
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QApplication
+from PyQt5.QtCore import Qt, QTimer, QLineF, QRectF
+from PyQt5.QtGui import QPainter, QColor, QPen, QFont, QGuiApplication
+
+from Telemetry import EnvelopeCache, TelemetryBuffer
+
+ADC_MAX = 4095
+PLOT_SPAN = 10.0                   # Seconds of history across the widget
+DEFAULT_REFRESH_HZ = 60.0          # When the screen does not report its rate
+CHANNEL_COLORS = ("#0F2021", "#FF6B6B")
+
+
+def refresh_interval_ms(widget=None):
+    """One display frame in milliseconds for the screen showing widget"""
+    screen = (widget.screen() if widget is not None else None) or QGuiApplication.primaryScreen()
+    rate = screen.refreshRate() if screen else 0
+    return max(1, int(1000 / (rate if rate > 1 else DEFAULT_REFRESH_HZ)))
+
+# --------------------- Pot Plot ---------------------
+class PotPlot(QWidget):
+    """Scrolling plot of both potentiometers.
+
+    Samples only land in the TelemetryBuffer; a frame timer repaints at
+    most once per display refresh, and only while the trace is moving.
+    Each repaint folds the new samples into an EnvelopeCache and draws
+    one min/max column per pixel, so its cost follows the widget width
+    however many samples are in view.
+    """
+    def __init__(self, telemetry=None, span=PLOT_SPAN, parent=None):
+        super().__init__(parent)
+        self.telemetry = telemetry if telemetry is not None else TelemetryBuffer()
+        self.span = span
+        self.envelopes = EnvelopeCache(self.telemetry, len(CHANNEL_COLORS), 1, span)
+        self.drawn_head = -1           # telemetry.head at the last repaint
+        self.frames = 0                # Repaints so far, for profiling
+
+        self.setMinimumHeight(160)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.label_font = QFont()
+        self.label_font.setPointSize(10)
+        self.pens = [QPen(QColor(color), 1) for color in CHANNEL_COLORS]
+
+        self.frame_timer = QTimer(self)
+        self.frame_timer.timeout.connect(self.on_frame)
+
+    def showEvent(self, event):
+        self.frame_timer.start(refresh_interval_ms(self))
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.frame_timer.stop()
+        super().hideEvent(event)
+
+    def on_frame(self):
+        """Repaint if samples arrived or the newest one is still scrolling past"""
+        telemetry = self.telemetry
+        if telemetry.head != self.drawn_head:
+            self.update()
+        elif len(telemetry) and telemetry.view(1)["t"][0] > time.monotonic() - self.span:
+            self.update()
+
+    def resizeEvent(self, event):
+        self.envelopes.reset(int(self.plot_rect().width()), self.span)
+        super().resizeEvent(event)
+
+    def plot_rect(self):
+        return QRectF(self.rect()).adjusted(8, 24, -8, -8)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#FAFAF0"))
+        area = self.plot_rect()
+        painter.setPen(QPen(QColor("#87A19E"), 1))
+        painter.drawRect(area)
+
+        envelopes = self.envelopes
+        envelopes.update()
+        now = time.monotonic()
+        scale = (area.height() - 1) / ADC_MAX
+        xs = area.left() + np.arange(envelopes.width)
+        for channel, pen in enumerate(self.pens):
+            mins, maxs = envelopes.columns(channel, now)
+            shown = np.flatnonzero(~np.isnan(mins))
+            if not len(shown):
+                continue
+            tops = area.bottom() - maxs[shown] * scale
+            bottoms = area.bottom() - mins[shown] * scale + 1
+            painter.setPen(pen)
+            painter.drawLines([QLineF(x, top, x, bottom) for x, top, bottom
+                               in zip(xs[shown].tolist(), tops.tolist(), bottoms.tolist())])
+
+        painter.setFont(self.label_font)
+        latest = self.telemetry.latest
+        for channel, pen in enumerate(self.pens):
+            value = latest.get(channel)
+            painter.setPen(pen)
+            painter.drawText(QRectF(area.left() + channel * 110, 0, 110, 22), Qt.AlignVCenter,
+                             f"POT{channel}  {value if value is not None else '----'}")
+        painter.end()
+
+        self.drawn_head = self.telemetry.head
+        self.frames += 1
+
+# Standalone run: random walk on both channels
+if __name__ == "__main__":
+    import sys
+    import random
+    app = QApplication(sys.argv)
+    plot = PotPlot()
+    plot.resize(800, 240)
+    values = [2048, 2048]
+
+    def feed():
+        for _ in range(50):
+            channel = random.randrange(2)
+            values[channel] = max(0, min(ADC_MAX, values[channel] + random.randint(-300, 300)))
+            plot.telemetry.append(channel, values[channel])
+
+    source = QTimer()
+    source.timeout.connect(feed)
+    source.start(1)
+    plot.show()
+    sys.exit(app.exec_())
@@ -0,0 +1,1106 @@
+# Protocol.py
+import math
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import Future
+
+import serial
+
+from Recorder import DIRECTION_RX, DIRECTION_TX
+
+# ------------------------- Link Settings -------------------------
+BAUD_RATE = 115200                 # Must match UART1_Init() in main.c
+READ_TIMEOUT = 0.05                # Reader thread wakes at least this often
+DEFAULT_PORT = os.environ.get("DONGLE_PORT", "/dev/ttyUSB0")
+MAX_LINE = 64                      # Longest line the firmware ever sends
+COMMAND_WINDOW = 4                 # Commands allowed on the wire awaiting an ack
+COMMAND_TIMEOUT = 0.5              # Seconds from transmit to ack before giving up
+PREFER_BINARY = os.environ.get("DONGLE_BINARY", "1") != "0"
+HEARTBEAT_MIN = 0.25               # Shortest UP interval, after a missed reply
+HEARTBEAT_MAX = 5.0                # Longest UP interval, on a busy healthy link
+HEARTBEAT_START = 1.0
+HEARTBEAT_LATE_MIN = 0.05          # Replies sooner than this are never late
+RECONNECT_BASE = 0.05              # First retry delay after the link drops, seconds
+RECONNECT_MAX = 2.0                # Longest delay between retries
+RECONNECT_GIVE_UP = 30.0           # Seconds of retrying before reporting the link lost
+
+# Command -> acknowledgement sent back by handle() in main.c
+ACKS = {
+    "HI": "HEY",
+    "UP": "YES",
+    "WR": "DID",
+    "LI": "LIT",
+    "ES": "SHO",
+    "WP": "PUT",                   # Partial LCD write: "WP row column text"
+    "BM": "BIN",                   # Switch to binary framed mode (frame.h)
+    "PC": "SET",                   # Pot report settings: "PC channel deadband interval_ms"
+    "SR": "RUN",                   # Stream pot samples: "SR pairs_per_second", 0 = stop (Stream.py)
+}
+ACK_WORDS = frozenset(ACKS.values())
+
+# Commands that change how the firmware parses or answers what follows:
+# nothing else may be on the wire behind them until they are acknowledged
+BARRIER_COMMANDS = frozenset(("BM", "SR"))
+
+# Commands that overwrite one piece of device state wholesale. Only the
+# newest queued value per target is worth sending (last write wins).
+COALESCE_TARGETS = {
+    "LI": "led",                   # GPIOB->ODR
+    "WR": "lcd",                   # Both LCD lines
+}
+# Commands that build on or rewrite the queued state of a target, so a
+# later write to that target must queue behind them instead of replacing
+# an earlier one
+COALESCE_BREAKERS = {
+    "WP": "lcd",
+    "HI": "lcd",                   # Shows "Controller" / "Connected."
+    "ES": "lcd",                   # Shows "Controller" / "Disconnected"
+}
+LCD_COMMANDS = frozenset(("WR", "WP", "HI", "ES"))
+
+LCD_ROWS = 2
+LCD_COLUMNS = 16
+# Unchanged characters between two changed runs are resent rather than
+# starting a new WP command, whose header costs about this much
+SPAN_MERGE_GAP = 8
+
+POT_CHANNELS = 2
+POT_DEADBAND = 205                 # Firmware default, restored by every HI
+POT_DEADBAND_MAX = 4095
+POT_INTERVAL_MAX = 60000           # Longest report interval PC accepts, in ms
+
+# ------------------------- Line Parsing -------------------------
+# Event records are plain (kind, a, b) tuples: cheap to build and unpack
+EVENT_ACK = 0                      # (EVENT_ACK, word, 0)
+EVENT_POT = 1                      # (EVENT_POT, channel, value)
+EVENT_BTN = 2                      # (EVENT_BTN, index, 0)
+EVENT_LINE = 3                     # (EVENT_LINE, text, 0) for anything unrecognised
+
+
+class LineParser:
+    """Incremental parser for the firmware's \\r\\n terminated text stream.
+
+    Received bytes collect in one reusable bytearray; each feed() cuts off
+    the complete lines in a single C-level split and looks every raw line
+    up in a table of interned event tuples. The firmware only ever sends a
+    few thousand distinct lines (acks, BTN0-3, POTn 0-4095), so after
+    warm-up nearly every line costs one dict lookup and no allocation for
+    its event. A line cut between two reads stays in the buffer.
+    """
+    def __init__(self, stop_words=("BIN", "RUN")):
+        self.buffer = bytearray()
+        self.table = {}
+        for word in ACK_WORDS:
+            self.table[word.encode("ascii") + b"\r"] = (EVENT_ACK, word, 0)
+        for index in range(10):
+            self.table[b"BTN%d\r" % index] = (EVENT_BTN, index, 0)
+        # Acks after which the rest of the stream is not text any more
+        self.stop_events = {self.table[word.encode("ascii") + b"\r"] for word in stop_words}
+        self.stop_markers = [word.encode("ascii") + b"\r" for word in stop_words]
+        self.leftover = b""
+
+    def feed(self, data):
+        """Parse data and return the list of event tuples it completes.
+
+        Parsing stops right after a stop word (BIN, RUN); the bytes behind
+        it are kept for drain().
+        """
+        buf = self.buffer
+        buf += data
+        last = buf.rfind(b"\n") if b"\n" in data else -1
+        if last < 0:
+            if len(buf) > MAX_LINE:
+                # Garbage without a terminator (wrong baud rate, noise) is dropped
+                buf.clear()
+            return []
+        region = bytes(buf[:last])
+        del buf[:last + 1]
+        for marker in self.stop_markers:
+            if marker in region:
+                return self._feed_until_stop(region)
+        get = self.table.get
+        slow = self._slow_line
+        events = [get(line) or slow(line) for line in region.split(b"\n")]
+        if None in events:
+            events = [event for event in events if event is not None]
+        return events
+
+    def _feed_until_stop(self, region):
+        get = self.table.get
+        events = []
+        lines = region.split(b"\n")
+        for index, line in enumerate(lines):
+            event = get(line) or self._slow_line(line)
+            if event is None:
+                continue
+            events.append(event)
+            if event in self.stop_events:
+                rest = b"\n".join(lines[index + 1:])
+                self.leftover = (rest + b"\n" if index + 1 < len(lines) else b"") + bytes(self.buffer)
+                self.buffer.clear()
+                break
+        return events
+
+    def _slow_line(self, line):
+        """First sighting of a line: parse it by prefix and intern POT events."""
+        text = line.rstrip(b"\r")
+        if not text:
+            return None
+        if text[:3] == b"POT" and len(text) > 5 and 48 <= text[3] <= 57 and text[4] == 32:
+            try:
+                event = (EVENT_POT, text[3] - 48, int(text[5:]))
+            except ValueError:
+                pass
+            else:
+                if line[-1:] == b"\r" and len(self.table) < 16384:
+                    self.table[line] = event
+                return event
+        cached = self.table.get(text + b"\r")
+        if cached is not None:
+            return cached          # Same line, just missing its \r
+        return (EVENT_LINE, text.decode("ascii", "replace"), 0)
+
+    def drain(self):
+        """Hand back the bytes that followed a stop word."""
+        rest, self.leftover = self.leftover, b""
+        return rest
+
+    def reset(self):
+        self.buffer.clear()
+        self.leftover = b""
+
+# ------------------------- Binary Framing -------------------------
+# Mirrors Controller/Core/Inc/frame.h: COBS([type][payload][crc16 LE]) + 0x00
+FRAME_ACK = 0x80
+FRAME_POT0 = 0x10
+FRAME_BTN0 = 0x20
+FRAME_MAX_ENCODED = 52
+FRAME_TYPES = {"HI": 0x01, "UP": 0x02, "WR": 0x03, "LI": 0x04, "ES": 0x05, "WP": 0x06, "PC": 0x07,
+               "SR": 0x08}
+ACK_FRAMES = {FRAME_TYPES[cmd] | FRAME_ACK: ACKS[cmd] for cmd in FRAME_TYPES}
+
+
+def crc16_ccitt(data, crc=0xFFFF):
+    """CRC-16/CCITT-FALSE, same as crc16_ccitt() in frame.c"""
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+            crc &= 0xFFFF
+    return crc
+
+
+def cobs_encode(data):
+    out = bytearray()
+    for block in bytes(data).split(b"\0"):
+        # Runs longer than 254 bytes need extra 0xFF code blocks
+        while len(block) >= 254:
+            out.append(0xFF)
+            out += block[:254]
+            block = block[254:]
+        out.append(len(block) + 1)
+        out += block
+    return bytes(out)
+
+
+def cobs_decode(data):
+    out = bytearray()
+    index = 0
+    while index < len(data):
+        code = data[index]
+        end = index + code
+        if code == 0 or end > len(data) or 0 in data[index + 1:end]:
+            raise ValueError("Malformed COBS frame")
+        out += data[index + 1:end]
+        index = end
+        if code != 0xFF and index < len(data):
+            out.append(0)
+    return bytes(out)
+
+
+def encode_frame(frame_type, payload=b""):
+    packet = bytes((frame_type,)) + payload
+    return cobs_encode(packet + crc16_ccitt(packet).to_bytes(2, "little")) + b"\0"
+
+
+def decode_frame(encoded):
+    """Return (type, payload) or raise ValueError on a COBS or CRC error."""
+    packet = cobs_decode(encoded)
+    if len(packet) < 3:
+        raise ValueError("Short frame")
+    if crc16_ccitt(packet[:-2]) != int.from_bytes(packet[-2:], "little"):
+        raise ValueError("CRC mismatch")
+    return packet[0], packet[1:-2]
+
+
+def encode_command(command):
+    """Binary equivalent of a text command such as "LI 5" or "WR a;b"."""
+    name, _, argument = command.partition(" ")
+    frame_type = FRAME_TYPES[name]
+    if name == "LI":
+        payload = bytes((int(argument) & 0xFF,))
+    elif name == "WR":
+        payload = argument.encode("ascii")
+    elif name == "WP":
+        row, column, text = argument.split(" ", 2)
+        payload = bytes((int(row), int(column))) + text.encode("ascii")
+    elif name == "PC":
+        channel, deadband, interval = (int(field) for field in argument.split())
+        payload = bytes((channel,)) + deadband.to_bytes(2, "little") + interval.to_bytes(2, "little")
+    elif name == "SR":
+        payload = int(argument).to_bytes(2, "little")
+    else:
+        payload = b""
+    return encode_frame(frame_type, payload)
+
+
+class FrameDecoder:
+    """Collects 0x00 delimited frames and yields (type, payload) packets.
+
+    Decoding stops after an ack that ends framed mode (SHO) or starts a
+    stream (RUN); the bytes behind it are kept for drain().
+    """
+    def __init__(self, stop_types=(FRAME_TYPES["ES"] | FRAME_ACK, FRAME_TYPES["SR"] | FRAME_ACK)):
+        self.buffer = bytearray()
+        self.stop_types = frozenset(stop_types)
+        self.leftover = b""
+        self.errors = 0
+
+    def feed(self, data):
+        self.buffer += data
+        packets = []
+        while True:
+            end = self.buffer.find(b"\0")
+            if end < 0:
+                break
+            encoded = bytes(self.buffer[:end])
+            del self.buffer[:end + 1]
+            if not encoded:
+                continue
+            try:
+                packet = decode_frame(encoded)
+            except ValueError:
+                self.errors += 1
+                continue
+            packets.append(packet)
+            if packet[0] in self.stop_types:
+                self.leftover = bytes(self.buffer)
+                self.buffer.clear()
+                break
+        if len(self.buffer) > FRAME_MAX_ENCODED:
+            self.buffer.clear()
+            self.errors += 1
+        return packets
+
+    def drain(self):
+        rest, self.leftover = self.leftover, b""
+        return rest
+
+    def reset(self):
+        self.buffer.clear()
+        self.leftover = b""
+
+# ------------------------- Command Scheduling -------------------------
+class CommandTimeout(Exception):
+    """The firmware did not acknowledge a command in time."""
+
+
+class CommandLost(Exception):
+    """A later ack arrived first, so this command never reached handle()."""
+
+
+class PendingCommand:
+    __slots__ = ("command", "ack", "future", "timeout", "sent", "deadline")
+
+    def __init__(self, command, ack, timeout):
+        self.command = command
+        self.ack = ack
+        self.future = Future()
+        self.timeout = timeout
+        self.sent = None
+        self.deadline = None
+
+
+class CommandScheduler:
+    """Keeps up to `window` commands in flight and matches acks in order.
+
+    handle() in main.c answers every command with a fixed word and
+    processes them strictly in arrival order, so the oldest in-flight
+    command expecting that word is the one being acknowledged. Anything
+    older that expected a different word was dropped by the firmware.
+
+    While commands wait for a free slot, a new LI or WR replaces the one
+    already queued for the same target instead of queueing behind it.
+    Both callers then share the surviving command's Future.
+
+    With a LinkStats every ack adds its round-trip time, and every timeout
+    or lost command is counted.
+    """
+    def __init__(self, write, window=COMMAND_WINDOW, timeout=COMMAND_TIMEOUT, stats=None):
+        self.write = write
+        self.window = window
+        self.timeout = timeout
+        self.stats = stats
+        self.in_flight = deque()
+        self.waiting = deque()
+        self.queued_targets = {}   # target -> PendingCommand still in waiting
+        self.coalesced = 0         # Commands dropped because a newer one replaced them
+        self.lock = threading.Lock()
+
+    def submit(self, command, timeout=None):
+        """Queue a command; the returned Future resolves to its ack word."""
+        name = command[:2]
+        ack = ACKS.get(name)
+        if ack is None:
+            raise ValueError(f"Unknown command: {command!r}")
+        target = COALESCE_TARGETS.get(name)
+        with self.lock:
+            if name in BARRIER_COMMANDS:
+                # A write queued behind a barrier must not move ahead of it
+                self.queued_targets.clear()
+            elif name in COALESCE_BREAKERS:
+                self.queued_targets.pop(COALESCE_BREAKERS[name], None)
+            queued = self.queued_targets.get(target) if target else None
+            if queued is not None:
+                queued.command = command
+                queued.timeout = timeout or self.timeout
+                self.coalesced += 1
+                return queued.future
+            pending = PendingCommand(command, ack, timeout or self.timeout)
+            self.waiting.append(pending)
+            if target:
+                self.queued_targets[target] = pending
+            self._fill_window()
+        return pending.future
+
+    def ack_received(self, word):
+        """Resolve the command answered by `word`. False if nothing expected it."""
+        with self.lock:
+            for index, pending in enumerate(self.in_flight):
+                if pending.ack == word:
+                    break
+            else:
+                return False
+            lost = [self.in_flight.popleft() for _ in range(index)]
+            answered = self.in_flight.popleft()
+            self._fill_window()
+        if self.stats:
+            self.stats.record(time.monotonic() - answered.sent)
+            self.stats.lost += len(lost)
+        # Futures are settled outside the lock so done-callbacks may submit again
+        for pending in lost:
+            pending.future.set_exception(CommandLost(pending.command))
+        answered.future.set_result(word)
+        return True
+
+    def expire(self, now):
+        """Fail every in-flight command whose deadline has passed."""
+        with self.lock:
+            if not self.in_flight or self.in_flight[0].deadline > now:
+                return
+            expired = [p for p in self.in_flight if p.deadline <= now]
+            self.in_flight = deque(p for p in self.in_flight if p.deadline > now)
+            self._fill_window()
+        if self.stats:
+            self.stats.timeouts += len(expired)
+        for pending in expired:
+            pending.future.set_exception(CommandTimeout(pending.command))
+
+    def cancel_all(self, reason):
+        with self.lock:
+            cancelled = list(self.in_flight) + list(self.waiting)
+            self.in_flight.clear()
+            self.waiting.clear()
+            self.queued_targets.clear()
+        for pending in cancelled:
+            pending.future.set_exception(ConnectionError(reason))
+
+    @property
+    def pending_count(self):
+        return len(self.in_flight) + len(self.waiting)
+
+    def has_pending(self, names):
+        """True if a command named in names is in flight or waiting"""
+        with self.lock:
+            return any(p.command[:2] in names for p in self.in_flight + self.waiting)
+
+    def _fill_window(self):
+        # Caller holds the lock, so commands hit the wire in submit order
+        while self.waiting and len(self.in_flight) < self.window:
+            if self.in_flight and self.in_flight[-1].command[:2] in BARRIER_COMMANDS:
+                break
+            pending = self.waiting.popleft()
+            target = COALESCE_TARGETS.get(pending.command[:2])
+            if target and self.queued_targets.get(target) is pending:
+                del self.queued_targets[target]
+            pending.sent = time.monotonic()
+            pending.deadline = pending.sent + pending.timeout
+            self.in_flight.append(pending)
+            self.write(pending.command)
+
+# ------------------------- Link Quality -------------------------
+# Upper edges of the RTT histogram bins: half-octave steps from 0.25 ms to ~2.9 s
+RTT_BIN_EDGES = tuple(0.00025 * 2 ** (i / 2) for i in range(28))
+
+
+class LinkStats:
+    """Round-trip times of acknowledged commands, in a fixed histogram.
+
+    Bin i counts RTTs up to RTT_BIN_EDGES[i] and one more bin takes
+    anything slower, so memory and cost per sample stay constant however
+    long the link runs. Jitter is the smoothed difference between
+    consecutive RTTs (RFC 3550), srtt the smoothed RTT itself.
+    """
+    def __init__(self):
+        self.bins = [0] * (len(RTT_BIN_EDGES) + 1)
+        self.count = 0
+        self.srtt = None
+        self.jitter = 0.0
+        self.last_rtt = None
+        self.timeouts = 0              # Commands never acknowledged
+        self.lost = 0                  # Commands skipped by a later ack
+
+    def record(self, rtt):
+        self.bins[bisect_left(RTT_BIN_EDGES, rtt)] += 1
+        self.count += 1
+        if self.srtt is None:
+            self.srtt = rtt
+        else:
+            self.jitter += (abs(rtt - self.last_rtt) - self.jitter) / 16
+            self.srtt += (rtt - self.srtt) / 8
+        self.last_rtt = rtt
+
+    def percentile(self, fraction):
+        """Upper bin edge holding the given fraction of RTTs, None before any"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for index, count in enumerate(self.bins):
+            seen += count
+            if seen >= rank:
+                break
+        # The overflow bin has no upper edge
+        return RTT_BIN_EDGES[min(index, len(RTT_BIN_EDGES) - 1)]
+
+    def late_after(self):
+        """RTT beyond which a reply counts as late: srtt + 4 jitter, as TCP's RTO"""
+        if self.srtt is None:
+            return COMMAND_TIMEOUT
+        return max(HEARTBEAT_LATE_MIN, self.srtt + 4 * self.jitter)
+
+    def summary(self):
+        if not self.count:
+            return "No replies yet"
+        return (f"RTT {self.percentile(0.5) * 1000:.1f} ms (p99 {self.percentile(0.99) * 1000:.1f} ms), "
+                f"jitter {self.jitter * 1000:.1f} ms, {self.timeouts} timeouts")
+
+
+class Heartbeat:
+    """Adaptive UP keep-alive.
+
+    The link is checked every `interval` seconds. If anything arrived since
+    the last check, the link is evidently alive: nothing is sent and the
+    interval doubles. A quiet link gets an UP, unless real commands are
+    already in flight. A reply on time stretches the interval by half, a
+    late one halves it and a missing one drops it to the minimum.
+    """
+    def __init__(self, minimum=HEARTBEAT_MIN, maximum=HEARTBEAT_MAX, start=HEARTBEAT_START):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.first = start
+        self.start(0.0)
+        self.sent = 0
+        self.late = 0
+        self.missed = 0
+
+    def start(self, now):
+        self.interval = self.first
+        self.due = now + self.interval
+        self.checked = now             # Traffic after this proves the link
+        self.in_flight = False
+
+    def poll(self, now, last_rx, busy):
+        """True if an UP should go out now."""
+        if now < self.due or self.in_flight:
+            return False
+        quiet = last_rx <= self.checked
+        self.checked = now
+        if quiet and not busy:
+            self.in_flight = True
+            self.sent += 1
+            return True
+        if not quiet:
+            self.interval = min(self.maximum, self.interval * 2)
+        self.due = now + self.interval
+        return False
+
+    def answered(self, now, rtt, late_after):
+        self.in_flight = False
+        if rtt > late_after:
+            self.late += 1
+            self.interval = max(self.minimum, self.interval / 2)
+        else:
+            self.interval = min(self.maximum, self.interval * 1.5)
+        # The reply itself is not traffic that proves anything
+        self.checked = now
+        self.due = now + self.interval
+
+    def missed_reply(self, now):
+        self.in_flight = False
+        self.missed += 1
+        self.interval = self.minimum
+        self.checked = now
+        self.due = now + self.interval
+
+# ------------------------- LCD Shadow -------------------------
+def lcd_row(text):
+    """What one WR/WP line actually shows: rtrim() in main.c, 16 visible columns"""
+    return text.rstrip(" ")[:LCD_COLUMNS].ljust(LCD_COLUMNS)
+
+
+def led_value(command):
+    """The LED byte an LI command sets, None if parseLIValue() in main.c rejects it"""
+    try:
+        value = int(command[3:])
+    except ValueError:
+        return None
+    return value if 0 <= value <= 0xFF else None
+
+
+class LcdShadow:
+    """Host copy of the 2x16 display so only changed characters are sent."""
+    def __init__(self):
+        self.rows = None           # Unknown until a full write is made
+
+    @property
+    def known(self):
+        return self.rows is not None
+
+    def invalidate(self):
+        self.rows = None
+
+    def set_lines(self, line1, line2):
+        self.rows = [lcd_row(line1), lcd_row(line2)]
+
+    def shows(self, line1, line2):
+        """True if WR line1;line2 would leave the display as it is"""
+        return self.rows == [lcd_row(line1), lcd_row(line2)]
+
+    def holds(self, row, column, text):
+        """True if WP row column text would leave the display as it is"""
+        if self.rows is None:
+            return False
+        text = text[:LCD_COLUMNS - column]
+        return self.rows[row][column:column + len(text)] == text
+
+    def put(self, row, column, text):
+        if self.rows is not None:
+            line = self.rows[row]
+            text = text[:LCD_COLUMNS - column]
+            self.rows[row] = line[:column] + text + line[column + len(text):]
+
+    def diff(self, line1, line2):
+        """Return (row, column, text) spans turning the shadow into the new lines."""
+        spans = []
+        for row, new in enumerate((lcd_row(line1), lcd_row(line2))):
+            old = self.rows[row]
+            start = end = None
+            for column in range(LCD_COLUMNS):
+                if old[column] == new[column]:
+                    continue
+                if start is not None and column - end > SPAN_MERGE_GAP:
+                    spans.append((row, start, new[start:end]))
+                    start = None
+                if start is None:
+                    start = column
+                end = column + 1
+            if start is not None:
+                spans.append((row, start, new[start:end]))
+            self.rows[row] = new
+        return spans
+
+# ------------------------- Device Protocol -------------------------
+class DeviceListener:
+    """Receives decoded device events. Override the ones you need."""
+    def ack_received(self, word):
+        pass
+
+    def pot_changed(self, channel, value):
+        pass
+
+    def button_pressed(self, index):
+        pass
+
+    def line_received(self, line):
+        pass
+
+    def samples_received(self, samples):
+        # (n, 2) uint16 array of streamed (pot0, pot1) pairs
+        pass
+
+    def connection_lost(self, reason):
+        pass
+
+
+class DeviceProtocol:
+    """Transport independent half of the link.
+
+    The transport pushes raw bytes in through data_received() and the
+    protocol turns them into listener calls. Outgoing commands go back
+    through the transport that was handed over in connection_made().
+    """
+    def __init__(self, listener=None, window=COMMAND_WINDOW, heartbeat=False):
+        self.listener = listener or DeviceListener()
+        self.parser = LineParser()
+        self.frames = FrameDecoder()
+        self.stream = None             # StreamDecoder, made by the first SR (imports NumPy)
+        self.stream_rate = 0           # Rate of the last SR written
+        self.binary = False
+        self.window = window
+        self.transport = None
+        self.scheduler = None
+        self.lcd = LcdShadow()
+        self.leds = None               # Host copy of the LED byte, None if unknown
+        self.suppressed = 0            # Commands not sent because they changed nothing
+        self.stats = LinkStats()
+        self.heartbeat = Heartbeat() if heartbeat else None
+        self.last_rx = 0.0             # time.monotonic() of the last bytes received
+        # What the application last asked the device to show, kept across
+        # reconnects so resync() can put it back
+        self.wanted_lines = None
+        self.wanted_leds = None
+        self.wanted_pots = {}          # channel -> PC command
+        # Guards the shadows and wanted state: commands change them on the
+        # caller's thread, acks and failed writes on the reader thread
+        self.state_lock = threading.RLock()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.parser.reset()
+        self.frames.reset()
+        if self.stream:
+            self.stream.reset()
+        self.binary = False
+        with self.state_lock:
+            self.lcd.invalidate()
+            self.leds = None
+        self.stats = LinkStats()
+        self.scheduler = CommandScheduler(self.write_command, self.window, stats=self.stats)
+        if self.heartbeat:
+            self.heartbeat.start(time.monotonic())
+
+    def connection_lost(self, reason):
+        self.transport = None
+        if self.scheduler:
+            self.scheduler.cancel_all(reason)
+        self.listener.connection_lost(reason)
+
+    def data_received(self, data):
+        self.last_rx = time.monotonic()
+        # Each decoder stops at a mode switch (BIN, RUN, SHO, end of stream)
+        # and hands the rest back, to go round again in the new mode
+        while data:
+            if self.streaming:
+                samples = self.stream.feed(data)
+                if len(samples):
+                    self.listener.samples_received(samples)
+                data = self.stream.drain()
+            elif self.binary:
+                for frame_type, payload in self.frames.feed(data):
+                    self.packet_received(frame_type, payload)
+                data = self.frames.drain()
+            else:
+                self.events_received(self.parser.feed(data))
+                data = self.parser.drain()
+
+    def ack(self, word):
+        if word == "BIN":
+            self.binary = True
+            # Flush the '\n' left over from "BM\r\n" out of the firmware's
+            # frame buffer so it cannot corrupt the first real frame
+            transport = self.transport
+            if transport is not None and transport.is_open:
+                transport.write(b"\0")
+        elif word == "RUN" and self.stream_rate and self.stream:
+            self.stream.begin(self.stream_rate)
+        if self.scheduler:
+            self.scheduler.ack_received(word)
+            if word == "HEY":
+                self._hi_answered()
+        self.listener.ack_received(word)
+
+    def _hi_answered(self):
+        # HI has just rewritten the display. Anything the shadow was told
+        # since is still on its way, so then only a full WR is safe.
+        with self.state_lock:
+            if self.scheduler.has_pending(LCD_COMMANDS):
+                self.lcd.invalidate()
+            else:
+                self.lcd.set_lines("Controller", "Connected.")
+
+    def packet_received(self, frame_type, payload):
+        listener = self.listener
+        if frame_type in ACK_FRAMES:
+            word = ACK_FRAMES[frame_type]
+            if word == "SHO":
+                # The firmware drops back to text after ES
+                self.binary = False
+            self.ack(word)
+        elif frame_type in (FRAME_POT0, FRAME_POT0 + 1) and len(payload) == 2:
+            listener.pot_changed(frame_type - FRAME_POT0, int.from_bytes(payload, "little"))
+        elif FRAME_BTN0 <= frame_type < FRAME_BTN0 + 4:
+            listener.button_pressed(frame_type - FRAME_BTN0)
+
+    def events_received(self, events):
+        listener = self.listener
+        for kind, a, b in events:
+            if kind == EVENT_POT:
+                listener.pot_changed(a, b)
+            elif kind == EVENT_ACK:
+                self.ack(a)
+            elif kind == EVENT_BTN:
+                listener.button_pressed(a)
+            else:
+                listener.line_received(a)
+
+    def tick(self, now):
+        """Called periodically by the transport, even when nothing arrives."""
+        if self.scheduler:
+            self.scheduler.expire(now)
+            if self.heartbeat:
+                self._heartbeat(now)
+
+    def _heartbeat(self, now):
+        # UP would end a stream, and a stream proves the link anyway
+        if self.transport is None or self.streaming:
+            return
+        if self.heartbeat.poll(now, self.last_rx, self.scheduler.pending_count > 0):
+            self.scheduler.submit("UP").add_done_callback(self._heartbeat_done)
+
+    def _heartbeat_done(self, future):
+        now = time.monotonic()
+        if future.exception() is None:
+            self.heartbeat.answered(now, self.stats.last_rtt, self.stats.late_after())
+        else:
+            self.heartbeat.missed_reply(now)
+
+    def write_command(self, command):
+        """Encode a command for the current mode and put it on the wire."""
+        if command.startswith("HI"):
+            # Always sent as text: it also pulls the firmware out of binary mode
+            self.binary = False
+        elif command.startswith("SR"):
+            self.stream_rate = int(command[3:] or 0)
+            if self.stream is None:
+                # Only now: tools that never stream skip importing NumPy
+                from Stream import StreamDecoder
+                self.stream = StreamDecoder()
+        if self.binary:
+            self.transport.write(encode_command(command))
+        else:
+            self.transport.write(command.encode("ascii") + b"\r\n")
+
+    def redundant(self, command):
+        """True if the shadows say command would not change the device (hold state_lock)"""
+        name = command[:2]
+        if name == "LI":
+            value = led_value(command)
+            return value is not None and value == self.leds
+        if name == "WR":
+            line1, sep, line2 = command[3:].partition(";")
+            return bool(sep) and self.lcd.shows(line1, line2)
+        if name == "WP":
+            row, column, text = command[3:].split(" ", 2)
+            return self.lcd.holds(int(row), int(column), text)
+        return False
+
+    def track(self, command):
+        """Update the shadows and wanted state for a command sent or skipped (hold state_lock)."""
+        name = command[:2]
+        if name == "HI":
+            # HI rewrites the display but leaves the LEDs as they were,
+            # which after a reset or replug is not what we last set
+            self.lcd.set_lines("Controller", "Connected.")
+            self.leds = None
+        elif name == "ES":
+            self.lcd.set_lines("Controller", "Disconnected")
+        elif name == "WR":
+            line1, sep, line2 = command[3:].partition(";")
+            if sep:
+                self.lcd.set_lines(line1, line2)
+                self.wanted_lines = (line1, line2)
+        elif name == "WP":
+            row, column, text = command[3:].split(" ", 2)
+            self.lcd.put(int(row), int(column), text)
+            if self.lcd.known:
+                self.wanted_lines = tuple(self.lcd.rows)
+        elif name == "LI":
+            value = led_value(command)
+            if value is not None:
+                self.leds = self.wanted_leds = value
+        elif name == "PC":
+            self.wanted_pots[int(command.split()[1])] = command
+
+    def send(self, command):
+        """Write a command such as "LI 5" now, bypassing the window.
+
+        Skipped if it would not change the device (see redundant()).
+        """
+        if self.transport is None:
+            raise ConnectionError("Device not connected")
+        with self.state_lock:
+            redundant = self.redundant(command)
+            # Even a skipped command is what resync() should restore
+            self.track(command)
+            if redundant:
+                self.suppressed += 1
+                return
+            self.write_command(command)
+
+    @property
+    def coalesced_count(self):
+        """How many LI/WR commands were superseded before reaching the wire."""
+        return self.scheduler.coalesced if self.scheduler else 0
+
+    def enter_binary(self, timeout=None):
+        """Ask for binary framed mode after the HI/HEY handshake.
+
+        Firmware without BM support ignores it, the returned Future fails
+        with CommandTimeout and the link simply stays in text mode.
+        """
+        return self.request("BM", timeout)
+
+    def configure_pot(self, channel, deadband=POT_DEADBAND, max_rate=None, timeout=None):
+        """Set how far a pot must move, and how often at most, to be reported.
+
+        max_rate is in reports per second, None for no limit. The firmware
+        goes back to its defaults on every HI, so call this after connecting.
+        """
+        if not 0 <= channel < POT_CHANNELS:
+            raise ValueError(f"No pot channel {channel}")
+        if not 0 <= deadband <= POT_DEADBAND_MAX:
+            raise ValueError(f"Deadband {deadband} outside 0-{POT_DEADBAND_MAX}")
+        if max_rate is None:
+            interval = 0
+        elif max_rate > 0:
+            interval = min(POT_INTERVAL_MAX, math.ceil(1000 / max_rate))
+        else:
+            raise ValueError("max_rate must be positive")
+        return self.request(f"PC {channel} {deadband} {interval}", timeout)
+
+    def start_stream(self, rate, timeout=None):
+        """Stream both pots at rate pairs per second to samples_received().
+
+        While streaming the firmware sends nothing else: no POT or BTN
+        events and no acks. Any command ends the stream, so heartbeats
+        and LCD writes have to wait for stop_stream(). self.stream keeps
+        the achieved rate and the records lost.
+        """
+        from Stream import STREAM_RATE_MAX
+        if not 0 < rate <= STREAM_RATE_MAX:
+            raise ValueError(f"Stream rate must be 1-{STREAM_RATE_MAX} pairs per second")
+        return self.request(f"SR {rate}", timeout)
+
+    def stop_stream(self, timeout=None):
+        return self.request("SR 0", timeout)
+
+    @property
+    def streaming(self):
+        return self.stream is not None and self.stream.active
+
+    def request(self, command, timeout=None):
+        """Pipeline a command; returns a Future that resolves to its ack.
+
+        LI/WR/WP that would not change the device never reach the wire;
+        their Future is already resolved with the usual ack.
+        """
+        if self.transport is None:
+            raise ConnectionError("Device not connected")
+        # Held until submitted, so the shadows change in wire order
+        with self.state_lock:
+            redundant = self.redundant(command)
+            # Even a skipped command is what resync() should restore
+            self.track(command)
+            if redundant:
+                self.suppressed += 1
+                future = Future()
+                future.set_result(ACKS[command[:2]])
+                return future
+            future = self.scheduler.submit(command, timeout)
+        if command[:2] in ("WR", "WP"):
+            future.add_done_callback(self._check_lcd_write)
+        elif command[:2] == "LI":
+            future.add_done_callback(self._check_led_write)
+        return future
+
+    def _check_lcd_write(self, future):
+        # A lost LCD write leaves the display in an unknown state
+        if future.exception() is not None:
+            with self.state_lock:
+                self.lcd.invalidate()
+
+    def _check_led_write(self, future):
+        if future.exception() is not None:
+            with self.state_lock:
+                self.leds = None
+
+    def write_lcd(self, line1, line2, timeout=None):
+        """Show two lines, sending only the characters that differ (WP).
+
+        Falls back to a full WR while the display contents are unknown.
+        Returns the Futures of the commands sent, empty if nothing changed.
+        """
+        if self.transport is None:
+            raise ConnectionError("Device not connected")
+        with self.state_lock:
+            if not self.lcd.known:
+                return [self.request(f"WR {line1};{line2}", timeout)]
+            self.wanted_lines = (line1, line2)
+            spans = self.lcd.diff(line1, line2)
+            futures = []
+            for row, column, text in spans:
+                futures.append(self.scheduler.submit(f"WP {row} {column} {text}", timeout))
+        for future in futures:
+            future.add_done_callback(self._check_lcd_write)
+        return futures
+
+    def resync(self, timeout=None):
+        """Restore the LCD, LEDs and pot settings last asked for.
+
+        Meant for right after the HI of a new connection, which resets
+        all three on the device. The commands go out as one pipelined
+        burst; returns their Futures.
+        """
+        with self.state_lock:
+            commands = list(self.wanted_pots.values())
+            if self.wanted_leds is not None:
+                commands.insert(0, f"LI {self.wanted_leds}")
+            if self.wanted_lines is not None:
+                commands.insert(0, "WR {};{}".format(*self.wanted_lines))
+            return [self.request(command, timeout) for command in commands]
+
+# ------------------------- Reconnect -------------------------
+def backoff_delays(base=RECONNECT_BASE, cap=RECONNECT_MAX, rng=random):
+    """Exponential backoff with equal jitter: each delay is drawn from
+    [d/2, d] where d doubles from base up to cap."""
+    delay = base
+    while True:
+        yield delay / 2 + rng.uniform(0, delay / 2)
+        delay = min(cap, delay * 2)
+
+
+class Reconnector:
+    """Retries connect() on a background thread until it returns True.
+
+    Waits a backoff delay before each attempt, so a flapping port is not
+    hammered, and calls done(True) on success or done(False) once
+    give_up seconds have passed. cancel() stops it at the next wait.
+    """
+    def __init__(self, connect, done, give_up=RECONNECT_GIVE_UP, delays=None):
+        self.connect = connect
+        self.done = done
+        self.give_up = give_up
+        self.delays = delays if delays is not None else backoff_delays()
+        self.cancelled = threading.Event()
+        self.attempts = 0
+        self.thread = threading.Thread(target=self._run, name="reconnect", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _run(self):
+        deadline = time.monotonic() + self.give_up
+        for delay in self.delays:
+            if self.cancelled.wait(delay):
+                return
+            self.attempts += 1
+            ok = self.connect()
+            if self.cancelled.is_set():
+                return
+            if ok:
+                self.done(True)
+                return
+            if time.monotonic() >= deadline:
+                self.done(False)
+                return
+
+# ------------------------- Serial Transport -------------------------
+class SerialTransport:
+    """Owns the UART and a reader thread that feeds a DeviceProtocol.
+
+    Only the reader thread ever blocks on the port, so the thread that
+    calls write() (normally the Qt GUI thread) never waits for input.
+    With a SessionRecorder every byte in both directions is logged.
+    """
+    def __init__(self, port, protocol, baudrate=BAUD_RATE, recorder=None):
+        self.port = port
+        self.protocol = protocol
+        self.baudrate = baudrate
+        self.recorder = recorder
+        self.serial = None
+        self.thread = None
+        self.running = False
+        self.write_lock = threading.Lock()
+
+    def open(self):
+        self.serial = serial.Serial(self.port, self.baudrate, timeout=READ_TIMEOUT)
+        if self.recorder and not self.recorder.is_open:
+            # A reconnect hands over the recorder of the lost transport
+            self.recorder.open()
+        self.running = True
+        self.protocol.connection_made(self)
+        self.thread = threading.Thread(target=self._read_loop, name=f"uart-{self.port}", daemon=True)
+        self.thread.start()
+
+    def write(self, data):
+        with self.write_lock:
+            self.serial.write(data)
+        if self.recorder:
+            self.recorder.record(DIRECTION_TX, data)
+
+    def close(self):
+        self.running = False
+        if self.protocol.transport is self:
+            self.protocol.transport = None
+            if self.protocol.scheduler:
+                # Nothing will answer or expire them now
+                self.protocol.scheduler.cancel_all("Connection closed")
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+        if self.serial:
+            self.serial.close()
+            self.serial = None
+        if self.recorder:
+            self.recorder.close()
+
+    @property
+    def is_open(self):
+        return self.running and self.serial is not None
+
+    def _read_loop(self):
+        reason = None
+        while self.running:
+            try:
+                data = self.serial.read(self.serial.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError) as e:
+                # TypeError: pyserial reading a port that was closed under it
+                reason = str(e) or "Serial port closed"
+                break
+            if data:
+                if self.recorder:
+                    self.recorder.record(DIRECTION_RX, data)
+                self.protocol.data_received(data)
+            self.protocol.tick(time.monotonic())
+        was_running = self.running
+        self.running = False
+        if was_running:
+            self.protocol.connection_lost(reason or "Reader stopped")
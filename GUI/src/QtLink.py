@@ -0,0 +1,189 @@
+# QtLink.py
+"""Qt side of the dongle link for the GUI pages.
+
+Kept apart from Protocol.py so the protocol layer, the benchmarks and the
+headless client (Client.py) never import PyQt5.
+"""
+import serial
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from Protocol import (
+    COMMAND_TIMEOUT, DEFAULT_PORT, POT_DEADBAND, PREFER_BINARY, DeviceListener, DeviceProtocol,
+    Reconnector, SerialTransport,
+)
+from Recorder import RECORD_PATH, REPLAY_PATH, ReplayTransport, SessionRecorder
+
+# ------------------------- Qt Bridge -------------------------
+class SignalListener(DeviceListener):
+    """Forwards protocol callbacks to the signals of a DeviceLink."""
+    def __init__(self, link):
+        self.link = link
+
+    def ack_received(self, word):
+        self.link.ack_received.emit(word)
+
+    def pot_changed(self, channel, value):
+        self.link.pot_changed.emit(channel, value)
+
+    def button_pressed(self, index):
+        self.link.button_pressed.emit(index)
+
+    def line_received(self, line):
+        self.link.line_received.emit(line)
+
+    def samples_received(self, samples):
+        self.link.samples_received.emit(samples)
+
+    def connection_lost(self, reason):
+        self.link.transport_lost(reason)
+
+
+class DeviceLink(QObject):
+    """Qt face of the link: device events arrive as signals.
+
+    Signals are emitted from the reader thread; Qt queues them onto the
+    thread that owns each connected page, so slots run in the GUI thread
+    and never touch the port directly.
+
+    When the port drops, the link reconnects in the background (see
+    Reconnector) and emits reconnecting, then reconnected once the
+    handshake is redone and the display, LEDs and pot settings are
+    restored. connection_lost only fires once it gives up.
+    """
+    ack_received = pyqtSignal(str)
+    pot_changed = pyqtSignal(int, int)
+    button_pressed = pyqtSignal(int)
+    line_received = pyqtSignal(str)
+    samples_received = pyqtSignal(object)
+    connection_lost = pyqtSignal(str)
+    reconnecting = pyqtSignal(str)
+    reconnected = pyqtSignal()
+
+    def __init__(self, parent=None, auto_reconnect=True):
+        super().__init__(parent)
+        # Replayed sessions already contain the original heartbeats
+        self.protocol = DeviceProtocol(SignalListener(self), heartbeat=not REPLAY_PATH)
+        self.transport = None
+        self.port = None
+        self.auto_reconnect = auto_reconnect and not REPLAY_PATH
+        self.reconnector = None
+
+    def open(self, port=DEFAULT_PORT):
+        """Open the port; returns False instead of raising if it is missing.
+
+        DONGLE_REPLAY plays a recorded session instead of opening the port
+        and DONGLE_RECORD logs the live session (see Recorder.py).
+        """
+        self.close()
+        if REPLAY_PATH:
+            transport = ReplayTransport(REPLAY_PATH, self.protocol)
+        else:
+            recorder = SessionRecorder(RECORD_PATH) if RECORD_PATH else None
+            transport = SerialTransport(port, self.protocol, recorder=recorder)
+        try:
+            transport.open()
+        except (serial.SerialException, OSError):
+            return False
+        self.transport = transport
+        self.port = port
+        return True
+
+    def close(self):
+        if self.reconnector:
+            self.reconnector.cancel()
+            self.reconnector = None
+        if self.transport:
+            transport, self.transport = self.transport, None
+            transport.close()
+
+    # --- reconnect ---
+    def transport_lost(self, reason):
+        """Reader thread: the port failed under us"""
+        if self.reconnector:
+            return                 # A reconnect attempt failed; it retries
+        if not self.auto_reconnect or self.transport is None:
+            self.connection_lost.emit(reason)
+            return
+        self.reconnecting.emit(reason)
+        self.reconnector = Reconnector(self._reopen, self._reconnect_done)
+        self.reconnector.start()
+
+    def _reopen(self, timeout=COMMAND_TIMEOUT):
+        """One reconnect attempt: open, HI/HEY, BM, then restore the device state"""
+        reconnector = self.reconnector
+        dead, self.transport = self.transport, None
+        recorder = getattr(dead, "recorder", None)
+        if dead:
+            dead.recorder = None   # Keep logging into the same session file
+            dead.close()
+        transport = self._open_transport(self.port, recorder)
+        if transport is None:
+            # A replugged adapter can come back under another name
+            from Discovery import PORT_OVERRIDE, discover
+            port = None if PORT_OVERRIDE else discover(timeout)
+            if port:
+                transport = self._open_transport(port, recorder)
+        if transport is None:
+            # Park the recorder on a closed transport for the next attempt
+            self.transport = SerialTransport(self.port, self.protocol, recorder=recorder)
+            return False
+        self.transport = transport
+        if reconnector is not self.reconnector:
+            self.close()           # close() ran while we were opening
+            return False
+        if self.protocol.request("HI", timeout).exception(timeout * 2) is not None:
+            return False
+        self.port = transport.port
+        if PREFER_BINARY:
+            self.protocol.enter_binary(timeout).exception(timeout * 2)
+        self.protocol.resync(timeout)
+        return True
+
+    def _open_transport(self, port, recorder):
+        transport = SerialTransport(port, self.protocol, recorder=recorder)
+        try:
+            transport.open()
+        except (serial.SerialException, OSError):
+            return None
+        return transport
+
+    def _reconnect_done(self, ok):
+        self.reconnector = None
+        if ok:
+            self.reconnected.emit()
+        else:
+            self.close()
+            self.connection_lost.emit("Could not reconnect")
+
+    @property
+    def is_open(self):
+        return self.transport is not None and self.transport.is_open
+
+    def link_quality(self):
+        """One line of RTT, jitter and heartbeat figures for display or logs"""
+        text = self.protocol.stats.summary()
+        heartbeat = self.protocol.heartbeat
+        if heartbeat:
+            text += f", UP every {heartbeat.interval:.1f} s ({heartbeat.missed} missed)"
+        return text
+
+    def send(self, command):
+        self.protocol.send(command)
+
+    def request(self, command, timeout=None):
+        return self.protocol.request(command, timeout)
+
+    def enter_binary(self):
+        return self.protocol.enter_binary()
+
+    def write_lcd(self, line1, line2):
+        return self.protocol.write_lcd(line1, line2)
+
+    def configure_pot(self, channel, deadband=POT_DEADBAND, max_rate=None):
+        return self.protocol.configure_pot(channel, deadband, max_rate)
+
+    def start_stream(self, rate):
+        return self.protocol.start_stream(rate)
+
+    def stop_stream(self):
+        return self.protocol.stop_stream()
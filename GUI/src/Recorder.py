@@ -0,0 +1,279 @@
+# Recorder.py
+"""Session capture and replay for the dongle link.
+
+Every byte written to or read from the port can be appended to a session
+log; a ReplayTransport later feeds the received bytes back into a
+DeviceProtocol with the original timing, N times faster, or flat out.
+
+    DONGLE_RECORD=run.log python HomePage.py        # record while using the GUI
+    DONGLE_REPLAY=run.log python HomePage.py        # replay it into the GUI
+    python Recorder.py info run.log
+    python Recorder.py replay run.log --speed 0     # profile the host stack
+
+Each connection is its own session: when run.log already exists the next
+one goes to run-1.log, then run-2.log and so on.
+"""
+import argparse
+import mmap
+import os
+import struct
+import threading
+import time
+
+RECORD_PATH = os.environ.get("DONGLE_RECORD")              # Log every session here
+REPLAY_PATH = os.environ.get("DONGLE_REPLAY")              # Replay this log instead of the port
+REPLAY_SPEED = float(os.environ.get("DONGLE_REPLAY_SPEED", "1"))   # 0 = as fast as possible
+READ_TIMEOUT = 0.05                # Same tick interval as SerialTransport
+
+# File layout: HEADER, then RECORD + payload repeated. The file grows in
+# CHUNK steps and is zero-filled ahead of the write position, so a record
+# with direction 0 marks the end of a session that was never closed.
+MAGIC = b"DONGLOG1"
+HEADER = struct.Struct("<8sd")     # magic, wall-clock start (time.time())
+RECORD = struct.Struct("<dBH")     # seconds since start (monotonic), direction, length
+CHUNK = 1 << 20
+DIRECTION_RX = 1                   # Device -> host
+DIRECTION_TX = 2                   # Host -> device
+
+
+def session_path(path):
+    """path if it is free, else the first free numbered variant (run-1.log)"""
+    stem, ext = os.path.splitext(path)
+    number = 0
+    while os.path.exists(path):
+        number += 1
+        path = f"{stem}-{number}{ext}"
+    return path
+
+
+class SessionRecorder:
+    """Appends timestamped TX/RX chunks to a memory-mapped log file.
+
+    record() is called from the reader thread and from whichever thread
+    writes commands, so appends are serialised by a lock.
+    """
+    def __init__(self, path, chunk=CHUNK):
+        self.base = path               # Where sessions go, numbered if taken
+        self.path = None               # File of the current session
+        self.chunk = chunk
+        self.file = None
+        self.map = None
+        self.size = 0                  # Bytes of the file in use
+        self.start = None
+        self.lock = threading.Lock()
+
+    def open(self):
+        # Exclusive create: an earlier session in the same place is kept
+        self.path = session_path(self.base)
+        self.file = open(self.path, "x+b")
+        self.file.truncate(self.chunk)
+        self.map = mmap.mmap(self.file.fileno(), self.chunk)
+        self.start = time.monotonic()
+        HEADER.pack_into(self.map, 0, MAGIC, time.time())
+        self.size = HEADER.size
+        return self
+
+    @property
+    def is_open(self):
+        return self.map is not None
+
+    def record(self, direction, data):
+        with self.lock:
+            if self.map is None:
+                return
+            end = self.size + RECORD.size + len(data)
+            if end > len(self.map):
+                self._grow(end)
+            RECORD.pack_into(self.map, self.size, time.monotonic() - self.start, direction, len(data))
+            self.map[self.size + RECORD.size:end] = data
+            self.size = end
+
+    def _grow(self, needed):
+        length = len(self.map)
+        while length < needed:
+            length += max(self.chunk, length)
+        self.map.flush()
+        self.map.close()
+        self.file.truncate(length)
+        self.map = mmap.mmap(self.file.fileno(), length)
+
+    def close(self):
+        with self.lock:
+            if self.map is None:
+                return
+            self.map.flush()
+            self.map.close()
+            self.map = None
+            self.file.truncate(self.size)
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SessionLog:
+    """Read-only view of a recorded session.
+
+    Iterating yields (seconds, direction, payload) tuples.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.started = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} is not a session log")
+
+    def __iter__(self):
+        data = self.map
+        offset = HEADER.size
+        end = len(data)
+        while offset + RECORD.size <= end:
+            seconds, direction, length = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            if direction == 0 or offset + length > end:
+                break
+            yield seconds, direction, data[offset:offset + length]
+            offset += length
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ------------------------- Replay -------------------------
+class ReplayTransport:
+    """Stands in for SerialTransport and plays back the RX side of a log.
+
+    speed 1 keeps the recorded timing, N plays N times faster and 0 does
+    not wait at all. Writes from the protocol are accepted and dropped;
+    the device's answers come from the log.
+    """
+    def __init__(self, path, protocol, speed=REPLAY_SPEED):
+        self.path = path
+        self.protocol = protocol
+        self.speed = speed
+        self.thread = None
+        self.running = False
+        self.finished = threading.Event()
+        self.written = 0               # TX bytes the protocol produced
+        self.replayed = 0              # RX bytes fed to the protocol
+
+    def open(self):
+        log = SessionLog(self.path)
+        self.running = True
+        self.protocol.connection_made(self)
+        self.thread = threading.Thread(target=self._replay, args=(log,), name="replay", daemon=True)
+        self.thread.start()
+
+    def write(self, data):
+        self.written += len(data)
+
+    def close(self):
+        self.running = False
+        if self.protocol.transport is self:
+            self.protocol.transport = None
+            if self.protocol.scheduler:
+                self.protocol.scheduler.cancel_all("Replay closed")
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+
+    @property
+    def is_open(self):
+        return self.running
+
+    def _replay(self, log):
+        protocol = self.protocol
+        start = time.monotonic()
+        with log:
+            for seconds, direction, payload in log:
+                if not self.running:
+                    break
+                if direction != DIRECTION_RX:
+                    continue
+                if self.speed > 0:
+                    due = start + seconds / self.speed
+                    while self.running and time.monotonic() < due:
+                        # Keep command timeouts running through quiet stretches
+                        time.sleep(max(0.0, min(READ_TIMEOUT, due - time.monotonic())))
+                        protocol.tick(time.monotonic())
+                protocol.data_received(payload)
+                self.replayed += len(payload)
+                protocol.tick(time.monotonic())
+        was_running = self.running
+        self.running = False
+        self.finished.set()
+        if was_running:
+            protocol.connection_lost("Replay finished")
+
+# ------------------------- Run -------------------------
+def info_main(args):
+    counts = {DIRECTION_RX: [0, 0], DIRECTION_TX: [0, 0]}
+    last = 0.0
+    with SessionLog(args.log) as log:
+        for seconds, direction, payload in log:
+            counts[direction][0] += 1
+            counts[direction][1] += len(payload)
+            last = seconds
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(log.started))
+    print(f"started   {started}")
+    print(f"duration  {last:.3f} s")
+    for name, direction in (("rx", DIRECTION_RX), ("tx", DIRECTION_TX)):
+        chunks, size = counts[direction]
+        print(f"{name}        {chunks} chunks, {size} bytes")
+
+
+def replay_main(args):
+    from Protocol import DeviceListener, DeviceProtocol
+
+    class Counter(DeviceListener):
+        def __init__(self):
+            self.events = 0
+
+        def ack_received(self, word):
+            self.events += 1
+
+        def pot_changed(self, channel, value):
+            self.events += 1
+
+        def button_pressed(self, index):
+            self.events += 1
+
+        def line_received(self, line):
+            self.events += 1
+
+    counter = Counter()
+    transport = ReplayTransport(args.log, DeviceProtocol(counter), args.speed)
+    start = time.perf_counter()
+    transport.open()
+    transport.finished.wait()
+    elapsed = time.perf_counter() - start
+    print(f"{counter.events} events, {transport.replayed} bytes in {elapsed:.3f} s "
+          f"({counter.events / elapsed:.0f} events/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay a recorded dongle session")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="Summarise a session log")
+    info.add_argument("log")
+    info.set_defaults(run=info_main)
+    replay = sub.add_parser("replay", help="Feed a session log through the protocol layer")
+    replay.add_argument("log")
+    replay.add_argument("--speed", type=float, default=REPLAY_SPEED,
+                        help="1 = recorded timing, N = N times faster, 0 = as fast as possible")
+    replay.set_defaults(run=replay_main)
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
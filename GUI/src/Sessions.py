@@ -0,0 +1,293 @@
+# Sessions.py
+"""Several dongles on one host, all served by a single I/O thread.
+
+SessionManager owns one serial port per controller and waits on all of
+them with one selectors loop (epoll on Linux) instead of a reader thread
+per port. Each board gets its own DeviceSession: a DeviceProtocol with its
+own parser and command window, and a queue its POT/BTN/ack events land
+on, so boards never see each other's traffic.
+
+    python Sessions.py /dev/ttyUSB0 /dev/ttyUSB1     # handshake every board, tail events
+    python Sessions.py --simulate 32 --seconds 5     # same against 32 simulators
+
+Serial ports have to be selectable file descriptors, so this is POSIX only.
+"""
+import argparse
+import os
+import queue
+import selectors
+import threading
+import time
+
+import serial
+
+from Protocol import BAUD_RATE, COMMAND_TIMEOUT, COMMAND_WINDOW, READ_TIMEOUT, DeviceListener, DeviceProtocol
+
+READ_SIZE = 4096                   # Most bytes taken from one port per wakeup
+TICK_INTERVAL = READ_TIMEOUT       # How often every protocol's timeouts are checked
+
+
+class ChannelListener(DeviceListener):
+    """Puts one board's events on its queue as (kind, ...) tuples.
+
+    kind is "ack", "pot", "button", "line", "samples" or "lost".
+    """
+    def __init__(self, events):
+        self.events = events
+
+    def ack_received(self, word):
+        self.events.put(("ack", word))
+
+    def pot_changed(self, channel, value):
+        self.events.put(("pot", channel, value))
+
+    def button_pressed(self, index):
+        self.events.put(("button", index))
+
+    def line_received(self, line):
+        self.events.put(("line", line))
+
+    def samples_received(self, samples):
+        self.events.put(("samples", samples))
+
+    def connection_lost(self, reason):
+        self.events.put(("lost", reason))
+
+
+class DeviceSession:
+    """One board behind a SessionManager.
+
+    Acts as the transport of its DeviceProtocol: writes go straight to
+    the port from the calling thread, reads arrive from the manager's
+    loop. Commands are sent the same way as on a DeviceLink.
+    """
+    def __init__(self, manager, port, listener=None, window=COMMAND_WINDOW, heartbeat=True):
+        self.manager = manager
+        self.port = port
+        self.events = queue.SimpleQueue()
+        self.protocol = DeviceProtocol(listener or ChannelListener(self.events), window, heartbeat)
+        self.serial = None
+        self.write_lock = threading.Lock()
+
+    # --- transport, called by the protocol ---
+    def write(self, data):
+        with self.write_lock:
+            self.serial.write(data)
+
+    def close(self):
+        self.manager.close_session(self)
+
+    @property
+    def is_open(self):
+        return self.serial is not None and self.protocol.transport is self
+
+    # --- commands ---
+    def send(self, command):
+        self.protocol.send(command)
+
+    def request(self, command, timeout=None):
+        return self.protocol.request(command, timeout)
+
+    def enter_binary(self, timeout=None):
+        return self.protocol.enter_binary(timeout)
+
+    def write_lcd(self, line1, line2, timeout=None):
+        return self.protocol.write_lcd(line1, line2, timeout)
+
+    def get_event(self, timeout=None):
+        """Next (kind, ...) event from this board, or None after timeout seconds"""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class SessionManager:
+    """Owns N DeviceSessions and the one thread that reads all of them.
+
+    open() and close_session() may be called from any thread; they only
+    queue the change and wake the loop, which alone touches the selector.
+    """
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.sessions = {}             # port -> DeviceSession
+        self.lock = threading.Lock()
+        self.changes = queue.SimpleQueue()   # (add or remove, session) for the loop
+        self.wake_read, self.wake_write = os.pipe()
+        os.set_blocking(self.wake_read, False)
+        self.selector.register(self.wake_read, selectors.EVENT_READ, None)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="sessions", daemon=True)
+        self.thread.start()
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.sessions.values()))
+
+    def __getitem__(self, port):
+        return self.sessions[port]
+
+    def open(self, port, listener=None, window=COMMAND_WINDOW, heartbeat=True):
+        """Open port and start serving it; raises SerialException like SerialTransport."""
+        with self.lock:
+            if port in self.sessions:
+                raise ValueError(f"{port} is already open")
+        session = DeviceSession(self, port, listener, window, heartbeat)
+        # timeout 0: never block the loop; writes still block their caller
+        session.serial = serial.Serial(port, BAUD_RATE, timeout=0)
+        with self.lock:
+            self.sessions[port] = session
+        session.protocol.connection_made(session)
+        self._change(True, session)
+        return session
+
+    def close_session(self, session, reason="Connection closed"):
+        with self.lock:
+            if self.sessions.get(session.port) is not session:
+                return
+            del self.sessions[session.port]
+        if session.protocol.transport is session:
+            session.protocol.transport = None
+            # A closed session is no longer ticked, so nothing would expire them
+            session.protocol.scheduler.cancel_all(reason)
+        self._change(False, session)
+
+    def close(self):
+        """Close every port and stop the loop."""
+        for session in list(self):
+            session.close()
+        self.running = False
+        self._wake()
+        if self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+
+    def request_all(self, command, timeout=None):
+        """Send command to every board at once; returns {port: Future}."""
+        return {session.port: session.request(command, timeout) for session in self}
+
+    # --- loop ---
+    def _change(self, add, session):
+        self.changes.put((add, session))
+        self._wake()
+
+    def _wake(self):
+        try:
+            os.write(self.wake_write, b"\0")
+        except OSError:
+            pass                       # Pipe full: the loop is waking anyway
+
+    def _apply_changes(self):
+        while True:
+            try:
+                add, session = self.changes.get_nowait()
+            except queue.Empty:
+                return
+            if session.serial is None:
+                continue
+            fd = session.serial.fileno()
+            if add:
+                self.selector.register(fd, selectors.EVENT_READ, session)
+            else:
+                if fd in self.selector.get_map():
+                    self.selector.unregister(fd)
+                session.serial.close()
+                session.serial = None
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while self.running:
+            self._apply_changes()
+            for key, _ in self.selector.select(max(0.0, next_tick - time.monotonic())):
+                if key.data is None:
+                    try:
+                        os.read(self.wake_read, READ_SIZE)
+                    except BlockingIOError:
+                        pass
+                    continue
+                self._read(key.fd, key.data)
+            now = time.monotonic()
+            if now >= next_tick:
+                for session in list(self.sessions.values()):
+                    session.protocol.tick(now)
+                next_tick = now + TICK_INTERVAL
+        self._apply_changes()
+        self.selector.close()
+        os.close(self.wake_read)
+        os.close(self.wake_write)
+
+    def _read(self, fd, session):
+        try:
+            data = os.read(fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._lost(session, str(e))
+            return
+        if not data:
+            # Readable with nothing to read: the adapter went away
+            self._lost(session, "Serial port closed")
+            return
+        session.protocol.data_received(data)
+
+    def _lost(self, session, reason):
+        attached = session.protocol.transport is session
+        self.close_session(session, reason)
+        self._apply_changes()
+        if attached:
+            session.protocol.connection_lost(reason)
+
+# ------------------------- Run -------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Serve several dongles from one I/O thread")
+    parser.add_argument("ports", nargs="*", help="Serial ports of the boards")
+    parser.add_argument("--simulate", type=int, default=0, metavar="N",
+                        help="Add N simulated boards reporting pots (see Simulator.py)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="How long to tail events")
+    parser.add_argument("--timeout", type=float, default=COMMAND_TIMEOUT)
+    args = parser.parse_args()
+
+    simulators = []
+    ports = list(args.ports)
+    if args.simulate:
+        from Simulator import DeviceSimulator
+        for seed in range(args.simulate):
+            simulator = DeviceSimulator(pot_rate=5.0, button_rate=0.2, seed=seed)
+            ports.append(simulator.open())
+            simulators.append(simulator)
+    threads = threading.active_count()
+    manager = SessionManager()
+    try:
+        for port in ports:
+            try:
+                manager.open(port)
+            except (serial.SerialException, OSError) as e:
+                print(f"{port}: {e}")
+        start = time.perf_counter()
+        for port, future in manager.request_all("HI", args.timeout).items():
+            error = future.exception(args.timeout * 2)
+            print(f"{port}: {'HEY' if error is None else type(error).__name__}")
+        print(f"handshake with {len(manager)} boards in {time.perf_counter() - start:.3f} s, "
+              f"{threading.active_count() - threads} I/O thread(s)")
+        counts = {session.port: 0 for session in manager}
+        end = time.monotonic() + args.seconds
+        while time.monotonic() < end:
+            for session in manager:
+                event = session.get_event(0)
+                while event is not None:
+                    counts[session.port] += 1
+                    print(session.port, *event)
+                    event = session.get_event(0)
+            time.sleep(READ_TIMEOUT)
+        for port, count in counts.items():
+            print(f"{port}: {count} events")
+    finally:
+        manager.close()
+        for simulator in simulators:
+            simulator.close()
+
+
+if __name__ == "__main__":
+    main()
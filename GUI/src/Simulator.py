@@ -0,0 +1,383 @@
+# Simulator.py
+"""Pure-Python stand-in for the STM32 controller on a pseudo-terminal.
+
+Run it and point the GUI (DONGLE_PORT), the protocol layer or the
+benchmarks at the printed /dev/pts/N path:
+
+    python Simulator.py --pot-rate 20 --button-rate 0.5
+"""
+import argparse
+import os
+import random
+import pty
+import re
+import select
+import threading
+import time
+import tty
+
+import numpy as np
+
+from Protocol import (
+    BAUD_RATE, FRAME_ACK, FRAME_BTN0, FRAME_POT0, FRAME_TYPES, LCD_COLUMNS, POT_DEADBAND,
+    POT_DEADBAND_MAX, POT_INTERVAL_MAX, decode_frame, encode_frame,
+)
+from Stream import STREAM_PAIRS, STREAM_RATE_MAX, encode_records, end_record
+
+RX_SIZE = 50                       # RXF_LINE_SIZE in rxframer.h, text keeps one byte for '\0'
+ADC_MAX = 4095
+
+FRAME_NAMES = {value: name for name, value in FRAME_TYPES.items()}
+TEXT_ACKS = {"HI": b"HEY\r\n", "UP": b"YES\r\n", "WR": b"DID\r\n",
+             "LI": b"LIT\r\n", "ES": b"SHO\r\n", "WP": b"PUT\r\n", "PC": b"SET\r\n",
+             "SR": b"RUN\r\n"}
+
+
+def rtrim(text):
+    return text.rstrip(" ")
+
+
+# sscanf(buffer, "%2s %d") and sscanf(buffer, "%2s %[^\n]") from main.c
+LI_FORMAT = re.compile(r"\s*(\S{1,2})\s*([+-]?\d+)")
+WR_FORMAT = re.compile(r"\s*(\S{1,2})\s*([^\n]+)")
+PC_FORMAT = re.compile(r"PC\s*(\d+)\s*(\d+)\s*(\d+)")
+SR_FORMAT = re.compile(r"SR\s*(\d+)")
+
+
+def parse_li_value(msg):
+    """parseLIValue(): "LI <0-255>", -1 if malformed or out of range"""
+    match = LI_FORMAT.match(rtrim(msg[:19]))
+    if not match or match.group(1) != "LI":
+        return -1
+    value = int(match.group(2))
+    return value if 0 <= value <= 255 else -1
+
+
+def parse_wr_command(msg, max_len=50):
+    """parseWRCommand(): "WR line1;line2", None if malformed"""
+    match = WR_FORMAT.match(rtrim(msg[:255]))
+    if not match or match.group(1) != "WR" or ";" not in match.group(2):
+        return None
+    line1, _, line2 = match.group(2).partition(";")
+    return rtrim(line1[:max_len - 1]), rtrim(line2[:max_len - 1])
+
+
+def parse_wp_command(msg):
+    """parseWPCommand(): "WP <row> <column> <text>", None if malformed"""
+    if len(msg) < 7 or msg[2] != " " or msg[3] not in "01" or msg[4] != " ":
+        return None
+    head, sep, text = msg[5:].partition(" ")
+    if not sep or not head.isdigit() or len(head) > 2 or int(head) >= LCD_COLUMNS:
+        return None
+    return int(msg[3]), int(head), text
+
+
+def parse_sr_value(msg):
+    """parseSRValue(): "SR <rate>", -1 if malformed or too fast"""
+    match = SR_FORMAT.match(msg)
+    if not match or int(match.group(1)) > STREAM_RATE_MAX:
+        return -1
+    return int(match.group(1))
+
+
+def parse_pc_command(msg):
+    """parsePCCommand(): "PC <channel> <deadband> <interval>", None if malformed"""
+    match = PC_FORMAT.match(msg)
+    if not match:
+        return None
+    channel, deadband, interval = (int(field) for field in match.groups())
+    if channel > 1 or deadband > POT_DEADBAND_MAX or interval > POT_INTERVAL_MAX:
+        return None
+    return channel, deadband, interval
+
+# ------------------------- Device Model -------------------------
+class DeviceSimulator:
+    """Behaves like main.c behind a pty: LCD, LED register, pots and buttons."""
+    def __init__(self, pot_rate=0.0, button_rate=0.0, paced=True, seed=None):
+        self.pot_rate = pot_rate           # POT reports per second, both channels together
+        self.button_rate = button_rate     # BTN presses per second
+        self.paced = paced                 # Hold each reply for its 115200 baud wire time
+        self.random = random.Random(seed)
+
+        self.lcd = [" " * LCD_COLUMNS, " " * LCD_COLUMNS]
+        self.leds = 0
+        self.binary = False
+        self.pots = [0, 0]                 # Pot positions
+        self.reported = [0, 0]             # Last value sent for each pot
+        self.last_report = [0.0, 0.0]
+        self.reset_pot_config()
+        self.stream_rate = 0               # Pairs per second, 0 = not streaming
+        self.stream_start = 0.0
+        self.stream_sent = 0               # Records sent this stream
+        self.commands = 0
+
+        self.rx = bytearray()
+        self.master = None
+        self.slave = None
+        self.path = None
+        self.thread = None
+        self.running = False
+
+    # --- lifecycle ---
+    def open(self):
+        """Create the pty and start the device thread; returns the port path."""
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.path = os.ttyname(self.slave)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="simulator", daemon=True)
+        self.thread.start()
+        return self.path
+
+    def close(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1)
+        for fd in (self.master, self.slave):
+            if fd is not None:
+                os.close(fd)
+        self.master = self.slave = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- main loop ---
+    def _run(self):
+        now = time.monotonic()
+        next_pot = now + self._interval(self.pot_rate)
+        next_button = now + self._interval(self.button_rate)
+        while self.running:
+            next_record = self._next_record() if self.stream_rate else now + 0.05
+            wait = max(0.0, min(next_pot, next_button, next_record, now + 0.05) - now)
+            readable, _, _ = select.select([self.master], [], [], wait)
+            if readable:
+                try:
+                    data = os.read(self.master, 4096)
+                except OSError:
+                    data = b""
+                for byte in data:
+                    self.receive_byte(byte)
+            now = time.monotonic()
+            if now >= next_pot:
+                self.move_pot(self.random.randrange(2))
+                next_pot = now + self._interval(self.pot_rate)
+            if now >= next_button:
+                self.send_button(self.random.randrange(4))
+                next_button = now + self._interval(self.button_rate)
+            for channel in range(2):
+                self.check_pot(channel, now)
+            if self.stream_rate and now >= self._next_record():
+                self.send_records(now)
+
+    def _interval(self, rate):
+        return 1.0 / rate if rate > 0 else float("inf")
+
+    def _next_record(self):
+        return self.stream_start + (self.stream_sent + 1) * STREAM_PAIRS / self.stream_rate
+
+    # --- rxf_feed() in rxframer.c ---
+    def receive_byte(self, byte):
+        rx = self.rx
+        if self.binary:
+            if byte == 0:
+                encoded = bytes(rx)
+                rx.clear()
+                self.handle_frame(encoded)
+            elif byte == 0x0A and rx == b"HI\r":
+                self.binary = False
+                rx.clear()
+                self.handle("HI")
+            elif len(rx) < RX_SIZE:
+                rx.append(byte)
+        elif byte in (0x0A, 0x0D):
+            msg = rx.decode("ascii", "replace")
+            rx.clear()
+            if msg:
+                self.handle(msg)
+        elif len(rx) < RX_SIZE - 1:
+            rx.append(byte)
+
+    # --- handle() ---
+    def handle(self, msg):
+        if self.stream_rate:
+            self.stop_stream()
+        name = msg[:2]
+        if name not in TEXT_ACKS and name != "BM":
+            return
+        self.commands += 1
+        if name == "HI":
+            self.show("Controller", "Connected.")
+            self.reset_pot_config()
+        elif name == "WR":
+            lines = parse_wr_command(msg)
+            if lines:
+                self.show(*lines)
+        elif name == "LI":
+            value = parse_li_value(msg)
+            if value != -1:
+                self.leds = value
+        elif name == "ES":
+            self.show("Controller", "Disconnected")
+        elif name == "WP":
+            parsed = parse_wp_command(msg)
+            if parsed:
+                self.put(*parsed)
+        elif name == "PC":
+            parsed = parse_pc_command(msg)
+            if parsed:
+                self.set_pot_config(*parsed)
+        elif name == "BM":
+            self.write(b"BIN\r\n")
+            self.binary = True
+            return
+        self.write(TEXT_ACKS[name])
+        if name == "SR":
+            self.start_stream(parse_sr_value(msg))
+
+    def handle_frame(self, encoded):
+        if self.stream_rate:
+            self.stop_stream()
+        try:
+            frame_type, payload = decode_frame(encoded)
+        except ValueError:
+            return
+        name = FRAME_NAMES.get(frame_type)
+        if name is None or name == "BM":
+            return
+        self.commands += 1
+        if name == "HI":
+            self.show("Controller", "Connected.")
+            self.reset_pot_config()
+        elif name == "WR":
+            line1, sep, line2 = payload.decode("ascii", "replace").partition(";")
+            if sep:
+                self.show(line1, line2)
+        elif name == "LI":
+            if len(payload) == 1:
+                self.leds = payload[0]
+        elif name == "ES":
+            self.show("Controller", "Disconnected")
+        elif name == "WP":
+            if len(payload) >= 2 and payload[0] < 2 and payload[1] < LCD_COLUMNS:
+                self.put(payload[0], payload[1], payload[2:].decode("ascii", "replace"))
+        elif name == "PC":
+            if len(payload) == 5 and payload[0] < 2:
+                deadband = int.from_bytes(payload[1:3], "little")
+                interval = int.from_bytes(payload[3:5], "little")
+                if deadband <= POT_DEADBAND_MAX and interval <= POT_INTERVAL_MAX:
+                    self.set_pot_config(payload[0], deadband, interval)
+        self.write(encode_frame(frame_type | FRAME_ACK))
+        if name == "ES":
+            self.binary = False
+        elif name == "SR" and len(payload) == 2:
+            self.start_stream(int.from_bytes(payload, "little"))
+
+    # --- peripherals ---
+    def show(self, line1, line2):
+        """CLEAR followed by both lines, as WR does"""
+        self.lcd = [line1[:LCD_COLUMNS].ljust(LCD_COLUMNS), line2[:LCD_COLUMNS].ljust(LCD_COLUMNS)]
+
+    def put(self, row, column, text):
+        text = text[:LCD_COLUMNS - column]
+        line = self.lcd[row]
+        self.lcd[row] = line[:column] + text + line[column + len(text):]
+
+    def move_pot(self, channel):
+        """Jump the pot far enough past the deadband for main.c to report it."""
+        old = self.reported[channel]
+        deadband = max(1, self.deadband[channel])
+        step = self.random.randint(deadband + 1, 4 * deadband)
+        value = old + step if old + step <= ADC_MAX else old - step
+        self.set_pot(channel, max(0, min(ADC_MAX, value)))
+
+    def set_pot(self, channel, value):
+        self.pots[channel] = value
+        self.check_pot(channel, time.monotonic())
+
+    # --- checkPot() ---
+    def check_pot(self, channel, now):
+        if self.stream_rate:
+            return
+        value = self.pots[channel]
+        if abs(value - self.reported[channel]) <= self.deadband[channel]:
+            return
+        if self.interval[channel] and now - self.last_report[channel] < self.interval[channel]:
+            return
+        self.last_report[channel] = now
+        self.reported[channel] = value
+        self.send_pot(channel, value)
+
+    def set_pot_config(self, channel, deadband, interval_ms):
+        self.deadband[channel] = deadband
+        self.interval[channel] = interval_ms / 1000
+
+    def reset_pot_config(self):
+        self.deadband = [POT_DEADBAND, POT_DEADBAND]
+        self.interval = [0.0, 0.0]         # Seconds between reports, 0 = no limit
+
+    def send_pot(self, channel, value):
+        if self.binary:
+            self.write(encode_frame(FRAME_POT0 + channel, value.to_bytes(2, "little")))
+        else:
+            self.write(f"POT{channel} {value:4d}\r\n".encode("ascii"))
+
+    def send_button(self, index):
+        if self.stream_rate:
+            return
+        if self.binary:
+            self.write(encode_frame(FRAME_BTN0 + index))
+        else:
+            self.write(f"BTN{index}\r\n".encode("ascii"))
+
+    # --- streaming mode (stream.h) ---
+    def start_stream(self, rate):
+        if 0 < rate <= STREAM_RATE_MAX:
+            self.stream_rate = rate
+            self.stream_start = time.monotonic()
+            self.stream_sent = 0
+
+    def stop_stream(self):
+        self.stream_rate = 0
+        self.write(end_record(self.stream_sent))
+
+    def send_records(self, now):
+        """Every record due by now: both pots sweep in slow sine waves."""
+        due = int((now - self.stream_start) * self.stream_rate / STREAM_PAIRS)
+        t = np.arange(self.stream_sent * STREAM_PAIRS, due * STREAM_PAIRS) / self.stream_rate
+        pairs = np.column_stack((2047 + 2000 * np.sin(t), 2047 + 2000 * np.cos(t)))
+        self.write(encode_records(self.stream_sent, pairs.astype("u2")))
+        self.stream_sent = due
+        self.pots = [int(value) for value in pairs[-1]]
+
+    def write(self, data):
+        if self.paced:
+            # 8N1: ten bit times per byte
+            time.sleep(len(data) * 10 / BAUD_RATE)
+        os.write(self.master, data)
+
+# ------------------------- Run -------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Emulate the dongle firmware on a pty")
+    parser.add_argument("--pot-rate", type=float, default=0.0, help="POT reports per second")
+    parser.add_argument("--button-rate", type=float, default=0.0, help="BTN presses per second")
+    parser.add_argument("--unpaced", action="store_true", help="Do not model 115200 baud wire time")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    simulator = DeviceSimulator(args.pot_rate, args.button_rate, not args.unpaced, args.seed)
+    print(simulator.open(), flush=True)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.close()
+
+
+if __name__ == "__main__":
+    main()
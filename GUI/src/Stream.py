@@ -0,0 +1,159 @@
+# Stream.py
+"""Decoder for the firmware's pot streaming mode (SR, Controller/Core/Inc/stream.h).
+
+While streaming the controller sends nothing but fixed 40-byte records of
+20 little endian uint16 words:
+
+    [sync 0x5AA5][seq][count][pot0 pot1] x 8 [check]
+
+so a whole receive buffer is decoded with one np.frombuffer() and a few
+array operations instead of line by line. seq gaps are counted as lost
+records; a record with count 0 ends the stream.
+"""
+import time
+
+import numpy as np
+
+STREAM_SYNC = 0x5AA5
+SYNC_BYTES = STREAM_SYNC.to_bytes(2, "little")
+STREAM_PAIRS = 8                   # pot0/pot1 pairs per record
+RECORD_WORDS = 3 + 2 * STREAM_PAIRS + 1
+RECORD_SIZE = 2 * RECORD_WORDS
+STREAM_RATE_MAX = 2000             # Pairs per second main.c accepts, ~87% of 115200 baud
+WORD = np.dtype("<u2")
+
+
+def encode_records(seq, samples):
+    """Records for an (n * STREAM_PAIRS, 2) array of pairs, numbered from seq."""
+    samples = np.asarray(samples, dtype=WORD).reshape(-1, 2 * STREAM_PAIRS)
+    count = len(samples)
+    words = np.empty((count, RECORD_WORDS), dtype=WORD)
+    words[:, 0] = STREAM_SYNC
+    words[:, 1] = (seq + np.arange(count)) & 0xFFFF
+    words[:, 2] = STREAM_PAIRS
+    words[:, 3:-1] = samples
+    words[:, -1] = words[:, 1:-1].sum(axis=1, dtype=np.uint32) & 0xFFFF
+    return words.tobytes()
+
+
+def end_record(seq):
+    """The count 0 record that closes a stream, as stream_end() builds it"""
+    words = np.zeros(RECORD_WORDS, dtype=WORD)
+    words[0] = STREAM_SYNC
+    words[1] = words[-1] = seq & 0xFFFF
+    return words.tobytes()
+
+
+class StreamDecoder:
+    """Turns stream records into arrays of (pot0, pot1) pairs.
+
+    begin() arms it when the firmware acknowledges SR; feed() then takes
+    raw bytes until the end record, after which active is False and the
+    bytes behind it are kept for drain(), like LineParser's stop words.
+    Corrupt records are skipped by hunting for the next sync word.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self.leftover = b""
+        self.active = False
+        self.rate = 0
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.records = 0               # Good sample records decoded
+        self.pairs = 0                 # (pot0, pot1) pairs in them
+        self.lost = 0                  # Records missing from the seq sequence
+        self.errors = 0                # Records rejected (sync, count or check)
+        self.skipped = 0               # Bytes thrown away while resyncing
+        self.next_seq = None
+        self.started = None            # time.monotonic() of begin()
+        self.last = None               # ... and of the newest record
+
+    def begin(self, rate):
+        self.buffer.clear()
+        self.leftover = b""
+        self.active = True
+        self.rate = rate
+        self.reset_counters()
+        self.started = time.monotonic()
+
+    def reset(self):
+        self.buffer.clear()
+        self.leftover = b""
+        self.active = False
+
+    @property
+    def pairs_per_s(self):
+        """Pairs per second from begin() to the newest record"""
+        if self.last is None or self.last <= self.started:
+            return 0.0
+        return self.pairs / (self.last - self.started)
+
+    @property
+    def loss(self):
+        """Fraction of records lost so far"""
+        total = self.records + self.lost
+        return self.lost / total if total else 0.0
+
+    def feed(self, data):
+        """Decode data; returns an (n, 2) uint16 array of the pairs it completes."""
+        buf = self.buffer
+        buf += data
+        out = []
+        while self.active:
+            start = buf.find(SYNC_BYTES)
+            if start < 0:
+                # Keep a trailing byte that may be the first half of a sync word
+                drop = max(0, len(buf) - 1)
+                self.skipped += drop
+                del buf[:drop]
+                break
+            if start:
+                self.skipped += start
+                del buf[:start]
+            count = len(buf) // RECORD_SIZE
+            if count == 0:
+                break
+            block = bytes(buf[:count * RECORD_SIZE])
+            del buf[:count * RECORD_SIZE]
+            words = np.frombuffer(block, dtype=WORD).reshape(count, RECORD_WORDS)
+            pairs = words[:, 2]
+            good = ((words[:, 0] == STREAM_SYNC)
+                    & ((pairs == STREAM_PAIRS) | (pairs == 0))
+                    & ((words[:, 1:-1].sum(axis=1, dtype=np.uint32) & 0xFFFF) == words[:, -1]))
+            usable = count if good.all() else int(np.argmin(good))
+            ends = np.flatnonzero(pairs[:usable] == 0)
+            if len(ends):
+                usable = int(ends[0]) + 1
+            if usable:
+                out.append(self._take(words[:usable]))
+            if len(ends):
+                # End of stream: the rest is text or frames again
+                self.active = False
+                self.leftover = block[usable * RECORD_SIZE:] + bytes(buf)
+                buf.clear()
+            elif usable < count:
+                # Corrupt record: look for the next sync from its second byte
+                self.errors += 1
+                buf[:0] = block[usable * RECORD_SIZE + 1:]
+        if not out:
+            return np.empty((0, 2), dtype=WORD)
+        return out[0] if len(out) == 1 else np.concatenate(out)
+
+    def _take(self, words):
+        """Count the records in words, ending with at most one end record."""
+        seqs = words[:, 1].astype(np.int64)
+        first = seqs[0] if self.next_seq is None else self.next_seq
+        gaps = (np.diff(seqs, prepend=first - 1) - 1) & 0xFFFF
+        self.lost += int(gaps.sum())
+        self.next_seq = int(seqs[-1] + 1) & 0xFFFF
+        data = words[words[:, 2] == STREAM_PAIRS]
+        self.records += len(data)
+        self.pairs += len(data) * STREAM_PAIRS
+        self.last = time.monotonic()
+        return data[:, 3:-1].reshape(-1, 2)
+
+    def drain(self):
+        """Hand back the bytes that followed the end record."""
+        rest, self.leftover = self.leftover, b""
+        return rest
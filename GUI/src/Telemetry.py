@@ -0,0 +1,217 @@
+# Telemetry.py
+"""Fixed-size NumPy history of pot reports.
+
+Every sample is stored twice, at i and at i + capacity, so the latest n
+samples always form one contiguous slice and view() never has to copy or
+concatenate across the wrap point.
+"""
+import time
+
+import numpy as np
+
+TELEMETRY_CAPACITY = 1 << 19       # ~3 hours of reports at 50/s, ~11.5 MB
+SAMPLE_DTYPE = np.dtype([("t", "f8"), ("channel", "u1"), ("value", "u2")])
+
+
+class TelemetryBuffer:
+    """Ring buffer of (timestamp, channel, value) pot samples.
+
+    Timestamps are time.monotonic() seconds and must not go backwards.
+    One writer (the GUI thread) is assumed.
+    """
+    def __init__(self, capacity=TELEMETRY_CAPACITY):
+        self.capacity = capacity
+        self.data = np.zeros(2 * capacity, dtype=SAMPLE_DTYPE)
+        self.head = 0                  # Samples ever appended
+        self.latest = {}               # channel -> last value
+
+    def __len__(self):
+        return min(self.head, self.capacity)
+
+    def append(self, channel, value, timestamp=None):
+        """Store one report; signature matches DeviceLink.pot_changed."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        pos = self.head % self.capacity
+        sample = (timestamp, channel, value)
+        self.data[pos] = sample
+        self.data[pos + self.capacity] = sample
+        self.head += 1
+        self.latest[channel] = value
+
+    def extend(self, timestamps, channels, values):
+        """Store a batch of reports given as equal-length arrays."""
+        timestamps = np.asarray(timestamps, dtype="f8")
+        channels = np.broadcast_to(np.asarray(channels, dtype="u1"), timestamps.shape)
+        values = np.asarray(values, dtype="u2")
+        count = len(timestamps)
+        if count == 0:
+            return
+        skip = max(0, count - self.capacity)
+        index = (self.head + skip + np.arange(count - skip)) % self.capacity
+        for offset in (0, self.capacity):
+            self.data["t"][index + offset] = timestamps[skip:]
+            self.data["channel"][index + offset] = channels[skip:]
+            self.data["value"][index + offset] = values[skip:]
+        self.head += count
+        for channel in np.unique(channels[skip:]):
+            self.latest[int(channel)] = int(values[skip:][channels[skip:] == channel][-1])
+
+    def clear(self):
+        self.head = 0
+        self.latest.clear()
+
+    # --- views ---
+    def view(self, count=None):
+        """Read-only view of the newest count samples (all by default), oldest first."""
+        size = len(self)
+        count = size if count is None else max(0, min(count, size))
+        end = self.head % self.capacity + self.capacity
+        window = self.data[end - count:end]
+        window.flags.writeable = False
+        return window
+
+    def between(self, t0, t1):
+        """Read-only view of the samples with t0 <= t <= t1."""
+        window = self.view()
+        times = window["t"]
+        return window[np.searchsorted(times, t0, "left"):np.searchsorted(times, t1, "right")]
+
+    def value_before(self, channel, t0):
+        """Last value reported on channel before t0, or None."""
+        # Gallop back from the newest sample: t0 is usually recent and a
+        # searchsorted over the strided "t" field of the whole buffer copies it
+        count = 1024
+        window = self.view(count)
+        while len(window) < len(self) and window["t"][0] >= t0:
+            count *= 4
+            window = self.view(count)
+        end = int(np.searchsorted(window["t"], t0, "left"))
+        while end > 0:
+            start = max(0, end - 1024)
+            hits = np.flatnonzero(window["channel"][start:end] == channel)
+            if len(hits):
+                return int(window["value"][start + hits[-1]])
+            end = start
+        return None
+
+    # --- plotting ---
+    def envelope(self, channel, t0, t1, width):
+        """Per-pixel (mins, maxs) of channel over [t0, t1) split into width columns.
+
+        The firmware only reports a pot when it moves, so the value is held
+        between samples: a column with no report shows the held value and a
+        column with reports also covers the value it started at. Columns
+        before the first known value are NaN. Cost is O(samples in range).
+        """
+        mins = np.full(width, np.nan)
+        maxs = np.full(width, np.nan)
+        if width <= 0 or t1 <= t0:
+            return mins, maxs
+        window = self.between(t0, t1)
+        samples = window[window["channel"] == channel]
+        lasts = np.full(width, np.nan)
+        if len(samples):
+            values = samples["value"].astype("f8")
+            column = ((samples["t"] - t0) * (width / (t1 - t0))).astype(np.intp)
+            np.clip(column, 0, width - 1, out=column)
+            starts = np.flatnonzero(np.diff(column, prepend=-1))
+            ends = np.append(starts[1:], len(column)) - 1
+            used = column[starts]
+            mins[used] = np.minimum.reduceat(values, starts)
+            maxs[used] = np.maximum.reduceat(values, starts)
+            lasts[used] = values[ends]
+        return hold(mins, maxs, lasts, self.value_before(channel, t0))
+
+
+def hold(mins, maxs, lasts, before):
+    """Widen each column by the value held when it starts.
+
+    lasts is the value each column ends on (NaN where nothing was
+    reported), before the value held entering the first column.
+    """
+    held = np.empty(len(lasts) + 1)
+    held[0] = np.nan if before is None else before
+    held[1:] = lasts
+    # Forward-fill the value each column ends on, shift to the value it starts on
+    filled = np.where(np.isnan(held), 0, np.arange(len(held)))
+    np.maximum.accumulate(filled, out=filled)
+    entering = held[filled][:-1]
+    return np.fmin(mins, entering), np.fmax(maxs, entering)
+
+# ------------------------- Plot Envelopes -------------------------
+class EnvelopeCache:
+    """Per-column min/max of a TelemetryBuffer kept up to date incrementally.
+
+    Time is cut into fixed columns of span / columns seconds, stored in a
+    ring indexed by column number. update() folds in only the samples
+    appended since the last call and columns() reads the ring, so a plot
+    frame costs O(columns + new samples) regardless of history length.
+    """
+    def __init__(self, telemetry, channels, columns, span):
+        self.telemetry = telemetry
+        self.channels = channels
+        self.reset(columns, span)
+
+    def reset(self, columns, span):
+        """Drop the cache, e.g. on resize; the next update() rebuilds it"""
+        self.width = max(1, columns)
+        self.step = span / self.width
+        shape = (self.channels, self.width)
+        self.mins = np.full(shape, np.nan)
+        self.maxs = np.full(shape, np.nan)
+        self.lasts = np.full(shape, np.nan)
+        self.ids = np.full(shape, -1, dtype=np.int64)
+        self.newest = -1               # Newest column number holding data
+        self.seen = 0                  # telemetry.head already folded in
+
+    def update(self):
+        telemetry = self.telemetry
+        if telemetry.head < self.seen:
+            # Buffer was cleared
+            self.reset(self.width, self.step * self.width)
+        count = telemetry.head - self.seen
+        self.seen = telemetry.head
+        if count <= 0:
+            return
+        new = telemetry.view(count)
+        times = new["t"]
+        # Anything older than one full span before the newest sample is off-screen
+        start = int(np.searchsorted(times, times[-1] - self.step * (self.width + 1), "left"))
+        new = new[start:]
+        column = (new["t"] // self.step).astype(np.int64)
+        self.newest = max(self.newest, int(column[-1]))
+        for channel in range(self.channels):
+            mask = new["channel"] == channel
+            if not mask.any():
+                continue
+            self._fold(channel, column[mask], new["value"][mask].astype("f8"))
+
+    def _fold(self, channel, column, values):
+        starts = np.flatnonzero(np.diff(column, prepend=column[0] - 1))
+        ends = np.append(starts[1:], len(column)) - 1
+        numbers = column[starts]
+        keep = numbers > self.newest - self.width
+        if not keep.any():
+            return
+        lows = np.minimum.reduceat(values, starts)[keep]
+        highs = np.maximum.reduceat(values, starts)[keep]
+        numbers = numbers[keep]
+        slots = numbers % self.width
+        fresh = self.ids[channel, slots] != numbers
+        self.mins[channel, slots] = np.where(fresh, lows, np.fmin(self.mins[channel, slots], lows))
+        self.maxs[channel, slots] = np.where(fresh, highs, np.fmax(self.maxs[channel, slots], highs))
+        self.lasts[channel, slots] = values[ends][keep]
+        self.ids[channel, slots] = numbers
+
+    def columns(self, channel, now):
+        """(mins, maxs) for the columns ending at now, oldest first"""
+        last = int(now // self.step)
+        numbers = np.arange(last - self.width + 1, last + 1)
+        slots = numbers % self.width
+        valid = self.ids[channel, slots] == numbers
+        mins = np.where(valid, self.mins[channel, slots], np.nan)
+        maxs = np.where(valid, self.maxs[channel, slots], np.nan)
+        lasts = np.where(valid, self.lasts[channel, slots], np.nan)
+        before = self.telemetry.value_before(channel, numbers[0] * self.step)
+        return hold(mins, maxs, lasts, before)
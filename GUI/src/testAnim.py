@@ -10,70 +10,7 @@ from PyQt5.QtCore import (
 )
 from PyQt5.QtGui import QColor, QBrush, QPen, QFont, QPainter
 
-# ------------------------- Button Animators -------------------------
-class ColorAnimator(QObject):
-    def __init__(self, button):
-        super().__init__()
-        self._color = QColor("#EBE8EB")
-        self.button = button
-
-    def getColor(self):
-        return self._color
-
-    def setColor(self, color):
-        self._color = color
-        self.button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {color.name()};
-                color: white;
-                border: none;
-                border-radius: 12px;
-                font-size: 20px;
-                padding: 10px 20px;
-            }}
-        """)
-
-    color = pyqtProperty(QColor, fget=getColor, fset=setColor)
-
-class TextBorderAnimator(QObject):
-    def __init__(self, button):
-        super().__init__()
-        self._color = QColor("#800080")
-        self.button = button
-
-    def getColor(self):
-        return self._color
-
-    def setColor(self, color):
-        self._color = color
-        self.button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: transparent;
-                color: {color.name()};
-                border: 3px solid {color.name()};
-                border-radius: 14px;
-                font-size: 24px;
-                font-weight: bold;
-                padding: 10px 20px;
-            }}
-        """)
-
-    color = pyqtProperty(QColor, fget=getColor, fset=setColor)
-
-class PanelColorAnimator(QObject):
-    def __init__(self, panel):
-        super().__init__()
-        self._color = QColor("#F0E68C")
-        self.panel = panel
-
-    def getColor(self):
-        return self._color
-
-    def setColor(self, color):
-        self._color = color
-        self.panel.setStyleSheet(f"background-color: {color.name()}; border-radius: 15px;")
-
-    color = pyqtProperty(QColor, fget=getColor, fset=setColor)
+from Animations import ColorAnimator, PanelColorAnimator, TextBorderAnimator
 
 # ------------------------- USB Animators -------------------------
 class AnimatedUSB(QObject):
@@ -310,7 +247,7 @@ class HomePage(QWidget):
         self.button.setGraphicsEffect(self.opacity_effect)
         self.opacity_effect.setOpacity(0)
 
-        self.color_animator = ColorAnimator(self.button)
+        self.color_animator = ColorAnimator(self.button, "#EBE8EB")
         self.glow_effect = QGraphicsColorizeEffect()
         self.glow_effect.setColor(QColor(128,0,128))
         self.glow_effect.setStrength(0)
@@ -394,7 +331,7 @@ class HomePage(QWidget):
         self.glow_animation = glow_anim
 
         # Looping text+border color
-        self.text_border_animator = TextBorderAnimator(self.button)
+        self.text_border_animator = TextBorderAnimator(self.button, "#800080")
         border_anim = QPropertyAnimation(self.text_border_animator, b"color")
         border_anim.setDuration(8000)
         border_anim.setKeyValueAt(0.0, QColor("#800080"))
@@ -447,7 +384,7 @@ class HomePage(QWidget):
 
     def start_panel_color_loop(self):
         # Panel color animation loop
-        self.panel_color_animator = PanelColorAnimator(self.panel)
+        self.panel_color_animator = PanelColorAnimator(self.panel, "#F0E68C")
         anim = QPropertyAnimation(self.panel_color_animator, b"color")
         anim.setDuration(7000)
         anim.setKeyValueAt(0.0, QColor("#F0DCF3"))
@@ -0,0 +1,6 @@
+# conftest.py
+"""Lets the tests import the flat modules in GUI/src, as the GUI does."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
@@ -0,0 +1,76 @@
+# test_coalescing.py
+"""Last-write-wins merging of queued LI and WR commands."""
+from Protocol import CommandScheduler
+
+
+def make():
+    # window=1 with UP in flight keeps everything after it queued
+    wire = []
+    scheduler = CommandScheduler(wire.append, window=1)
+    scheduler.submit("UP")
+    return scheduler, wire
+
+
+def drain(scheduler, wire):
+    """Ack whatever is in flight until the queue is empty; return the wire."""
+    acks = {"UP": "YES", "LI": "LIT", "WR": "DID", "WP": "PUT", "HI": "HEY", "ES": "SHO",
+            "BM": "BIN", "SR": "RUN"}
+    while scheduler.in_flight:
+        scheduler.ack_received(acks[scheduler.in_flight[0].command[:2]])
+    return wire
+
+
+def test_queued_li_keeps_only_the_newest_value():
+    scheduler, wire = make()
+    first = scheduler.submit("LI 1")
+    second = scheduler.submit("LI 2")
+    assert first is second
+    assert scheduler.coalesced == 1
+    assert drain(scheduler, wire) == ["UP", "LI 2"]
+    assert first.result(0) == "LIT"
+
+
+def test_li_and_wr_coalesce_separately():
+    scheduler, wire = make()
+    for command in ("LI 1", "WR a;a", "LI 2", "WR b;b"):
+        scheduler.submit(command)
+    assert drain(scheduler, wire) == ["UP", "LI 2", "WR b;b"]
+
+
+def test_commands_on_the_wire_are_never_replaced():
+    wire = []
+    scheduler = CommandScheduler(wire.append, window=1)
+    scheduler.submit("LI 1")
+    scheduler.submit("LI 2")
+    assert drain(scheduler, wire) == ["LI 1", "LI 2"]
+    assert scheduler.coalesced == 0
+
+
+def test_wp_breaks_a_wr_run():
+    scheduler, wire = make()
+    for command in ("WR a;a", "WP 0 0 x", "WR b;b"):
+        scheduler.submit(command)
+    assert drain(scheduler, wire) == ["UP", "WR a;a", "WP 0 0 x", "WR b;b"]
+
+
+def test_hi_and_es_break_a_wr_run():
+    # Both rewrite the LCD, so a WR may not hop over them
+    for breaker in ("HI", "ES"):
+        scheduler, wire = make()
+        for command in ("WR a;a", breaker, "WR b;b"):
+            scheduler.submit(command)
+        assert drain(scheduler, wire) == ["UP", "WR a;a", breaker, "WR b;b"]
+
+
+def test_bm_breaks_a_run():
+    scheduler, wire = make()
+    for command in ("LI 1", "BM", "LI 2"):
+        scheduler.submit(command)
+    assert drain(scheduler, wire) == ["UP", "LI 1", "BM", "LI 2"]
+
+
+def test_sr_breaks_a_run():
+    scheduler, wire = make()
+    for command in ("LI 1", "SR 100", "LI 2"):
+        scheduler.submit(command)
+    assert drain(scheduler, wire) == ["UP", "LI 1", "SR 100", "LI 2"]
@@ -0,0 +1,85 @@
+# test_lcd_shadow.py
+"""LcdShadow diffing and the WP commands write_lcd() sends from it."""
+from Protocol import LCD_COLUMNS, SPAN_MERGE_GAP, DeviceProtocol, LcdShadow, lcd_row
+
+
+class Wire:
+    def __init__(self):
+        self.sent = []
+
+    def write(self, data):
+        self.sent.append(data.decode("ascii").strip())
+
+
+def shadow(line1, line2):
+    lcd = LcdShadow()
+    lcd.set_lines(line1, line2)
+    return lcd
+
+
+def test_rows_are_trimmed_and_padded_like_the_firmware():
+    assert lcd_row("Hi   ") == "Hi".ljust(LCD_COLUMNS)
+    assert lcd_row("x" * 20) == "x" * LCD_COLUMNS
+
+
+def test_same_text_needs_no_spans():
+    lcd = shadow("Hello", "World")
+    assert lcd.diff("Hello", "World   ") == []
+
+
+def test_one_changed_character():
+    lcd = shadow("Hello", "World")
+    assert lcd.diff("Hello", "Wxrld") == [(1, 1, "x")]
+    assert lcd.rows[1] == lcd_row("Wxrld")
+
+
+def test_close_changes_merge_into_one_span():
+    lcd = shadow("abcdefghij", "")
+    # Columns 0 and 9 are SPAN_MERGE_GAP apart: resending 1-8 is cheaper
+    assert SPAN_MERGE_GAP == 8
+    assert lcd.diff("Xbcdefghi?", "") == [(0, 0, "Xbcdefghi?")]
+
+
+def test_distant_changes_get_their_own_spans():
+    lcd = shadow("a" * 16, "")
+    assert lcd.diff("b" + "a" * 14 + "b", "") == [(0, 0, "b"), (0, 15, "b")]
+
+
+def test_shorter_text_blanks_the_rest_of_the_row():
+    lcd = shadow("Connected", "")
+    assert lcd.diff("Con", "") == [(0, 3, "      ")]
+
+
+def test_both_rows_in_order():
+    lcd = shadow("one", "two")
+    assert lcd.diff("One", "twO") == [(0, 0, "O"), (1, 2, "O")]
+
+
+def test_write_lcd_sends_a_full_wr_first_then_only_changes():
+    protocol = DeviceProtocol()
+    wire = Wire()
+    protocol.connection_made(wire)
+    protocol.write_lcd("Hello", "World")
+    protocol.ack("DID")
+    protocol.write_lcd("Hello", "Wxrld")
+    assert wire.sent == ["WR Hello;World", "WP 1 1 x"]
+    assert protocol.write_lcd("Hello", "Wxrld") == []
+
+
+def test_hey_resets_the_shadow_to_the_hi_text():
+    protocol = DeviceProtocol()
+    protocol.connection_made(Wire())
+    protocol.request("WR Hello;World")
+    protocol.ack("DID")
+    protocol.request("HI")
+    protocol.ack("HEY")
+    assert protocol.lcd.rows == [lcd_row("Controller"), lcd_row("Connected.")]
+
+
+def test_hey_with_lcd_writes_outstanding_forgets_the_shadow():
+    protocol = DeviceProtocol()
+    protocol.connection_made(Wire())
+    protocol.request("HI")
+    protocol.request("WR a;b")
+    protocol.ack("HEY")
+    assert not protocol.lcd.known
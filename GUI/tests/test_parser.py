@@ -0,0 +1,60 @@
+# test_parser.py
+"""LineParser: events from a text stream cut at arbitrary points."""
+from Protocol import EVENT_ACK, EVENT_BTN, EVENT_LINE, EVENT_POT, LineParser
+
+
+def test_complete_lines():
+    parser = LineParser()
+    events = parser.feed(b"HEY\r\nPOT0 1234\r\nBTN2\r\nhello\r\n")
+    assert events == [(EVENT_ACK, "HEY", 0), (EVENT_POT, 0, 1234), (EVENT_BTN, 2, 0),
+                      (EVENT_LINE, "hello", 0)]
+
+
+def test_line_split_between_reads():
+    parser = LineParser()
+    assert parser.feed(b"POT1 20") == []
+    assert parser.feed(b"5") == []
+    assert parser.feed(b"\r") == []
+    assert parser.feed(b"\nLI") == [(EVENT_POT, 1, 205)]
+    assert parser.feed(b"T\r\n") == [(EVENT_ACK, "LIT", 0)]
+
+
+def test_split_between_cr_and_lf():
+    parser = LineParser()
+    assert parser.feed(b"BTN0\r") == []
+    assert parser.feed(b"\nBTN1\r\n") == [(EVENT_BTN, 0, 0), (EVENT_BTN, 1, 0)]
+
+
+def test_one_byte_at_a_time():
+    parser = LineParser()
+    events = []
+    for byte in b"YES\r\nPOT0 7\r\n":
+        events += parser.feed(bytes([byte]))
+    assert events == [(EVENT_ACK, "YES", 0), (EVENT_POT, 0, 7)]
+
+
+def test_empty_lines_and_bare_lf_are_tolerated():
+    parser = LineParser()
+    assert parser.feed(b"\r\n\nDID\n") == [(EVENT_ACK, "DID", 0)]
+
+
+def test_repeated_pot_lines_give_the_same_event():
+    parser = LineParser()
+    first = parser.feed(b"POT0 99\r\n")[0]
+    second = parser.feed(b"POT0 99\r\n")[0]
+    assert first == second == (EVENT_POT, 0, 99)
+
+
+def test_stop_word_keeps_the_rest_for_drain():
+    parser = LineParser()
+    events = parser.feed(b"HEY\r\nBIN\r\n\x03\x01\x02\x00")
+    assert events == [(EVENT_ACK, "HEY", 0), (EVENT_ACK, "BIN", 0)]
+    assert parser.drain() == b"\x03\x01\x02\x00"
+    assert parser.drain() == b""
+
+
+def test_reset_drops_a_partial_line():
+    parser = LineParser()
+    parser.feed(b"POT0 12")
+    parser.reset()
+    assert parser.feed(b"34\r\n") == [(EVENT_LINE, "34", 0)]
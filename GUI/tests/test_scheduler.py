@@ -0,0 +1,120 @@
+# test_scheduler.py
+"""CommandScheduler: in-order ack matching, timeouts and barriers."""
+import os
+import pty
+
+import pytest
+
+from Protocol import CommandLost, CommandScheduler, CommandTimeout, DeviceProtocol, SerialTransport
+
+
+def make(window=4, timeout=1.0):
+    wire = []
+    return CommandScheduler(wire.append, window=window, timeout=timeout), wire
+
+
+def test_acks_resolve_commands_in_order():
+    scheduler, wire = make()
+    first = scheduler.submit("UP")
+    second = scheduler.submit("UP")
+    assert wire == ["UP", "UP"]
+    assert scheduler.ack_received("YES")
+    assert first.result(0) == "YES"
+    assert not second.done()
+    assert scheduler.ack_received("YES")
+    assert second.result(0) == "YES"
+
+
+def test_window_holds_back_extra_commands():
+    scheduler, wire = make(window=2)
+    for command in ("UP", "LI 1", "ES"):
+        scheduler.submit(command)
+    assert wire == ["UP", "LI 1"]
+    assert scheduler.pending_count == 3
+    scheduler.ack_received("YES")
+    assert wire == ["UP", "LI 1", "ES"]
+
+
+def test_later_ack_marks_skipped_commands_lost():
+    scheduler, wire = make()
+    up = scheduler.submit("UP")
+    led = scheduler.submit("LI 3")
+    assert scheduler.ack_received("LIT")
+    with pytest.raises(CommandLost):
+        up.result(0)
+    assert led.result(0) == "LIT"
+    assert scheduler.pending_count == 0
+
+
+def test_unexpected_ack_is_ignored():
+    scheduler, wire = make()
+    up = scheduler.submit("UP")
+    assert not scheduler.ack_received("LIT")
+    assert not up.done()
+
+
+def test_expire_fails_overdue_commands():
+    scheduler, wire = make(window=1, timeout=0.5)
+    up = scheduler.submit("UP")
+    led = scheduler.submit("LI 1")
+    scheduler.expire(scheduler.in_flight[0].deadline - 0.1)
+    assert not up.done()
+    scheduler.expire(scheduler.in_flight[0].deadline)
+    with pytest.raises(CommandTimeout):
+        up.result(0)
+    # The freed slot goes to the next command
+    assert wire == ["UP", "LI 1"]
+    assert not led.done()
+
+
+def test_cancel_all_fails_everything_pending():
+    scheduler, wire = make(window=1)
+    futures = [scheduler.submit(command) for command in ("UP", "LI 1", "ES")]
+    scheduler.cancel_all("Connection closed")
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result(0)
+    assert scheduler.pending_count == 0
+
+
+def test_unknown_command_is_rejected():
+    scheduler, wire = make()
+    with pytest.raises(ValueError):
+        scheduler.submit("XX")
+    assert wire == []
+
+
+def test_closing_the_transport_fails_pending_commands():
+    # A pty nobody answers on stands in for a silent dongle
+    master, slave = pty.openpty()
+    protocol = DeviceProtocol()
+    transport = SerialTransport(os.ttyname(slave), protocol)
+    transport.open()
+    try:
+        future = protocol.request("UP", timeout=60)
+    finally:
+        transport.close()
+        os.close(master)
+        os.close(slave)
+    with pytest.raises(ConnectionError):
+        future.result(1)
+
+
+def test_bm_is_a_barrier():
+    scheduler, wire = make()
+    for command in ("UP", "BM", "LI 5"):
+        scheduler.submit(command)
+    assert wire == ["UP", "BM"]
+    scheduler.ack_received("YES")
+    scheduler.ack_received("BIN")
+    assert wire == ["UP", "BM", "LI 5"]
+
+
+def test_sr_with_rate_is_a_barrier():
+    scheduler, wire = make()
+    scheduler.submit("SR 100")
+    scheduler.submit("LI 5")
+    assert wire == ["SR 100"]
+    assert len(scheduler.in_flight) == 1
+    scheduler.ack_received("RUN")
+    assert wire == ["SR 100", "LI 5"]
@@ -0,0 +1,70 @@
+# test_telemetry.py
+"""TelemetryBuffer: contiguous views across the wrap and eviction of old samples."""
+import numpy as np
+
+from Telemetry import TelemetryBuffer
+
+
+def fill(buffer, count, start=0):
+    for i in range(start, start + count):
+        buffer.append(i % 2, i, timestamp=float(i))
+
+
+def test_view_before_the_buffer_fills():
+    buffer = TelemetryBuffer(capacity=8)
+    fill(buffer, 5)
+    assert len(buffer) == 5
+    assert list(buffer.view()["value"]) == [0, 1, 2, 3, 4]
+    assert list(buffer.view(2)["value"]) == [3, 4]
+
+
+def test_wrap_keeps_the_newest_samples_oldest_first():
+    buffer = TelemetryBuffer(capacity=8)
+    fill(buffer, 13)
+    assert len(buffer) == 8
+    view = buffer.view()
+    assert list(view["value"]) == list(range(5, 13))
+    assert list(view["t"]) == [float(i) for i in range(5, 13)]
+    # One slice of the doubled array, never a copy
+    assert view.base is not None and not view.flags.writeable
+
+
+def test_eviction_forgets_the_oldest():
+    buffer = TelemetryBuffer(capacity=4)
+    fill(buffer, 6)
+    assert len(buffer.between(0.0, 1.0)) == 0
+    assert list(buffer.between(2.0, 3.0)["value"]) == [2, 3]
+
+
+def test_extend_wraps_like_append():
+    buffer = TelemetryBuffer(capacity=8)
+    fill(buffer, 6)
+    times = np.arange(6, 11, dtype="f8")
+    buffer.extend(times, 1, np.arange(6, 11))
+    assert list(buffer.view()["value"]) == list(range(3, 11))
+    assert buffer.latest[1] == 10
+
+
+def test_extend_larger_than_capacity_keeps_the_tail():
+    buffer = TelemetryBuffer(capacity=4)
+    buffer.extend(np.arange(10, dtype="f8"), 0, np.arange(10))
+    assert list(buffer.view()["value"]) == [6, 7, 8, 9]
+    assert buffer.head == 10
+
+
+def test_latest_and_value_before():
+    buffer = TelemetryBuffer(capacity=8)
+    fill(buffer, 12)
+    assert buffer.latest == {0: 10, 1: 11}
+    assert buffer.value_before(0, 9.0) == 8
+    assert buffer.value_before(1, 9.0) == 7
+    # Evicted samples are gone
+    assert buffer.value_before(0, 4.0) is None
+
+
+def test_clear():
+    buffer = TelemetryBuffer(capacity=4)
+    fill(buffer, 6)
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.latest == {}